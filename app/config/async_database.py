@@ -0,0 +1,104 @@
+import os
+import asyncio
+import logging
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from .database import get_database_url
+
+logger = logging.getLogger(__name__)
+
+# 同步驱动 -> 异步驱动，ASYNC_DATABASE_URL 未设置时据此由 DATABASE_URL 推导
+# MySQL 使用 aiomysql，本地测试使用 SQLite + aiosqlite（均在 requirements.txt 中）
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'mysql': 'mysql+aiomysql',
+    'mysql+mysqlconnector': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+}
+
+_async_engine = None
+_async_session_factory = None
+
+
+def async_db_enabled() -> bool:
+    """是否启用异步数据库层（DB_ASYNC_ENABLED）"""
+    return os.getenv('DB_ASYNC_ENABLED', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_async_database_url() -> str:
+    """异步连接 URL：优先 ASYNC_DATABASE_URL，否则把 DATABASE_URL 的驱动替换为对应的异步驱动"""
+    url = os.getenv('ASYNC_DATABASE_URL')
+    if url:
+        return url
+    database_url = get_database_url()
+    if not database_url:
+        raise ValueError("未配置 DATABASE_URL 或 ASYNC_DATABASE_URL")
+    sync_url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(sync_url.drivername)
+    if driver is None:
+        raise ValueError(f"无法为 {sync_url.drivername} 推导异步驱动，请设置 ASYNC_DATABASE_URL")
+    return sync_url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_engine():
+    """创建（首次调用时）并返回异步引擎，连接池参数与同步引擎一致"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        url = get_async_database_url()
+        options = {'pool_pre_ping': True}
+        if not url.startswith('sqlite'):
+            options.update(pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800)
+        _async_engine = create_async_engine(url, **options)
+        logger.info("已创建异步数据库引擎，驱动: %s", make_url(url).drivername)
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    """异步会话工厂（对应同步的 SessionLocal）"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def dispose_async_engine():
+    """关闭异步引擎的连接池"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+
+async def get_async_db_with_retry(max_retries=3, retry_delay=1):
+    """获取异步数据库会话，重试间隔使用 asyncio.sleep，不阻塞事件循环"""
+    retry_count = 0
+    while True:
+        db = get_async_sessionmaker()()
+        try:
+            await db.execute(text("SELECT 1"))
+            return db
+        except Exception as e:
+            await db.close()
+            retry_count += 1
+            logger.error("数据库连接失败 (尝试 %d/%d): %s", retry_count, max_retries, e)
+            if retry_count >= max_retries:
+                raise
+            logger.info("等待 %s 秒后重试...", retry_delay)
+            await asyncio.sleep(retry_delay)
+
+
+async def get_async_db():
+    """FastAPI 依赖：获取异步数据库会话"""
+    db = await get_async_db_with_retry()
+    try:
+        yield db
+    finally:
+        await db.close()
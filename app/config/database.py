@@ -1,50 +1,105 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 import time
 import logging
 import os
-from dotenv import load_dotenv
+import threading
+from ..metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CONNECTIONS, DB_POOL_CHECKED_OUT
+from .env import load_env
+from .logging_config import setup_logging
 
-# 加载环境变量
-load_dotenv()
-
-# 配置日志
-logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
+# 配置日志（见 logging_config.LOG_PROFILES）
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# 数据库连接配置
-DATABASE_URL = os.getenv('DATABASE_URL')
-logger.info(f"使用数据库连接URL: {DATABASE_URL}")
-
-# 创建数据库引擎，添加连接池配置
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True,
-    poolclass=QueuePool,
-    echo=True  # 启用SQL语句日志
-)
-
-# 添加数据库事件监听器
-@event.listens_for(engine, 'connect')
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_database_url() -> str:
+    """数据库连接配置（DATABASE_URL）"""
+    load_env()
+    return os.getenv('DATABASE_URL')
+
+
+def mask_database_url(url: str) -> str:
+    """日志中隐藏连接 URL 的密码"""
+    try:
+        return make_url(url).render_as_string(hide_password=True)
+    except Exception:
+        return '<无法解析的 DATABASE_URL>'
+
+
+# 数据库事件监听器
 def receive_connect(dbapi_connection, connection_record):
-    logger.info("数据库连接已建立")
+    DB_POOL_CONNECTIONS.inc()
+    logger.debug("数据库连接已建立")
 
-@event.listens_for(engine, 'checkout')
 def receive_checkout(dbapi_connection, connection_record, connection_proxy):
-    logger.info("数据库连接已从连接池中取出")
+    DB_POOL_CHECKED_OUT.inc()
+    logger.debug("数据库连接已从连接池中取出")
 
-@event.listens_for(engine, 'checkin')
 def receive_checkin(dbapi_connection, connection_record):
-    logger.info("数据库连接已归还到连接池")
+    DB_POOL_CHECKED_OUT.dec()
+    logger.debug("数据库连接已归还到连接池")
+
+
+# 取得连接的等待时间：会话事务中第一条语句执行前记录开始时间，after_begin（已从连接池取得连接，
+# 包括新建连接和 pre_ping）时上报；事务结束时清除，之后只有 flush 的事务不计入
+def receive_orm_execute(orm_execute_state):
+    orm_execute_state.session.info.setdefault('pool_wait_started', time.perf_counter())
+
+def receive_after_begin(session, transaction, connection):
+    started = session.info.pop('pool_wait_started', None)
+    if started is not None:
+        DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+def receive_transaction_end(session, transaction):
+    session.info.pop('pool_wait_started', None)
+
+
+def get_engine():
+    """创建（首次调用时）并返回数据库引擎，导入本模块时不连接数据库、不加载数据库驱动"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = get_database_url()
+                logger.info("使用数据库连接URL: %s", mask_database_url(url))
+                # 添加连接池配置
+                engine = create_engine(
+                    url,
+                    pool_size=5,
+                    max_overflow=10,
+                    pool_timeout=30,
+                    pool_recycle=1800,
+                    pool_pre_ping=True,
+                    poolclass=QueuePool,
+                    echo=False  # SQL语句日志由 LOG_SQL_ECHO 控制（见 logging_config）
+                )
+                event.listen(engine, 'connect', receive_connect)
+                event.listen(engine, 'checkout', receive_checkout)
+                event.listen(engine, 'checkin', receive_checkin)
+                _engine = engine
+    return _engine
+
+
+class LazySessionmaker(sessionmaker):
+    """第一次创建会话时才绑定 get_engine()"""
+    def __call__(self, **local_kw):
+        if self.kw.get('bind') is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
 
 # 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
+event.listen(SessionLocal, 'do_orm_execute', receive_orm_execute)
+event.listen(SessionLocal, 'after_begin', receive_after_begin)
+event.listen(SessionLocal, 'after_transaction_end', receive_transaction_end)
 
 # 创建基本映射类
 Base = declarative_base()
@@ -54,18 +109,18 @@ def get_db_with_retry(max_retries=3, retry_delay=1):
     retry_count = 0
     while retry_count < max_retries:
         try:
-            logger.info("尝试获取数据库会话...")
+            logger.debug("尝试获取数据库会话...")
             db = SessionLocal()
             # 测试连接是否有效
-            logger.info("测试数据库连接...")
-            db.execute("SELECT 1")
-            logger.info("数据库连接测试成功")
+            logger.debug("测试数据库连接...")
+            db.execute(text("SELECT 1"))
+            logger.debug("数据库连接测试成功")
             return db
         except Exception as e:
             retry_count += 1
-            logger.error(f"数据库连接失败 (尝试 {retry_count}/{max_retries}): {str(e)}")
+            logger.error("数据库连接失败 (尝试 %d/%d): %s", retry_count, max_retries, e)
             if retry_count < max_retries:
-                logger.info(f"等待 {retry_delay} 秒后重试...")
+                logger.info("等待 %s 秒后重试...", retry_delay)
                 time.sleep(retry_delay)
                 continue
             raise
@@ -73,17 +128,17 @@ def get_db_with_retry(max_retries=3, retry_delay=1):
 def get_db():
     """获取数据库会话"""
     try:
-        logger.info("开始获取数据库会话...")
+        logger.debug("开始获取数据库会话...")
         db = get_db_with_retry()
-        logger.info("成功获取数据库会话")
+        logger.debug("成功获取数据库会话")
         yield db
     except Exception as e:
-        logger.error(f"获取数据库连接失败: {str(e)}")
+        logger.error("获取数据库连接失败: %s", e)
         raise
     finally:
         try:
-            logger.info("关闭数据库会话...")
+            logger.debug("关闭数据库会话...")
             db.close()
-            logger.info("数据库会话已关闭")
+            logger.debug("数据库会话已关闭")
         except Exception as e:
-            logger.error(f"关闭数据库连接失败: {str(e)}") 
\ No newline at end of file
+            logger.error("关闭数据库连接失败: %s", e) 
\ No newline at end of file
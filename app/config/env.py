@@ -0,0 +1,13 @@
+_loaded = False
+
+
+def load_env():
+    """
+    读取 .env（已设置的环境变量优先），只读取一次
+    入口模块在导入其他 app 模块之前调用，模块级的配置项才能读到 .env 中的值
+    """
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
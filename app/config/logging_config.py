@@ -0,0 +1,105 @@
+import os
+import atexit
+import queue
+import random
+import logging
+import logging.handlers
+
+# 日志配置档：
+#   production  INFO 级别，关闭 SQL echo 和逐条日志，经队列异步写出
+#   debug       DEBUG 级别，打开 SQL echo，逐条日志全部输出，同步写出便于排查
+# 各项可以用 LOG_LEVEL / LOG_SQL_ECHO / LOG_ROW_SAMPLE_RATE / LOG_QUEUE 单独覆盖
+LOG_PROFILES = {
+    'production': {'level': 'INFO', 'sql_echo': False, 'row_sample_rate': 0.0, 'queue': True},
+    'debug': {'level': 'DEBUG', 'sql_echo': True, 'row_sample_rate': 1.0, 'queue': False},
+}
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_settings = None
+_listener = None
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_log_settings(profile: str = None) -> dict:
+    """按配置档和环境变量得到日志设置"""
+    profile = profile or os.getenv('LOG_PROFILE', 'production')
+    settings = dict(LOG_PROFILES.get(profile, LOG_PROFILES['production']))
+    settings['profile'] = profile
+    settings['level'] = os.getenv('LOG_LEVEL') or settings['level']
+    settings['sql_echo'] = _env_bool('LOG_SQL_ECHO', settings['sql_echo'])
+    settings['row_sample_rate'] = float(os.getenv('LOG_ROW_SAMPLE_RATE') or settings['row_sample_rate'])
+    settings['queue'] = _env_bool('LOG_QUEUE', settings['queue'])
+    settings['file'] = os.getenv('LOG_FILE') or None
+    return settings
+
+
+def setup_logging(profile: str = None, force: bool = False, handlers: list = None) -> dict:
+    """
+    配置根日志，多次调用只生效一次（force=True 时重新配置）
+    启用队列时业务线程只把记录放入队列，由 QueueListener 线程格式化并写出
+    :param handlers: 实际写出日志的 handler，默认输出到 stderr，设置了 LOG_FILE 时同时写文件
+    :return: 生效的日志设置
+    """
+    global _settings, _listener
+    if _settings is not None and not force:
+        return _settings
+    settings = get_log_settings(profile)
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    if handlers is None:
+        handlers = [logging.StreamHandler()]
+        if settings['file']:
+            handlers.append(logging.FileHandler(settings['file'], encoding='utf-8'))
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(settings['level'])
+    # SQL 语句日志通过 sqlalchemy.engine 的级别控制，经同一组 handler 输出，不使用 create_engine(echo=True)
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO if settings['sql_echo'] else logging.WARNING)
+    if settings['queue']:
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+
+    _settings = settings
+    return settings
+
+
+def stop_logging():
+    """停止队列监听线程，写出队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def sample_row_log(logger: logging.Logger) -> bool:
+    """
+    是否输出一条逐条明细日志（DEBUG 级别）
+    logger 未开启 DEBUG 时直接返回 False，否则按 LOG_ROW_SAMPLE_RATE 抽样
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    rate = setup_logging()['row_sample_rate']
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
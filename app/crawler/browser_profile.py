@@ -0,0 +1,115 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 各类资源对应的 URL 模式（CDP Network.setBlockedURLs，* 为通配符）
+RESOURCE_URL_PATTERNS = {
+    'image': ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp', '*img.alicdn.com/*'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.ogg', '*.flv'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'stylesheet': ['*.css'],
+    # 统计、埋点等第三方脚本，搜索结果由页面自身脚本渲染，不依赖这些脚本
+    'third_party_script': [
+        '*.mmstat.com/*', '*g.alicdn.com/alilog/*', '*g.alicdn.com/AWSC/*', '*arms-retcode*',
+        '*google-analytics.com/*', '*googletagmanager.com/*', '*hm.baidu.com/*', '*cnzz.com/*'
+    ],
+}
+
+# 爬取只读取文本、链接和 img 的 src 属性，以下参数不影响提取结果
+LEAN_ARGUMENTS = [
+    '--window-size=640,480',
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-translate',
+    '--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+    '--renderer-process-limit=2',
+    '--js-flags=--max-old-space-size=256',
+]
+
+# 2 表示禁止；样式表的设置在新版 Chrome 中可能无效，另由 CDP 按 URL 拦截
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.stylesheets': 2,
+    'profile.managed_default_content_settings.fonts': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.managed_default_content_settings.plugins': 2,
+    'profile.default_content_setting_values.notifications': 2,
+}
+
+# default 为原有配置；lean 拦截图片/媒体/字体/样式表并使用 eager 加载策略
+BROWSER_PROFILES = {
+    'default': {
+        'page_load_strategy': 'normal',
+        'block': [],
+        'arguments': [],
+        'prefs': {},
+    },
+    'lean': {
+        'page_load_strategy': 'eager',
+        'block': ['image', 'media', 'font', 'stylesheet'],
+        'arguments': LEAN_ARGUMENTS,
+        'prefs': LEAN_PREFS,
+    },
+}
+
+
+def _env_flag(name: str, default: str = 'false') -> bool:
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_profile_name(profile: str = None) -> str:
+    """解析浏览器配置名：参数优先，其次 CRAWLER_BROWSER_PROFILE，未知名称时报错"""
+    name = profile or os.getenv('CRAWLER_BROWSER_PROFILE', 'default')
+    if name not in BROWSER_PROFILES:
+        raise ValueError(f"未知的浏览器配置: {name}，可选: {', '.join(BROWSER_PROFILES)}")
+    return name
+
+
+def get_blocked_url_patterns(profile: str) -> list:
+    """配置对应的拦截 URL 列表；lean 配置在 CRAWLER_BLOCK_THIRD_PARTY_SCRIPTS 开启时还拦截第三方脚本"""
+    kinds = list(BROWSER_PROFILES[profile]['block'])
+    if profile != 'default' and _env_flag('CRAWLER_BLOCK_THIRD_PARTY_SCRIPTS'):
+        kinds.append('third_party_script')
+    patterns = []
+    for kind in kinds:
+        patterns.extend(RESOURCE_URL_PATTERNS[kind])
+    extra = os.getenv('CRAWLER_BLOCK_URLS', '')
+    if profile != 'default' and extra:
+        patterns.extend(pattern.strip() for pattern in extra.split(',') if pattern.strip())
+    return patterns
+
+
+def apply_profile_options(options, profile: str):
+    """把配置的加载策略、启动参数和 prefs 写入 ChromeOptions"""
+    settings = BROWSER_PROFILES[profile]
+    options.page_load_strategy = settings['page_load_strategy']
+    for argument in settings['arguments']:
+        options.add_argument(argument)
+    if settings['prefs']:
+        options.add_experimental_option('prefs', dict(settings['prefs']))
+
+
+def apply_request_blocking(driver, profile: str) -> bool:
+    """
+    通过 CDP 按 URL 拦截资源请求，在浏览器启动后调用一次，对之后的所有导航生效
+    :return: 是否设置了拦截
+    """
+    patterns = get_blocked_url_patterns(profile)
+    if not patterns:
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        return True
+    except Exception as e:
+        logger.warning("设置资源拦截失败，继续使用未拦截的浏览器: %s", e)
+        return False
@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import time
+import html
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .http_spider import get_http_session
+from .rate_limiter import check_response, limited
+from ..metrics import DETAIL_PAGES_TOTAL, observe_stage
+
+logger = logging.getLogger(__name__)
+
+DETAIL_ENRICH_ENABLED = os.getenv('DETAIL_ENRICH', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+# 详情页把项目数据以 JSON 放在隐藏的 <div id="dataDefault"> 中，场次在 performBases[].performs[]
+_DATA_DEFAULT_PATTERN = re.compile(r'<div[^>]*\bid=["\']dataDefault["\'][^>]*>(.*?)</div>', re.S)
+# 场次名称，如 "2024-12-21 周六 19:30" 或 "2024.12.21 19:30"
+_SESSION_PATTERN = re.compile(r'(\d{4})[-.](\d{1,2})[-.](\d{1,2})(?:\D*?(\d{1,2}:\d{2}))?')
+_PRICE_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _format_price(sku: dict):
+    """票档价格，380.00 -> 380"""
+    match = _PRICE_PATTERN.search(str(sku.get('price') or sku.get('priceName') or ''))
+    if match is None:
+        return None
+    value = float(match.group())
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def parse_detail_page(page: str):
+    """
+    从详情页解析实际场次和票档
+    :return: [{'date': '2024.12.21', 'time': '19:30', 'prices': ['380', '580']}, ...]，
+             页面中没有场次数据时返回 None
+    """
+    match = _DATA_DEFAULT_PATTERN.search(page or '')
+    if match is None:
+        return None
+    data = json.loads(html.unescape(match.group(1)))
+    sessions = []
+    for base in data.get('performBases') or []:
+        for perform in base.get('performs') or []:
+            session = _SESSION_PATTERN.search(perform.get('performName') or base.get('name') or '')
+            if session is None:
+                continue
+            year, month, day, time_text = session.groups()
+            prices = [_format_price(sku) for sku in perform.get('skuList') or []]
+            sessions.append({
+                'date': f"{int(year):04d}.{int(month):02d}.{int(day):02d}",
+                'time': time_text,
+                'prices': [price for price in prices if price]
+            })
+    sessions.sort(key=lambda session: (session['date'], session['time'] or ''))
+    return sessions or None
+
+
+class DetailCache:
+    """详情页解析结果的内存 LRU，按 URL 缓存，同时保存 ETag/Last-Modified 供过期后条件请求"""
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('DETAIL_CACHE_TTL', '21600'))
+        self.max_entries = max_entries or int(os.getenv('DETAIL_CACHE_SIZE', '4096'))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        """返回 (条目, 是否未过期)，条目为 dict(fetched_at, etag, last_modified, sessions) 或 None"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(url)
+            return entry, time.time() - entry['fetched_at'] < self.ttl
+
+    def put(self, url: str, sessions: list, etag: str = None, last_modified: str = None):
+        with self._lock:
+            self._entries[url] = {
+                'fetched_at': time.time(), 'etag': etag, 'last_modified': last_modified, 'sessions': sessions
+            }
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, url: str):
+        """304 未修改：重新计算有效期"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry['fetched_at'] = time.time()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class DetailEnricher:
+    """
+    详情页补全：用有界线程池并发抓取一页搜索结果中各演出的详情页，
+    把实际场次写入演出信息的 sessions 字段，ShowRecord 据此按场次拆分而不是按日期范围逐天展开；
+    请求失败、被限流或页面中没有场次时不写入 sessions，仍按日期范围拆分
+    """
+    def __init__(self, max_workers: int = None, cache: DetailCache = None, timeout: float = None, session=None):
+        self.max_workers = max_workers or int(os.getenv('DETAIL_CONCURRENCY', '8'))
+        self.cache = cache if cache is not None else DetailCache()
+        self.timeout = timeout if timeout is not None else float(os.getenv('DETAIL_TIMEOUT', '10'))
+        self.session = session or get_http_session()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='detail')
+        self._stats = {'cached': 0, 'revalidated': 0, 'fetched': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, result: str):
+        DETAIL_PAGES_TOTAL.inc(result)
+        with self._stats_lock:
+            self._stats[result] += 1
+
+    def fetch(self, url: str):
+        """
+        取详情页的场次：未过期时直接使用缓存，过期后带 If-None-Match/If-Modified-Since 重新请求
+        :return: 场次列表，失败时返回已过期的缓存或 None
+        """
+        entry, fresh = self.cache.get(url)
+        if fresh:
+            self._count('cached')
+            return entry['sessions']
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            with limited(url):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                check_response(response)
+                if response.status_code == 304 and entry is not None:
+                    self.cache.touch(url)
+                    self._count('revalidated')
+                    return entry['sessions']
+                response.raise_for_status()
+            sessions = parse_detail_page(response.content.decode('utf-8', 'replace'))
+        except Exception as e:
+            logger.warning("获取详情页失败 %s: %s", url, e)
+            sessions = None
+        if not sessions:
+            self._count('failed')
+            return entry['sessions'] if entry is not None else None
+        self.cache.put(url, sessions, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        self._count('fetched')
+        return sessions
+
+    def enrich(self, shows: list) -> int:
+        """
+        并发补全一页演出的场次（原地修改），已有 sessions 的演出（如来自搜索缓存）跳过
+        :return: 写入了场次的演出数
+        """
+        pending = {}
+        for show in shows:
+            url = show.get('detail_url')
+            if url and 'sessions' not in show:
+                pending.setdefault(url, []).append(show)
+        if not pending:
+            return 0
+        started = time.perf_counter()
+        futures = {url: self._executor.submit(self.fetch, url) for url in pending}
+        enriched = 0
+        for url, future in futures.items():
+            sessions = future.result()
+            if sessions:
+                for show in pending[url]:
+                    show['sessions'] = sessions
+                    enriched += 1
+        observe_stage('detail_enrich', time.perf_counter() - started)
+        return enriched
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['cache_entries'] = len(self.cache)
+        stats['max_workers'] = self.max_workers
+        return stats
+
+
+_enricher = None
+_enricher_lock = threading.Lock()
+
+
+def get_detail_enricher():
+    """进程级共享的详情页补全，DETAIL_ENRICH 未开启时返回 None"""
+    global _enricher
+    if not DETAIL_ENRICH_ENABLED:
+        return None
+    if _enricher is None:
+        with _enricher_lock:
+            if _enricher is None:
+                _enricher = DetailEnricher()
+    return _enricher
@@ -0,0 +1,204 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledDriver:
+    """池中的一个浏览器实例及其使用情况"""
+    def __init__(self, driver, startup_time: float):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+        self.startup_time = startup_time
+
+
+class DriverPool:
+    """有界的 WebDriver 池，在整个进程内复用已启动的浏览器"""
+    def __init__(self, factory, max_size: int = 2, max_pages: int = 50, checkout_timeout: float = 120):
+        """
+        :param factory: 无参可调用对象，返回一个新的 WebDriver
+        :param max_size: 同时存在的浏览器实例上限
+        :param max_pages: 单个实例处理多少个页面后回收重建
+        :param checkout_timeout: 池已满时等待空闲实例的最长时间（秒）
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'startups': 0,
+            'startup_failures': 0,
+            'startup_time_total': 0.0,
+            'startup_time_max': 0.0,
+            'recycled': 0,
+            'replaced_dead': 0,
+            'checkout_timeouts': 0
+        }
+
+    def _start_driver(self) -> _PooledDriver:
+        """启动一个新的浏览器实例并记录启动耗时"""
+        started = time.perf_counter()
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._stats['startup_failures'] += 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self._stats['startups'] += 1
+            self._stats['startup_time_total'] += elapsed
+            self._stats['startup_time_max'] = max(self._stats['startup_time_max'], elapsed)
+        logger.info(f"WebDriver 启动完成，耗时 {elapsed:.2f} 秒")
+        return _PooledDriver(driver, elapsed)
+
+    @staticmethod
+    def _quit(entry: _PooledDriver):
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭 WebDriver 时出错: {str(e)}")
+
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        """检查浏览器会话是否仍然可用"""
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def warm(self, count: int = 1):
+        """预先启动若干个浏览器实例放入空闲队列"""
+        for _ in range(count):
+            with self._cond:
+                if self._closed or self._size >= self.max_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._start_driver()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                logger.error(f"预热 WebDriver 失败: {str(e)}")
+                return
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def checkout(self):
+        """借出一个浏览器实例，优先复用空闲实例"""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("WebDriver 池已关闭")
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['checkout_timeouts'] += 1
+                    raise TimeoutError(f"等待空闲 WebDriver 超时 ({self.checkout_timeout} 秒)")
+                self._cond.wait(remaining)
+
+        if entry is not None:
+            if self.is_healthy(entry.driver):
+                with self._cond:
+                    self._stats['hits'] += 1
+                    self._in_use[id(entry.driver)] = entry
+                return entry.driver
+            # 会话已失效，替换为新实例
+            logger.warning("检测到失效的 WebDriver 会话，重新创建")
+            self._quit(entry)
+            with self._cond:
+                self._stats['replaced_dead'] += 1
+
+        with self._cond:
+            self._stats['misses'] += 1
+        try:
+            entry = self._start_driver()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._in_use[id(entry.driver)] = entry
+        return entry.driver
+
+    def checkin(self, driver, pages: int = 1, discard: bool = False):
+        """
+        归还浏览器实例
+        :param pages: 本次借出期间加载的页面数
+        :param discard: 为 True 时直接关闭该实例（例如发生了浏览器级错误）
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(driver), None)
+        if entry is None:
+            logger.warning("归还了不属于本池的 WebDriver，直接关闭")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+
+        entry.pages += pages
+        recycle = entry.pages >= self.max_pages
+        if recycle:
+            logger.info(f"WebDriver 已处理 {entry.pages} 个页面，回收重建")
+        if discard or recycle or self._closed:
+            self._quit(entry)
+            with self._cond:
+                if recycle:
+                    self._stats['recycled'] += 1
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close(self):
+        """关闭池中所有空闲实例，借出中的实例在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._quit(entry)
+
+    def get_stats(self) -> dict:
+        """返回池的命中/未命中与启动耗时统计"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'max_pages': self.max_pages
+            })
+        checkouts = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / checkouts if checkouts else 0.0
+        stats['startup_time_avg'] = (
+            stats['startup_time_total'] / stats['startups'] if stats['startups'] else 0.0
+        )
+        return stats
@@ -0,0 +1,257 @@
+import re
+import logging
+import urllib.parse
+import importlib.util
+from .waits import RESULT_ITEMS_SELECTOR, EMPTY_RESULT_SELECTORS
+from ..metrics import count_shows
+from ..config.logging_config import sample_row_log
+
+logger = logging.getLogger(__name__)
+
+# bs4/lxml 和 selenium 在第一次解析或提取时才导入，不拖慢 API 启动
+HTML_PARSER = "lxml" if importlib.util.find_spec('lxml') is not None else "html.parser"
+
+
+def _soup(html: str):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, HTML_PARSER)
+
+# 在浏览器内一次性读取所有演出项目的原始字段，与 extract_item_legacy 使用相同的选择器；
+# 缺少必需元素的项目返回 null，与逐项提取时抛出异常跳过的行为一致
+EXTRACT_ITEMS_SCRIPT = """
+var items = document.querySelectorAll(arguments[0]);
+var text = function (el) { return el ? el.innerText : null; };
+var results = [];
+for (var i = 0; i < items.length; i++) {
+    var item = items[i];
+    var link = item.querySelector("a[href*='detail.damai.cn']");
+    var img = link && link.querySelector("img");
+    var tag = link && link.querySelector("span.items__img__tag");
+    var info = item.querySelector("div.items__txt");
+    var title = info && info.querySelector("div.items__txt__title");
+    var city = title && title.querySelector("span");
+    var name = title && title.querySelector("a");
+    if (!img || !tag || !title || !city || !name) {
+        results.push(null);
+        continue;
+    }
+    var priceBox = info.querySelector("div.items__txt__price");
+    var priceSpan = priceBox && priceBox.querySelector("span");
+    results.push({
+        detail_url: link.getAttribute("href") !== null ? link.href : null,
+        poster: img.getAttribute("src") ? img.src : img.getAttribute("data-src"),
+        tag: text(tag),
+        city: text(city),
+        name: text(name),
+        times: Array.prototype.map.call(info.querySelectorAll("div.items__txt__time"), text),
+        price_span: text(priceSpan),
+        price_box: priceSpan ? text(priceBox) : null
+    });
+}
+return results;
+"""
+
+
+def build_show_info(raw: dict) -> dict:
+    """将原始字段整理为演出信息，规则与 extract_item_legacy 保持一致"""
+    show_info = {
+        'detail_url': raw['detail_url'],
+        'poster': raw['poster'],
+        'tag': raw['tag'].strip(),
+        'city': raw['city'].strip().replace("【","").replace("】",""),
+        'name': raw['name'].strip()
+    }
+    times = raw['times']
+    
+    # 演出阵容
+    if times and "艺人：" in times[0]:
+        show_info['lineup'] = times[0].replace("艺人：","").strip()
+    else:
+        show_info['lineup'] = ""
+    
+    # 场馆
+    try:
+        venue_text = times[1].strip()
+        if "|" in venue_text:
+            city, venue = venue_text.split("|")
+            show_info['venue'] = venue.strip()
+        else:
+            show_info['venue'] = venue_text
+    except:
+        show_info['venue'] = ""
+    
+    # 演出时间
+    show_info['date'] = times[2].strip() if len(times) > 2 else ""
+    
+    # 价格和售票状态
+    if raw['price_span'] is not None:
+        price_text = raw['price_span'].strip()
+        show_info['price'] = price_text.replace("元","").strip()
+        show_info['status'] = raw['price_box'].replace(price_text,"").replace("元","").strip()
+    else:
+        show_info['price'] = ""
+        show_info['status'] = ""
+    
+    return show_info
+
+
+def extract_items_script(driver) -> list:
+    """通过一次 execute_script 提取页面上所有演出项目"""
+    raw_items = driver.execute_script(EXTRACT_ITEMS_SCRIPT, RESULT_ITEMS_SELECTOR)
+    shows_info = []
+    for raw in raw_items:
+        if raw is None:
+            logger.warning("提取演出信息时出错: 缺少必需的页面元素")
+            count_shows('extract_failed')
+            continue
+        try:
+            shows_info.append(build_show_info(raw))
+        except Exception as e:
+            logger.warning("提取演出信息时出错: %s", e)
+            count_shows('extract_failed')
+    return shows_info
+
+
+def extract_item_legacy(item) -> dict:
+    """逐个调用 WebDriver 提取单个演出项目，缺少必需元素时抛出异常"""
+    show_info = {}
+
+    # 1. 获取详情链接
+    from selenium.webdriver.common.by import By
+    title_link = item.find_element(By.CSS_SELECTOR, "a[href*='detail.damai.cn']")
+    show_info['detail_url'] = title_link.get_attribute('href')
+
+    # 2. 获取海报图片
+    img = title_link.find_element(By.CSS_SELECTOR, "img")
+    show_info['poster'] = img.get_attribute('src') or img.get_attribute('data-src')
+
+    # 3. 获取标签
+    tag = title_link.find_element(By.CSS_SELECTOR, "span.items__img__tag")
+    show_info['tag'] = tag.text.strip()
+
+    # 4. 获取演出信息容器
+    info_container = item.find_element(By.CSS_SELECTOR, "div.items__txt")
+
+    # 5. 获取标题和城市
+    title_container = info_container.find_element(By.CSS_SELECTOR, "div.items__txt__title")
+    city_span = title_container.find_element(By.CSS_SELECTOR, "span")
+    show_info['city'] = city_span.text.strip().replace("【","").replace("】","")
+    title_text = title_container.find_element(By.CSS_SELECTOR, "a")
+    show_info['name'] = title_text.text.strip()
+
+    # 6. 获取演出阵容
+    try:
+        lineup = info_container.find_element(By.CSS_SELECTOR, "div.items__txt__time")
+        if "艺人：" in lineup.text:
+            show_info['lineup'] = lineup.text.replace("艺人：","").strip()
+        else:
+            show_info['lineup'] = ""
+    except:
+        show_info['lineup'] = ""
+
+    # 7. 获取场馆
+    try:
+        venue_container = info_container.find_elements(By.CSS_SELECTOR, "div.items__txt__time")[1]
+        venue_text = venue_container.text.strip()
+        if "|" in venue_text:
+            city, venue = venue_text.split("|")
+            show_info['venue'] = venue.strip()
+        else:
+            show_info['venue'] = venue_text
+    except:
+        show_info['venue'] = ""
+
+    # 8. 获取演出时间
+    try:
+        date_container = info_container.find_elements(By.CSS_SELECTOR, "div.items__txt__time")[2]
+        show_info['date'] = date_container.text.strip()
+    except:
+        show_info['date'] = ""
+
+    # 9. 获取价格和售票状态
+    try:
+        price_container = info_container.find_element(By.CSS_SELECTOR, "div.items__txt__price")
+        price_text = price_container.find_element(By.CSS_SELECTOR, "span").text.strip()
+        show_info['price'] = price_text.replace("元","").strip()
+
+        status_text = price_container.text.replace(price_text,"").replace("元","").strip()
+        show_info['status'] = status_text
+    except:
+        show_info['price'] = ""
+        show_info['status'] = ""
+
+    return show_info
+
+
+def extract_items_legacy(driver) -> list:
+    """逐项提取页面上所有演出项目，每个字段一次 WebDriver 往返"""
+    from selenium.webdriver.common.by import By
+    shows_info = []
+    for item in driver.find_elements(By.CSS_SELECTOR, RESULT_ITEMS_SELECTOR):
+        try:
+            shows_info.append(extract_item_legacy(item))
+        except Exception as e:
+            logger.warning("提取演出信息时出错: %s", e)
+            count_shows('extract_failed')
+            continue
+    return shows_info
+
+
+def log_show_info(show_info: dict):
+    """单条演出明细日志（DEBUG 级别，按 LOG_ROW_SAMPLE_RATE 抽样）"""
+    if not sample_row_log(logger):
+        return
+    logger.debug(
+        "演出信息: 名称=%s 标签=%s 城市=%s 场所=%s 阵容=%s 日期=%s 价格=%s 状态=%s 详情链接=%s 海报链接=%s",
+        show_info['name'], show_info['tag'], show_info['city'], show_info['venue'], show_info['lineup'],
+        show_info['date'], show_info['price'], show_info['status'], show_info['detail_url'], show_info['poster']
+    )
+
+
+def _soup_text(el):
+    """近似浏览器 innerText：合并连续空白"""
+    if el is None:
+        return None
+    return re.sub(r'[ \t\r\n\f]+', ' ', el.get_text())
+
+
+def is_search_results_page(html: str) -> bool:
+    """页面上有结果列表或无结果标记，验证页、空白页等返回 False"""
+    soup = _soup(html)
+    return soup.select_one(RESULT_ITEMS_SELECTOR) is not None or soup.select_one(EMPTY_RESULT_SELECTORS) is not None
+
+
+def parse_search_html(html: str, page_url: str) -> list:
+    """用 BeautifulSoup 解析搜索结果页，字段规则与浏览器内提取一致"""
+    soup = _soup(html)
+    shows_info = []
+    for item in soup.select(RESULT_ITEMS_SELECTOR):
+        link = item.select_one("a[href*='detail.damai.cn']")
+        img = link.select_one("img") if link else None
+        tag = link.select_one("span.items__img__tag") if link else None
+        info = item.select_one("div.items__txt")
+        title = info.select_one("div.items__txt__title") if info else None
+        city = title.select_one("span") if title else None
+        name = title.select_one("a") if title else None
+        if not (img and tag and city and name):
+            logger.warning("提取演出信息时出错: 缺少必需的页面元素")
+            count_shows('extract_failed')
+            continue
+        price_box = info.select_one("div.items__txt__price")
+        price_span = price_box.select_one("span") if price_box else None
+        raw = {
+            'detail_url': urllib.parse.urljoin(page_url, link.get('href')),
+            'poster': urllib.parse.urljoin(page_url, img.get('src')) if img.get('src') else img.get('data-src'),
+            'tag': _soup_text(tag),
+            'city': _soup_text(city),
+            'name': _soup_text(name),
+            'times': [_soup_text(el) for el in info.select("div.items__txt__time")],
+            'price_span': _soup_text(price_span),
+            'price_box': _soup_text(price_box) if price_span else None
+        }
+        try:
+            shows_info.append(build_show_info(raw))
+        except Exception as e:
+            logger.warning("提取演出信息时出错: %s", e)
+            count_shows('extract_failed')
+    return shows_info
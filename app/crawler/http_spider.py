@@ -0,0 +1,222 @@
+import os
+import re
+import logging
+import threading
+import urllib.parse
+from .extraction import parse_search_html, is_search_results_page
+from .rate_limiter import ThrottledError, check_response, has_captcha, limited
+from ..metrics import time_stage
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.109 Safari/537.36'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """进程级共享的 HTTP 会话（requests.Session），复用连接池；requests 在第一次使用时导入"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                session = requests.Session()
+                pool_size = int(os.getenv('HTTP_POOL_SIZE', '20'))
+                adapter = HTTPAdapter(
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                    # 重试用尽后返回最后的响应，由 rate_limiter.check_response 把 503 识别为限流
+                    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                                      raise_on_status=False)
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update({
+                    'User-Agent': USER_AGENT,
+                    'Accept-Language': 'zh-CN,zh;q=0.9'
+                })
+                _session = session
+    return _session
+
+
+def _strip_html(value) -> str:
+    """去掉搜索接口返回字段中的高亮标签"""
+    if not value:
+        return ""
+    return re.sub(r'<[^>]+>', '', str(value)).strip()
+
+
+class SearchPages:
+    """
+    逐页搜索结果的迭代器，complete 表示是否取完了全部结果页（到达最后一页且没有出错）
+    只有完整的抓取结果才能用来判断哪些演出已经消失（见 upload_service.UploadService.mark_removed）
+    """
+    def __init__(self, iterate):
+        """:param iterate: iterate(result) -> 页面生成器，取完全部页面后设置 result.complete = True"""
+        self.complete = False
+        self._pages = iterate(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> list:
+        return next(self._pages)
+
+    def close(self):
+        """提前结束迭代，生成器中的 finally（如归还浏览器）立即执行"""
+        self._pages.close()
+
+
+class DamaiHttpCrawler:
+    """不启动浏览器的搜索结果抓取：HTTP 获取 + BeautifulSoup 解析"""
+    def __init__(self, search_base_url: str = "https://search.damai.cn/search.html",
+                 search_api_url: str = None, detail_base_url: str = "https://detail.damai.cn/item.htm",
+                 timeout: float = None, session=None):
+        self.search_base_url = search_base_url
+        # 搜索页内部调用的 JSON 接口，默认与搜索页同目录
+        self.search_api_url = search_api_url or urllib.parse.urljoin(search_base_url, 'searchajax.html')
+        self.detail_base_url = detail_base_url
+        self.timeout = timeout if timeout is not None else float(os.getenv('REQUEST_TIMEOUT', '30'))
+        self.session = session or get_http_session()
+
+    def get_artist_search_url(self, artist_name: str) -> str:
+        encoded_name = urllib.parse.quote(artist_name)
+        return f"{self.search_base_url}?keyword={encoded_name}&spm=a2oeg.search_category.searchtxt.dsearchbtn"
+
+    def convert_api_item(self, item: dict) -> dict:
+        """将搜索接口返回的一条数据转换为与页面提取一致的演出信息"""
+        return {
+            'detail_url': f"{self.detail_base_url}?id={item.get('projectid')}",
+            'poster': item.get('verticalPic') or "",
+            'tag': _strip_html(item.get('categoryname')),
+            'city': _strip_html(item.get('cityname')),
+            'name': _strip_html(item.get('nameNoHtml') or item.get('name')),
+            'lineup': _strip_html(item.get('actors')),
+            'venue': _strip_html(item.get('venue')),
+            'date': _strip_html(item.get('showtime')),
+            'price': _strip_html(item.get('price_str')).replace("元","").strip(),
+            'status': _strip_html(item.get('showstatus'))
+        }
+
+    def fetch_search_api(self, artist_name: str, page: int = 1, page_size: int = 30):
+        """
+        请求搜索页使用的 JSON 接口
+        :return: (演出信息列表, 总页数)
+        """
+        params = {
+            'keyword': artist_name,
+            'cty': '',
+            'ctl': '',
+            'sctl': '',
+            'tsg': 0,
+            'st': '',
+            'et': '',
+            'order': 1,
+            'pageSize': page_size,
+            'currPage': page,
+            'tn': ''
+        }
+        host = urllib.parse.urlsplit(self.search_api_url).netloc
+        with limited(self.search_api_url):
+            with time_stage('page_load'):
+                response = self.session.get(
+                    self.search_api_url,
+                    params=params,
+                    headers={'Referer': self.get_artist_search_url(artist_name)},
+                    timeout=self.timeout
+                )
+                check_response(response)
+                response.raise_for_status()
+            with time_stage('extract'):
+                try:
+                    data = response.json()
+                except ValueError:
+                    if has_captcha(response.text, response.url):
+                        raise ThrottledError('captcha', host)
+                    raise
+                # 正常的无结果响应也带 pageData，缺少时视为被限流后返回的空响应
+                if not isinstance(data, dict) or data.get('pageData') is None:
+                    raise ThrottledError('empty_anomaly', host)
+                page_data = data['pageData']
+                result_data = page_data.get('resultData') or []
+                total_pages = int(page_data.get('totalPage') or 1)
+                return [self.convert_api_item(item) for item in result_data], total_pages
+
+    def fetch_search_html(self, artist_name: str) -> list:
+        """请求搜索页 HTML 并解析"""
+        search_url = self.get_artist_search_url(artist_name)
+        with limited(search_url):
+            with time_stage('page_load'):
+                response = self.session.get(search_url, timeout=self.timeout)
+                check_response(response)
+                response.raise_for_status()
+            response.encoding = response.encoding or 'utf-8'
+            with time_stage('extract'):
+                shows_info = parse_search_html(response.text, response.url)
+            # 既没有结果列表也没有无结果标记的页面不是正常的搜索结果页
+            if not shows_info and not is_search_results_page(response.text):
+                raise ThrottledError('empty_anomaly', urllib.parse.urlsplit(response.url).netloc)
+            return shows_info
+
+    def iter_search_pages(self, artist_name: str, max_pages: int = 1) -> 'SearchPages':
+        """
+        逐页产出搜索结果：优先按页请求 JSON 接口，
+        接口失败时只解析搜索页 HTML 的第一页；识别到限流时抛出 ThrottledError，不当作无结果
+        取完接口的全部页面后 complete 为 True；接口正常返回 pageData 但没有结果时不产出页面，complete 同样为 True；
+        受 max_pages 限制、某页请求失败或使用 HTML 第一页时为 False
+        """
+        return SearchPages(lambda result: self._iter_search_pages(artist_name, max_pages, result))
+
+    def _iter_search_pages(self, artist_name: str, max_pages: int, result: 'SearchPages'):
+        try:
+            shows_info, total_pages = self.fetch_search_api(artist_name)
+            logger.info("搜索接口第 1/%d 页返回 %d 个演出项目", total_pages, len(shows_info))
+        except ThrottledError:
+            raise
+        except Exception as e:
+            logger.warning("请求搜索接口失败: %s", e)
+            shows_info, total_pages = None, 0
+
+        if shows_info:
+            yield shows_info
+            for page in range(2, min(total_pages, max_pages) + 1):
+                try:
+                    shows_info, _ = self.fetch_search_api(artist_name, page)
+                except ThrottledError:
+                    raise
+                except Exception as e:
+                    logger.warning("请求搜索接口第 %d 页失败: %s", page, e)
+                    return
+                logger.info("搜索接口第 %d/%d 页返回 %d 个演出项目", page, total_pages, len(shows_info))
+                if not shows_info:
+                    # 总页数范围内的空页
+                    raise ThrottledError('empty_anomaly', urllib.parse.urlsplit(self.search_api_url).netloc)
+                yield shows_info
+            result.complete = total_pages <= max_pages
+            return
+        if shows_info is not None:
+            # 接口正常返回了 pageData，只是没有结果：确实无结果，不再请求 HTML 或回退到浏览器
+            result.complete = True
+            return
+
+        try:
+            shows_info = self.fetch_search_html(artist_name)
+            logger.info("搜索页 HTML 解析得到 %d 个演出项目", len(shows_info))
+        except ThrottledError:
+            raise
+        except Exception as e:
+            logger.warning("请求搜索页失败: %s", e)
+            return
+        if shows_info:
+            yield shows_info
+
+    def search(self, artist_name: str):
+        """
+        获取第一页搜索结果
+        :return: 演出信息列表；没有结果或请求失败时返回 None，被限流时抛出 ThrottledError
+        """
+        return next(self.iter_search_pages(artist_name), None)
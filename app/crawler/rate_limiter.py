@@ -0,0 +1,228 @@
+import os
+import time
+import logging
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from ..metrics import CRAWLER_CONCURRENCY_LIMIT, CRAWLER_THROTTLED_TOTAL
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv('CRAWLER_RATE_LIMIT', 'true').lower() not in ('0', 'false', 'no')
+
+# 滑块验证 / 拦截页面的特征（阿里系站点的 punish 页面）
+CAPTCHA_MARKERS = ('x5secdata', '_____tmd_____', 'punish?', 'nc_token', 'baxia-dialog', '滑动验证', '验证码')
+
+THROTTLE_STATUSES = (429, 403, 503)
+
+
+class ThrottledError(Exception):
+    """
+    站点限流：429/403、验证码页面或异常的空结果，
+    与"艺人没有演出"区分开，任务应稍后重试而不是记为无结果
+    """
+    def __init__(self, reason: str, host: str = None, retry_after: float = None):
+        super().__init__(f"站点限流 ({reason})" + (f": {host}" if host else ""))
+        self.reason = reason
+        self.host = host
+        self.retry_after = retry_after
+
+
+def has_captcha(text: str, url: str = '') -> bool:
+    head = (text or '')[:20000]
+    return any(marker in head or marker in (url or '') for marker in CAPTCHA_MARKERS)
+
+
+def check_response(response):
+    """按状态码和页面内容识别限流，识别到时抛出 ThrottledError"""
+    host = urllib.parse.urlsplit(response.url).netloc
+    if response.status_code in THROTTLE_STATUSES:
+        retry_after = response.headers.get('Retry-After')
+        raise ThrottledError(
+            f'http_{response.status_code}', host,
+            float(retry_after) if retry_after and retry_after.isdigit() else None
+        )
+    content_type = response.headers.get('Content-Type', '')
+    if 'html' in content_type and has_captcha(response.text, response.url):
+        raise ThrottledError('captcha', host)
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒令牌数，最多累积 burst 个；rate <= 0 时不限速"""
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """取一个令牌，不足时等待，返回等待的秒数"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.rate <= 0 or self.tokens >= 1:
+                    self.tokens -= 1 if self.rate > 0 else 0
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def pause(self, seconds: float):
+        """Retry-After：清空令牌，seconds 秒内不再发出请求"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class HostLimiter:
+    """
+    单个站点的限流：令牌桶限制请求速率，AIMD 调整并发上限
+      - 页面正常：每连续成功 limit 次，并发上限加 1（加性增）
+      - 识别到限流：并发上限乘以 decrease_factor（乘性减），cooldown 秒内的多次限流只减一次
+    令牌桶速率随并发上限等比例缩放，上限回到 max_limit 时恢复为配置的速率
+    """
+    def __init__(self, host: str, rate: float = None, burst: float = None, min_limit: int = None,
+                 max_limit: int = None, initial_limit: int = None, decrease_factor: float = None,
+                 cooldown: float = None, acquire_timeout: float = None):
+        self.host = host
+        self.base_rate = rate if rate is not None else float(os.getenv('CRAWLER_RATE_PER_HOST', '5'))
+        self.min_limit = min_limit or int(os.getenv('CRAWLER_MIN_CONCURRENCY', '1'))
+        self.max_limit = max(self.min_limit, max_limit or int(os.getenv('CRAWLER_MAX_CONCURRENCY', '8')))
+        initial = initial_limit or int(os.getenv('CRAWLER_INITIAL_CONCURRENCY', '4'))
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.decrease_factor = decrease_factor or float(os.getenv('CRAWLER_AIMD_DECREASE', '0.5'))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv('CRAWLER_THROTTLE_COOLDOWN', '5'))
+        self.acquire_timeout = acquire_timeout or float(os.getenv('CRAWLER_LIMIT_TIMEOUT', '300'))
+        self.bucket = TokenBucket(self._rate(), burst or float(os.getenv('CRAWLER_RATE_BURST', '10')))
+        self.in_flight = 0
+        self.successes = 0
+        self.throttled = {}
+        self.decreases = 0
+        self.increases = 0
+        self._cooldown_until = 0.0
+        self._cond = threading.Condition()
+        CRAWLER_CONCURRENCY_LIMIT.set(self.limit, host)
+
+    def _rate(self) -> float:
+        return self.base_rate * self.limit / self.max_limit
+
+    def _set_limit(self, limit: int):
+        """需持有 _cond"""
+        self.limit = limit
+        self.bucket.set_rate(self._rate())
+        CRAWLER_CONCURRENCY_LIMIT.set(limit, self.host)
+        self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """占用一个并发名额和一个令牌；块内抛出 ThrottledError 时降低并发，正常结束时计为成功"""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while self.in_flight >= self.limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ThrottledError('limiter_timeout', self.host)
+                self._cond.wait(remaining)
+            self.in_flight += 1
+        try:
+            self.bucket.acquire()
+            yield self
+        except ThrottledError as e:
+            self.on_throttle(e.reason, e.retry_after)
+            raise
+        else:
+            self.on_success()
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.max_limit:
+                self.successes = 0
+                self.increases += 1
+                self._set_limit(self.limit + 1)
+
+    def on_throttle(self, reason: str, retry_after: float = None):
+        CRAWLER_THROTTLED_TOTAL.inc(reason)
+        now = time.monotonic()
+        with self._cond:
+            self.throttled[reason] = self.throttled.get(reason, 0) + 1
+            self.successes = 0
+            if now >= self._cooldown_until:
+                self._cooldown_until = now + self.cooldown
+                limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+                if limit < self.limit:
+                    self.decreases += 1
+                    logger.warning("站点 %s 限流 (%s)，并发上限 %d -> %d", self.host, reason, self.limit, limit)
+                    self._set_limit(limit)
+        if retry_after:
+            self.bucket.pause(retry_after)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'rate': round(self.bucket.rate, 3),
+                'in_flight': self.in_flight,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'throttled': dict(self.throttled)
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(url: str) -> HostLimiter:
+    """进程级、按站点共享的限流器，所有抓取后端使用同一个实例"""
+    host = urllib.parse.urlsplit(url).netloc or url
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = HostLimiter(host)
+        return limiter
+
+
+@contextmanager
+def limited(url: str):
+    """with limited(url): 发出请求；CRAWLER_RATE_LIMIT=false 时不限流，只识别限流"""
+    if not RATE_LIMIT_ENABLED:
+        try:
+            yield None
+        except ThrottledError as e:
+            CRAWLER_THROTTLED_TOTAL.inc(e.reason)
+            raise
+        return
+    with get_host_limiter(url).slot() as limiter:
+        yield limiter
+
+
+def get_limiter_stats() -> dict:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {host: limiter.get_stats() for host, limiter in limiters.items()}
+
+
+def reset_host_limiters():
+    """丢弃所有站点的限流状态，下次请求时按当前配置重新创建"""
+    with _limiters_lock:
+        _limiters.clear()
@@ -1,47 +1,99 @@
 import os
-import json
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import logging
 import time
 import urllib.parse
 import platform
+from .waits import wait_for_search_results, goto_next_page, page_ready_stats
+from .extraction import extract_items_script, extract_items_legacy, log_show_info
+from .http_spider import DamaiHttpCrawler, SearchPages, USER_AGENT
+from .browser_profile import get_profile_name, apply_profile_options, apply_request_blocking
+from .rate_limiter import ThrottledError, has_captcha, limited
+from ..metrics import time_stage, observe_stage
+from ..services.snapshot_archive import get_snapshot_archive
+
+logger = logging.getLogger(__name__)
 
 class DamaiCrawler:
-    def __init__(self):
+    def __init__(self, driver_pool=None, extract_mode: str = None, backend: str = None,
+                 base_url: str = None, search_base_url: str = None, profile: str = None):
+        """
+        :param base_url: 站点首页，默认取 TARGET_URL
+        :param search_base_url: 搜索页地址，默认取 SEARCH_BASE_URL；压测时指向本地替身服务器
+        :param profile: 浏览器配置（见 browser_profile.BROWSER_PROFILES），默认取 CRAWLER_BROWSER_PROFILE
+        """
         self.status = "idle"
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--headless')
-        self.chrome_options.add_argument('--no-sandbox')
-        self.chrome_options.add_argument('--disable-dev-shm-usage')
-        self.chrome_options.add_argument('--disable-gpu')
-        # 添加反爬虫检测
-        self.chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        self.chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-        self.chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # 设置 user-agent
-        self.chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.109 Safari/537.36')
+        # 进程级 WebDriver 池（见 driver_pool.DriverPool），为空时每次新建浏览器
+        self.driver_pool = driver_pool
+        # 提取方式: script 为一次 execute_script 提取全部项目，legacy 为逐项 WebDriver 调用
+        self.extract_mode = extract_mode or os.getenv('CRAWLER_EXTRACT_MODE', 'script')
+        self.profile = get_profile_name(profile)
+        self._chrome_options = None
         
         self.results = []
-        self.base_url = "https://www.damai.cn/"
-        self.search_base_url = "https://search.damai.cn/search.html"
+        self.base_url = base_url or os.getenv('TARGET_URL', "https://www.damai.cn/")
+        self.search_base_url = search_base_url or os.getenv('SEARCH_BASE_URL', "https://search.damai.cn/search.html")
+        # 抓取后端: auto 先走 HTTP 再回退 Selenium，http/selenium 只用其中一种
+        self.backend = backend or os.getenv('CRAWLER_BACKEND', 'auto')
+        self.http_crawler = DamaiHttpCrawler(
+            search_base_url=self.search_base_url,
+            detail_base_url=os.getenv('DETAIL_BASE_URL', "https://detail.damai.cn/item.htm")
+        )
         
-    def get_driver(self):
-        """获取配置好的 WebDriver，使用 Selenium Manager 自动管理"""
+    @property
+    def chrome_options(self):
+        """ChromeOptions 在第一次创建浏览器时构造，只走 HTTP 后端时不导入 selenium"""
+        if self._chrome_options is None:
+            from selenium.webdriver.chrome.options import Options
+            options = Options()
+            options.add_argument('--headless')
+            options.add_argument('--no-sandbox')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_argument('--disable-gpu')
+            # 添加反爬虫检测
+            options.add_argument('--disable-blink-features=AutomationControlled')
+            options.add_experimental_option('excludeSwitches', ['enable-automation'])
+            options.add_experimental_option('useAutomationExtension', False)
+            
+            # 设置 user-agent
+            options.add_argument(f'user-agent={USER_AGENT}')
+            # lean 配置: 拦截图片/字体/样式表、eager 加载、小窗口和省内存参数
+            apply_profile_options(options, self.profile)
+            self._chrome_options = options
+        return self._chrome_options
+
+    def create_driver(self):
+        """创建新的 WebDriver，使用 Selenium Manager 自动管理"""
+        from selenium import webdriver
         try:
             # 直接使用 Chrome()，Selenium Manager 会自动处理驱动
             driver = webdriver.Chrome(options=self.chrome_options)
+            apply_request_blocking(driver, self.profile)
             return driver
         except Exception as e:
-            print(f"创建 WebDriver 时出错: {str(e)}")
+            logger.error("创建 WebDriver 时出错: %s", e)
             raise
+
+    def get_driver(self):
+        """获取 WebDriver，有连接池时从池中借出"""
+        with time_stage('driver_acquire'):
+            if self.driver_pool is not None:
+                return self.driver_pool.checkout()
+            return self.create_driver()
+
+    def release_driver(self, driver, pages: int = 1, discard: bool = False):
+        """归还 WebDriver，没有连接池时直接关闭"""
+        if self.driver_pool is not None:
+            self.driver_pool.checkin(driver, pages=pages, discard=discard)
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("关闭 WebDriver 时出错: %s", e)
             
     def analyze_page_structure(self):
         """分析页面结构"""
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
         try:
             # 检测系统架构并选择合适的 ChromeDriver
             if platform.system() == 'Darwin' and platform.machine() == 'arm64':
@@ -111,119 +163,130 @@ class DamaiCrawler:
         encoded_name = urllib.parse.quote(artist_name)
         return f"{self.search_base_url}?keyword={encoded_name}&spm=a2oeg.search_category.searchtxt.dsearchbtn"
   
-    def analyze_search_page(self, artist_name: str):
+    def analyze_search_page(self, artist_name: str, max_pages: int = None):
+        """
+        获取艺人的全部搜索结果（最多 max_pages 页）
+        :return: 演出信息列表；没有结果或抓取失败时返回 None，被限流时抛出 ThrottledError
+        """
+        shows_info = [show for page in self.iter_search_pages(artist_name, max_pages) for show in page]
+        self.save_results(artist_name, shows_info)
+        return shows_info or None
+
+    def save_results(self, artist_name: str, shows_info: list):
+        """把结果交给快照归档（后台线程压缩写入，不阻塞抓取）"""
+        if shows_info:
+            get_snapshot_archive().write(artist_name, shows_info, source='crawler')
+
+    def iter_search_pages(self, artist_name: str, max_pages: int = None) -> SearchPages:
+        """
+        逐页产出搜索结果，每页提取完成后立即 yield，调用方可随时停止迭代
+        auto 模式先走 HTTP 轻量抓取，第一页失败时回退到 Selenium；搜索接口确认无结果时直接结束，不回退；
+        被限流（ThrottledError）时不回退，两种后端访问的是同一站点
+        实际使用的后端取完全部结果页时 complete 为 True
+        """
+        max_pages = max_pages or int(os.getenv('SEARCH_MAX_PAGES', '5'))
+        return SearchPages(lambda result: self._iter_search_pages(artist_name, max_pages, result))
+
+    def _iter_search_pages(self, artist_name: str, max_pages: int, result: SearchPages):
+        if self.backend in ('auto', 'http'):
+            found = False
+            http_pages = self.http_crawler.iter_search_pages(artist_name, max_pages)
+            for shows_info in http_pages:
+                found = True
+                yield shows_info
+            if found or http_pages.complete or self.backend == 'http':
+                result.complete = http_pages.complete
+                return
+            logger.info("艺人 %s 轻量抓取失败，回退到 Selenium", artist_name)
+        selenium_pages = self.iter_search_pages_selenium(artist_name, max_pages)
+        yield from selenium_pages
+        result.complete = getattr(selenium_pages, 'complete', False)
+
+    def extract_current_page(self, driver) -> list:
+        """提取当前页面上的所有演出项目"""
+        with time_stage('extract'):
+            if self.extract_mode == 'script':
+                shows_info = extract_items_script(driver)
+            else:
+                shows_info = extract_items_legacy(driver)
+        logger.info("找到 %d 个演出项目", len(shows_info))
+        for show_info in shows_info:
+            log_show_info(show_info)
+        return shows_info
+
+    def check_throttled(self, driver, ready: dict):
+        """验证页，或等待超时时既没有结果也没有无结果标记，视为被限流"""
+        host = urllib.parse.urlsplit(self.search_base_url).netloc
+        current_url = driver.current_url
+        if has_captcha('', current_url):
+            raise ThrottledError('captcha', host)
+        if ready['outcome'] == 'timeout' and not ready['items']:
+            raise ThrottledError('captcha' if has_captcha(driver.page_source, current_url) else 'empty_anomaly', host)
+
+    def iter_search_pages_selenium(self, artist_name: str, max_pages: int = 1) -> SearchPages:
+        """
+        用浏览器加载搜索页，逐页点击下一页并提取演出信息
+        没有下一页时 complete 为 True；达到 max_pages、页面出错时为 False
+        """
+        return SearchPages(lambda result: self._iter_search_pages_selenium(artist_name, max_pages, result))
+
+    def _iter_search_pages_selenium(self, artist_name: str, max_pages: int, result: SearchPages):
+        driver = None
+        pages = 0
+        throttled = False
         try:
             search_url = self.get_artist_search_url(artist_name)
-            print(f"\n开始分析搜索页面: {search_url}")
+            logger.info("开始分析搜索页面: %s", search_url)
             
             driver = self.get_driver()
-            driver.implicitly_wait(10)
-            driver.get(search_url)
-            time.sleep(10)
-            
-            # 查找所有演出项目的容器
-            items = driver.find_elements(By.CSS_SELECTOR, "div.item__main div.items")
-            print(f"\n找到 {len(items)} 个演出项目")
-            
-            shows_info = []
-            for item in items:
-                try:
-                    show_info = {}
-                    
-                    # 1. 获取详情链接
-                    title_link = item.find_element(By.CSS_SELECTOR, "a[href*='detail.damai.cn']")
-                    show_info['detail_url'] = title_link.get_attribute('href')
-                    
-                    # 2. 获取海报图片
-                    img = title_link.find_element(By.CSS_SELECTOR, "img")
-                    show_info['poster'] = img.get_attribute('src') or img.get_attribute('data-src')
-                    
-                    # 3. 获取标签
-                    tag = title_link.find_element(By.CSS_SELECTOR, "span.items__img__tag")
-                    show_info['tag'] = tag.text.strip()
-                    
-                    # 4. 获取演出信息容器
-                    info_container = item.find_element(By.CSS_SELECTOR, "div.items__txt")
-                    
-                    # 5. 获取标题和城市
-                    title_container = info_container.find_element(By.CSS_SELECTOR, "div.items__txt__title")
-                    city_span = title_container.find_element(By.CSS_SELECTOR, "span")
-                    show_info['city'] = city_span.text.strip().replace("【","").replace("】","")
-                    title_text = title_container.find_element(By.CSS_SELECTOR, "a")
-                    show_info['name'] = title_text.text.strip()
-                    
-                    # 6. 获取演出阵容
-                    try:
-                        lineup = info_container.find_element(By.CSS_SELECTOR, "div.items__txt__time")
-                        if "艺人：" in lineup.text:
-                            show_info['lineup'] = lineup.text.replace("艺人：","").strip()
-                        else:
-                            show_info['lineup'] = ""
-                    except:
-                        show_info['lineup'] = ""
-                    
-                    # 7. 获取场馆
-                    try:
-                        venue_container = info_container.find_elements(By.CSS_SELECTOR, "div.items__txt__time")[1]
-                        venue_text = venue_container.text.strip()
-                        if "|" in venue_text:
-                            city, venue = venue_text.split("|")
-                            show_info['venue'] = venue.strip()
-                        else:
-                            show_info['venue'] = venue_text
-                    except:
-                        show_info['venue'] = ""
-                    
-                    # 8. 获取演出时间
-                    try:
-                        date_container = info_container.find_elements(By.CSS_SELECTOR, "div.items__txt__time")[2]
-                        show_info['date'] = date_container.text.strip()
-                    except:
-                        show_info['date'] = ""
-                    
-                    # 9. 获取价格和售票状态
-                    try:
-                        price_container = info_container.find_element(By.CSS_SELECTOR, "div.items__txt__price")
-                        price_text = price_container.find_element(By.CSS_SELECTOR, "span").text.strip()
-                        show_info['price'] = price_text.replace("元","").strip()
-                        
-                        status_text = price_container.text.replace(price_text,"").replace("元","").strip()
-                        show_info['status'] = status_text
-                    except:
-                        show_info['price'] = ""
-                        show_info['status'] = ""
-                    
-                    shows_info.append(show_info)
-                    
-                    print("\n演出信息:")
-                    print(f"名称: {show_info['name']}")
-                    print(f"标签: {show_info['tag']}")
-                    print(f"城市: {show_info['city']}")
-                    print(f"场所: {show_info['venue']}")
-                    print(f"阵容: {show_info['lineup']}")
-                    print(f"日期: {show_info['date']}")
-                    print(f"价格: {show_info['price']}")
-                    print(f"状态: {show_info['status']}")
-                    print(f"详情链接: {show_info['detail_url']}")
-                    print(f"海报链接: {show_info['poster']}")
-                    print("----------------------------------------")
-                    
-                except Exception as e:
-                    print(f"提取演出信息时出错: {str(e)}")
-                    continue
-            
-            # 保存结果到JSON文件
-            if shows_info:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"damai_shows_{artist_name}_{timestamp}.json"
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(shows_info, f, ensure_ascii=False, indent=2)
-                    print(f"\n结果已保存到: {filename}")
+            # 使用显式等待，关闭隐式等待以免缺失元素拖慢查找
+            driver.implicitly_wait(0)
+            with limited(search_url):
+                load_started = time.monotonic()
+                driver.get(search_url)
+                pages = 1
+                load_time = time.monotonic() - load_started
+                observe_stage('page_load', load_time)
+                
+                # 等待结果列表稳定、出现无结果标记或超时
+                ready = wait_for_search_results(driver)
+                observe_stage('ready_wait', ready['elapsed'])
+                page_ready_stats.record(artist_name, load_time, ready)
+                logger.info("页面加载 %.2f 秒，就绪等待 %.2f 秒，结果: %s", load_time, ready['elapsed'], ready['outcome'])
+                self.check_throttled(driver, ready)
+            if ready['outcome'] == 'empty':
+                result.complete = True
+                return
             
-            driver.quit()
-            return shows_info
+            shows_info = self.extract_current_page(driver)
+            while shows_info:
+                yield shows_info
+                if pages >= max_pages:
+                    return
+                # 翻到下一页，没有下一页时结束
+                with limited(search_url):
+                    turn_started = time.monotonic()
+                    if not goto_next_page(driver):
+                        result.complete = True
+                        return
+                    pages += 1
+                    observe_stage('page_load', time.monotonic() - turn_started)
+                    ready = wait_for_search_results(driver)
+                    observe_stage('ready_wait', ready['elapsed'])
+                    page_ready_stats.record(artist_name, time.monotonic() - turn_started, ready)
+                    logger.info("第 %d 页就绪等待 %.2f 秒，结果: %s", pages, ready['elapsed'], ready['outcome'])
+                    self.check_throttled(driver, ready)
+                if ready['outcome'] == 'empty':
+                    result.complete = True
+                    return
+                shows_info = self.extract_current_page(driver)
             
+        except ThrottledError:
+            # 被标记的浏览器会话不再复用
+            throttled = True
+            raise
         except Exception as e:
-            print(f"分析搜索页面时出错: {str(e)}")
-            return None
-  
\ No newline at end of file
+            logger.error("分析搜索页面时出错: %s", e)
+        finally:
+            if driver is not None:
+                self.release_driver(driver, pages=pages, discard=throttled)
@@ -0,0 +1,164 @@
+import os
+import time
+import threading
+from collections import deque
+
+# 搜索结果列表
+RESULT_ITEMS_SELECTOR = "div.item__main div.items"
+# 无结果时页面上出现的标记（见 fixtures/damai/search_empty.html）；等待超时时既没有结果也没有该标记会被当作限流，
+# 站点改版后需要按新的无结果页更新
+EMPTY_RESULT_SELECTORS = os.getenv('SEARCH_EMPTY_SELECTORS', "div.search__main div.search__nodata")
+
+# 下一页按钮，禁用状态视为没有下一页
+NEXT_PAGE_SELECTOR = os.getenv(
+    'SEARCH_NEXT_PAGE_SELECTOR',
+    "div.pagination button.btn-next, div.pagination .next, a.next-page"
+)
+
+# 一次往返同时取结果数量和无结果标记
+_PROBE_SCRIPT = """
+return [
+    document.querySelectorAll(arguments[0]).length,
+    arguments[1] ? document.querySelector(arguments[1]) !== null : false
+];
+"""
+
+
+class SearchResultsReady:
+    """
+    WebDriverWait 条件：结果列表非空且在 stable_period 内数量不再变化，
+    或者出现无结果标记时返回结果
+    """
+    def __init__(self, items_selector: str, empty_selector: str, stable_period: float):
+        self.items_selector = items_selector
+        self.empty_selector = empty_selector
+        self.stable_period = stable_period
+        self.last_count = 0
+        self.stable_since = None
+
+    def __call__(self, driver):
+        count, empty = driver.execute_script(_PROBE_SCRIPT, self.items_selector, self.empty_selector)
+        now = time.monotonic()
+        if count == 0:
+            self.last_count = 0
+            self.stable_since = None
+            return ('empty', 0) if empty else False
+        if count != self.last_count:
+            self.last_count = count
+            self.stable_since = now
+            return False
+        if now - self.stable_since >= self.stable_period:
+            return ('ready', count)
+        return False
+
+
+def wait_for_search_results(driver, timeout: float = None, stable_period: float = None,
+                            poll_interval: float = None) -> dict:
+    """
+    等待搜索结果页就绪，返回 {'outcome': ready/empty/timeout, 'items': 数量, 'elapsed': 秒}
+    """
+    timeout = timeout if timeout is not None else float(os.getenv('SEARCH_READY_TIMEOUT', '10'))
+    stable_period = stable_period if stable_period is not None else float(os.getenv('SEARCH_READY_STABLE', '0.5'))
+    poll_interval = poll_interval if poll_interval is not None else float(os.getenv('SEARCH_READY_POLL', '0.2'))
+
+    # selenium 在第一次使用浏览器时才导入，不拖慢 API 启动
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    condition = SearchResultsReady(RESULT_ITEMS_SELECTOR, EMPTY_RESULT_SELECTORS, stable_period)
+    started = time.monotonic()
+    try:
+        outcome, count = WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(condition)
+    except TimeoutException:
+        outcome, count = 'timeout', condition.last_count
+    return {
+        'outcome': outcome,
+        'items': count,
+        'elapsed': time.monotonic() - started
+    }
+
+
+# 记录当前第一条结果的链接后点击下一页按钮
+_NEXT_PAGE_SCRIPT = """
+var button = document.querySelector(arguments[1]);
+if (!button || button.disabled || button.classList.contains('disabled')
+        || button.getAttribute('aria-disabled') === 'true') {
+    return null;
+}
+var first = document.querySelector(arguments[0] + " a[href*='detail.damai.cn']");
+var signature = first ? first.href : '';
+button.click();
+return signature;
+"""
+
+_FIRST_ITEM_SCRIPT = """
+var first = document.querySelector(arguments[0] + " a[href*='detail.damai.cn']");
+return first ? first.href : '';
+"""
+
+
+def goto_next_page(driver, timeout: float = None) -> bool:
+    """
+    点击下一页并等待结果列表被替换
+    :return: 没有下一页时返回 False；翻页后结果列表没有变化时抛出 TimeoutException（结果不完整，不能当作最后一页）
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    timeout = timeout if timeout is not None else float(os.getenv('SEARCH_READY_TIMEOUT', '10'))
+    signature = driver.execute_script(_NEXT_PAGE_SCRIPT, RESULT_ITEMS_SELECTOR, NEXT_PAGE_SELECTOR)
+    if signature is None:
+        return False
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+        lambda d: d.execute_script(_FIRST_ITEM_SCRIPT, RESULT_ITEMS_SELECTOR) != signature
+    )
+    return True
+
+
+class PageReadyStats:
+    """记录每个页面实际的加载与就绪耗时，用于调整等待参数"""
+    def __init__(self, maxlen: int = 1000):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, artist: str, load_time: float, ready: dict):
+        with self._lock:
+            self._samples.append({
+                'artist': artist,
+                'load_time': load_time,
+                'ready_time': ready['elapsed'],
+                'outcome': ready['outcome'],
+                'items': ready['items'],
+                'timestamp': time.time()
+            })
+
+    @staticmethod
+    def _percentile(values: list, pct: float) -> float:
+        if not values:
+            return 0.0
+        values = sorted(values)
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+    def summary(self) -> dict:
+        """按就绪结果汇总耗时分位数"""
+        with self._lock:
+            samples = list(self._samples)
+        result = {'samples': len(samples), 'outcomes': {}}
+        for outcome in ('ready', 'empty', 'timeout'):
+            group = [s for s in samples if s['outcome'] == outcome]
+            ready_times = [s['ready_time'] for s in group]
+            load_times = [s['load_time'] for s in group]
+            result['outcomes'][outcome] = {
+                'count': len(group),
+                'ready_p50': self._percentile(ready_times, 50),
+                'ready_p95': self._percentile(ready_times, 95),
+                'ready_max': max(ready_times) if ready_times else 0.0,
+                'load_p50': self._percentile(load_times, 50),
+                'load_p95': self._percentile(load_times, 95)
+            }
+        result['recent'] = samples[-20:]
+        return result
+
+
+# 进程级的页面就绪耗时记录
+page_ready_stats = PageReadyStats()
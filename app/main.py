@@ -1,14 +1,153 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+import os
+import threading
+from .config.env import load_env
+
+# 先读取 .env，下面导入的模块在导入时读取各自的配置项
+load_env()
+
 from .crawler.spider import DamaiCrawler
+from .crawler.driver_pool import DriverPool
+from .crawler.browser_profile import get_profile_name
+from .crawler.waits import page_ready_stats
+from .crawler.rate_limiter import RATE_LIMIT_ENABLED, get_limiter_stats
+from .crawler.detail_pages import get_detail_enricher
 from .data_processor import ShowDataProcessor
-from .services.upload_service import UploadService
+from .services.upload_service import UploadService, UPLOAD_MODE, SYNC_MARK_REMOVED
+from .services.job_service import JobManager, JobStore, QueueJobManager
+from .services.task_queue import get_task_queue
+from .services.recrawl_scheduler import RECRAWL_SCHEDULER_ENABLED, get_recrawl_scheduler, record_crawl
+from .services.pipeline import ShowPipeline
+from .services.async_upload_service import AsyncShowWriter
+from .services.search_cache import SearchCache, CACHE_HIT, CACHE_MISS, CACHE_COALESCED, CACHE_BYPASS
+from .services.show_query import show_query_cache
 from .config.database import SessionLocal
+from .routers import shows as shows_router
+from .config.logging_config import setup_logging
+from .config.async_database import async_db_enabled, get_async_sessionmaker, dispose_async_engine
+from .metrics import registry as metrics_registry
 import logging
 
-app = FastAPI()
+# 配置日志（见 config/logging_config.py）
+setup_logging()
+logger = logging.getLogger(__name__)
+
+CRAWLER_QUEUE = os.getenv('CRAWLER_QUEUE', 'local')
+# background: 启动后在后台预热（连接数据库、启动浏览器），完成前 /health/ready 返回 503；
+# blocking: 预热完成后才开始接受请求
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'background')
+
+def init_driver_pools():
+    """每种浏览器配置一个池，默认配置的池立即创建，其他配置首次使用时创建"""
+    app.state.driver_pools = {}
+    app.state.driver_pools_lock = threading.Lock()
+    app.state.driver_pool = get_driver_pool()
+    return app.state.driver_pool
+
+def close_driver_pools():
+    for profile, pool in app.state.driver_pools.items():
+        logger.info(f"关闭 WebDriver 池 ({profile}): {pool.get_stats()}")
+        pool.close()
+
+def prepare_database():
+    """
+    连接数据库并升级表结构：建表，给已存在的 shows 表补充新增的列和索引
+    （写入时会用到 content_hash、removed_at 等列），第一次调用时创建引擎
+    """
+    UploadService.init_db()
+
+async def warm_up(app: FastAPI, driver_pool: DriverPool, warm_count: int, recrawl_scheduler_enabled: bool):
+    """启动预热：检查数据库连接并升级表结构、预热 WebDriver、启动自适应重新抓取，结果记录在 app.state.startup"""
+    startup = app.state.startup
+    try:
+        await run_in_threadpool(prepare_database)
+        startup['database'] = 'ok'
+    except Exception as e:
+        startup['database'] = 'failed'
+        logger.error("数据库连接检查或表结构升级失败: %s", e)
+    if warm_count > 0:
+        logger.info(f"预热 {warm_count} 个 WebDriver 实例")
+        await run_in_threadpool(driver_pool.warm, warm_count)
+        # 浏览器启动失败不影响就绪，抓取时会重新创建或走 HTTP 后端
+        startup['driver_pool'] = 'ok' if driver_pool.get_stats()['idle'] else 'failed'
+    # 自适应重新抓取：按各艺人的到期时间和全局预算自动提交任务
+    if recrawl_scheduler_enabled:
+        try:
+            recrawl_scheduler = await run_in_threadpool(get_recrawl_scheduler)
+            await run_in_threadpool(recrawl_scheduler.import_known_artists)
+            recrawl_scheduler.start(lambda artists: app.state.job_manager.submit(artists))
+            app.state.recrawl_scheduler = recrawl_scheduler
+            startup['recrawl_scheduler'] = 'ok'
+        except Exception as e:
+            startup['recrawl_scheduler'] = 'failed'
+            logger.error("启动自适应重新抓取失败: %s", e)
+    startup['finished'] = True
+    logger.info("启动预热完成: %s", startup)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    应用生命周期：启动爬取任务队列，在后台检查数据库并预热进程级 WebDriver 池
+    WebDriver 池和数据库引擎都在第一次使用时创建，导入 app.main 时不启动浏览器、不连接数据库
+    """
+    driver_pool = init_driver_pools()
+    if CRAWLER_QUEUE == 'shared':
+        # API 只把艺人任务写入共享队列，由 worker.py 进程领取执行，本进程不启动浏览器
+        job_manager = QueueJobManager(get_task_queue())
+        # 演出由 worker 进程写入，本进程的列表响应缓存收不到失效通知
+        show_query_cache.enabled = False
+    else:
+        # 爬取与数据库写入都是阻塞调用，由任务队列的工作线程执行
+        job_manager = JobManager(
+            store=JobStore(),
+            runner=update_artist_shows_sync,
+            workers=int(os.getenv('CRAWLER_CONCURRENCY', '4'))
+        )
+    app.state.job_manager = job_manager
+    app.state.search_cache = SearchCache()
+    # 可选的异步数据库层：工作线程把批次交给事件循环写入，等待浏览器时不占用数据库连接
+    app.state.async_writer = None
+    if async_db_enabled():
+        app.state.async_writer = AsyncShowWriter(
+            get_async_sessionmaker(),
+            loop=asyncio.get_running_loop(),
+            max_concurrency=int(os.getenv('DB_ASYNC_MAX_CONCURRENCY', '5'))
+        )
+    job_manager.start()
+    warm_count = int(os.getenv('DRIVER_POOL_WARM', '1')) if CRAWLER_QUEUE != 'shared' else 0
+    app.state.startup = {'finished': False, 'database': 'pending'}
+    if warm_count > 0:
+        app.state.startup['driver_pool'] = 'pending'
+    if RECRAWL_SCHEDULER_ENABLED:
+        app.state.startup['recrawl_scheduler'] = 'pending'
+    app.state.recrawl_scheduler = None
+    warm_up_task = None
+    if STARTUP_WARMUP == 'blocking':
+        await warm_up(app, driver_pool, warm_count, RECRAWL_SCHEDULER_ENABLED)
+    else:
+        warm_up_task = asyncio.create_task(warm_up(app, driver_pool, warm_count, RECRAWL_SCHEDULER_ENABLED))
+    try:
+        yield
+    finally:
+        if warm_up_task is not None and not warm_up_task.done():
+            warm_up_task.cancel()
+        if app.state.recrawl_scheduler is not None:
+            app.state.recrawl_scheduler.stop()
+        job_manager.stop()
+        job_manager.close()
+        close_driver_pools()
+        if app.state.async_writer is not None:
+            await dispose_async_engine()
+
+app = FastAPI(lifespan=lifespan)
 
 # 配置CORS
 app.add_middleware(
@@ -19,84 +158,198 @@ app.add_middleware(
     allow_headers=["*"],  # 允许所有 headers
 )
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+app.include_router(shows_router.router, prefix="/shows", tags=["shows"])
 
 # 请求模型
 class CrawlerRequest(BaseModel):
     artists: List[str]
+    force: bool = False
+    profile: Optional[str] = None
 
-async def update_artist_shows(artist: str):
+def get_driver_pool(profile: str = None) -> DriverPool:
+    """取用某个浏览器配置的进程级 WebDriver 池，不存在时创建"""
+    profile = get_profile_name(profile)
+    with app.state.driver_pools_lock:
+        pool = app.state.driver_pools.get(profile)
+        if pool is None:
+            pool = DriverPool(
+                factory=lambda: DamaiCrawler(profile=profile).create_driver(),
+                max_size=int(os.getenv('DRIVER_POOL_SIZE', '2')),
+                max_pages=int(os.getenv('DRIVER_MAX_PAGES', '50'))
+            )
+            app.state.driver_pools[profile] = pool
+        return pool
+
+def update_artist_shows_sync(artist: str, force: bool = False, on_stage=None, on_cache=None, on_counts=None,
+                             profile: str = None, fence=None):
+    """
+    爬取、处理并上传单个艺人的演出信息（阻塞调用，在工作线程中运行）
+    爬虫、日期拆分与写库通过 ShowPipeline 流式衔接，遇到全部已入库或全部已过期的页面时停止翻页；
+    DETAIL_ENRICH=true 时每页先并发抓取详情页，按实际场次拆分日期
+    （sync 模式下已入库的页面内容可能有变化，只按过期判断；需要标记消失的演出时完整抓取）
+    :param force: 为 True 时跳过搜索结果缓存
+    :param on_stage: 可选回调，进入 crawling/processing/uploading 阶段时调用
+    :param on_cache: 可选回调，报告搜索缓存结果（hit/miss/coalesced/bypass）
+    :param on_counts: 可选回调，报告写入计数（inserted/skipped，sync 模式另有 updated/unchanged/removed）
+    :param profile: 浏览器配置（default/lean），为空时使用 CRAWLER_BROWSER_PROFILE
+    :param fence: 可选的 fence(db)，每个批次在写入事务中先调用（共享队列的 worker 用来确认仍持有租约）
+    """
+    on_stage = on_stage or (lambda state: None)
+    on_cache = on_cache or (lambda outcome: None)
+    on_counts = on_counts or (lambda counts: None)
+    sync_mode = UPLOAD_MODE == 'sync'
+    mark_removed = sync_mode and SYNC_MARK_REMOVED
     try:
         logger.info(f"开始更新艺人 {artist} 的演出信息")
         
         # 创建爬虫和数据处理器实例
-        crawler = DamaiCrawler()
+        driver_pool = get_driver_pool(profile) if hasattr(app.state, 'driver_pools') else None
+        crawler = DamaiCrawler(driver_pool=driver_pool, profile=profile)
         processor = ShowDataProcessor()
+        async_writer = getattr(app.state, 'async_writer', None)
+        cutoff = date.today() - timedelta(days=int(os.getenv('SEARCH_PAST_DAYS', '0')))
         
-        # 获取演出数据
-        shows = crawler.analyze_search_page(artist)
-        if not shows:
-            logger.warning(f"未找到艺人 {artist} 的演出信息")
-            return False
-            
-        logger.info(f"找到 {len(shows)} 条原始演出信息")
-        
-        # 处理演出数据
-        processed_shows = processor.process_date_range(shows)
-        logger.info(f"处理后得到 {len(processed_shows)} 条演出信息")
+        def stop_page(shows) -> bool:
+            """整页演出已全部入库或已过期时停止翻页（在管道的爬虫线程中调用）"""
+            processed_shows = processor.process_date_range(shows)
+            if processor.all_before(processed_shows, cutoff):
+                return True
+            if sync_mode:
+                return False
+            if async_writer is not None:
+                return async_writer.is_page_known_from_thread(processed_shows)
+            check_db = SessionLocal()
+            try:
+                return UploadService.is_page_known(check_db, processed_shows)
+            finally:
+                check_db.close()
         
-        # 上传到数据库
-        db = SessionLocal()
+        # 启用异步数据库层时由 async_writer 按批取用连接，不再持有同步会话
+        db = SessionLocal() if async_writer is None else None
         try:
-            success = UploadService.upload_shows(
-                db=db,
-                shows=processed_shows,
-                artist=artist
-            )
+            counts = {}
+
+            def run_pipeline(pages, collect: bool = False, raw_log: bool = True) -> ShowPipeline:
+                pipeline = ShowPipeline(
+                    pages=pages,
+                    processor=processor,
+                    db=db,
+                    artist=artist,
+                    stop_page=None if mark_removed else stop_page,
+                    on_stage=on_stage,
+                    raw_log=raw_log,
+                    collect=collect,
+                    async_writer=async_writer,
+                    mode=UPLOAD_MODE,
+                    mark_removed=mark_removed,
+                    enricher=get_detail_enricher(),
+                    fence=fence
+                )
+                pipeline.run()
+                for key, value in pipeline.writer.get_counts().items():
+                    counts[key] = counts.get(key, 0) + value
+                return pipeline
             
-            if success:
-                logger.info(f"艺人 {artist} 的数据更新成功")
-                return True
+            # 相同艺人的并发请求共享一次抓取；命中缓存时把缓存结果送入同一管道写库
+            search_cache = getattr(app.state, 'search_cache', None)
+            if search_cache is not None:
+                crawled = []
+
+                def fetch():
+                    crawled.append(run_pipeline(crawler.iter_search_pages(artist), collect=True))
+                    return crawled[-1].collected
+
+                # 提前停止翻页时只收集到了前几页，不写入缓存，否则有效期内的命中只能拿到部分结果
+                shows, outcome = search_cache.get_or_fetch(
+                    artist, fetch, force=force, cacheable=lambda shows: not crawled[-1].stopped_early
+                )
+                on_cache(outcome)
+                if shows and outcome in (CACHE_HIT, CACHE_COALESCED):
+                    # 原始数据在抓取时已经归档，缓存结果不再重复归档
+                    run_pipeline([shows], raw_log=False)
+                found = len(shows or [])
             else:
-                logger.error(f"艺人 {artist} 的数据更新失败")
+                found = run_pipeline(crawler.iter_search_pages(artist)).found
+            on_counts(counts)
+            record_crawl(artist, counts)
+            
+            if not found:
+                logger.warning(f"未找到艺人 {artist} 的演出信息")
                 return False
+            
+            logger.info(f"艺人 {artist} 的数据更新成功，共 {found} 条原始演出信息，写入: {counts}")
+            return True
                 
         finally:
-            db.close()
+            if db is not None:
+                db.close()
             
     except Exception as e:
         logger.error(f"艺人 {artist} 数据更新失败: {str(e)}")
+        record_crawl(artist, {}, success=False)
         raise
 
+@app.post("/crawler/jobs")
+async def submit_crawl_job(request: CrawlerRequest):
+    """提交爬取任务，立即返回任务 id"""
+    try:
+        get_profile_name(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job_id = app.state.job_manager.submit(request.artists, force=request.force, profile=request.profile)
+    return {
+        "success": True,
+        "data": {"job_id": job_id}
+    }
+
+@app.get("/crawler/jobs/{job_id}")
+async def get_crawl_job(job_id: str):
+    """查询任务进度和每个艺人的状态"""
+    job = app.state.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return {
+        "success": True,
+        "data": job
+    }
+
 @app.post("/crawler/update")
 async def update_shows(request: Request):
+    """同步更新接口：提交任务并等待全部艺人处理完成"""
     try:
         data = await request.json()
         artists = data.get('artists', [])
-        results = []
-        
-        for artist in artists:
-            try:
-                success = await update_artist_shows(artist)
-                results.append({
-                    "artist": artist,
-                    "success": success,
-                    "message": "更新成功" if success else "更新失败"
-                })
-            except Exception as e:
-                results.append({
-                    "artist": artist,
-                    "success": False,
-                    "message": str(e)
-                })
+        job_manager = app.state.job_manager
+        profile = data.get('profile')
+        try:
+            get_profile_name(profile)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        job_id = job_manager.submit(artists, force=bool(data.get('force', False)), profile=profile)
+        await run_in_threadpool(job_manager.wait, job_id)
+        job = job_manager.get(job_id)
+        results = [
+            {
+                "artist": item['artist'],
+                "success": item['success'],
+                "message": item['message'],
+                "changes": item['changes']
+            }
+            for item in job['artists']
+        ]
         
         return {
             "success": True,
-            "data": results
+            "data": results,
+            "cache": {
+                "hits": job['cache'].get(CACHE_HIT, 0),
+                "misses": job['cache'].get(CACHE_MISS, 0) + job['cache'].get(CACHE_BYPASS, 0),
+                "coalesced": job['cache'].get(CACHE_COALESCED, 0)
+            }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"新请求处理失败: {str(e)}")
         raise HTTPException(
@@ -104,7 +357,99 @@ async def update_shows(request: Request):
             detail=str(e)
         )
 
+@app.get("/crawler/pool")
+async def driver_pool_stats():
+    """WebDriver 池统计信息"""
+    driver_pool = getattr(app.state, 'driver_pool', None)
+    if driver_pool is None:
+        return {"enabled": False}
+    # 顶层为默认配置的池，profiles 列出所有已创建的池
+    profiles = {profile: pool.get_stats() for profile, pool in app.state.driver_pools.items()}
+    return {"enabled": True, **driver_pool.get_stats(), "profiles": profiles}
+
+@app.get("/crawler/limits")
+async def rate_limit_stats():
+    """按站点的限流状态：当前并发上限、令牌桶速率和识别到的限流次数"""
+    return {"enabled": RATE_LIMIT_ENABLED, "hosts": get_limiter_stats()}
+
+@app.get("/crawler/details")
+async def detail_enrich_stats():
+    """详情页补全统计（DETAIL_ENRICH=true 时）"""
+    enricher = get_detail_enricher()
+    if enricher is None:
+        return {"enabled": False}
+    return {"enabled": True, **enricher.get_stats()}
+
+@app.get("/crawler/queue")
+async def task_queue_stats():
+    """共享任务队列统计（CRAWLER_QUEUE=shared 时）"""
+    if CRAWLER_QUEUE != 'shared':
+        return {"enabled": False}
+    stats = await run_in_threadpool(get_task_queue().get_stats)
+    return {"enabled": True, **stats}
+
+class ScheduleRequest(BaseModel):
+    artists: List[str]
+
+@app.get("/crawler/schedule")
+async def recrawl_schedule(limit: int = 100):
+    """自适应重新抓取的调度统计，以及按下次到期时间排序的艺人"""
+    if not RECRAWL_SCHEDULER_ENABLED:
+        return {"enabled": False}
+    scheduler = get_recrawl_scheduler()
+    stats = await run_in_threadpool(scheduler.get_stats)
+    artists = await run_in_threadpool(scheduler.list_artists, limit)
+    return {"enabled": True, **stats, "schedule": artists}
+
+@app.post("/crawler/schedule/artists")
+async def add_scheduled_artists(request: ScheduleRequest):
+    """登记需要定期抓取的艺人，新艺人立即到期"""
+    if not RECRAWL_SCHEDULER_ENABLED:
+        raise HTTPException(status_code=400, detail="未开启自适应重新抓取（RECRAWL_SCHEDULER）")
+    added = await run_in_threadpool(get_recrawl_scheduler().add_artists, request.artists)
+    return {"success": True, "data": {"added": added}}
+
+@app.get("/crawler/cache")
+async def search_cache_stats():
+    """搜索结果缓存统计"""
+    return app.state.search_cache.get_stats()
+
+@app.get("/crawler/page-ready")
+async def page_ready_summary():
+    """搜索页加载与就绪耗时统计"""
+    return page_ready_stats.summary()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 文本格式的各阶段耗时与计数指标"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
-    """健康检查接口"""
-    return {"status": "healthy"} 
\ No newline at end of file
+    """健康检查接口（与 /health/live 相同）"""
+    return {"status": "healthy"}
+
+@app.get("/health/live")
+async def liveness():
+    """存活检查：进程和事件循环在响应即可，不访问数据库和浏览器"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """就绪检查：启动预热完成且数据库可用时返回 200，否则 503"""
+    startup = dict(getattr(app.state, 'startup', None) or {'finished': False})
+    if startup['finished'] and startup.get('database') != 'ok':
+        # 启动时数据库不可用，之后每次检查重试（包括升级表结构），恢复后转为就绪
+        try:
+            await run_in_threadpool(prepare_database)
+            app.state.startup['database'] = startup['database'] = 'ok'
+        except Exception as e:
+            logger.warning("数据库连接检查失败: %s", e)
+    if not startup['finished']:
+        status = 'starting'
+    elif startup.get('database') == 'ok':
+        status = 'ready'
+    else:
+        status = 'unavailable'
+    content = {"status": status, "checks": {key: value for key, value in startup.items() if key != 'finished'}}
+    return JSONResponse(content, status_code=200 if status == 'ready' else 503)
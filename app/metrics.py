@@ -0,0 +1,206 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 默认耗时桶（秒），覆盖从单次数据库查询到整页浏览器加载的范围
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Counter:
+    """单调递增计数器，可按一个标签区分"""
+    type_name = 'counter'
+
+    def __init__(self, name: str, help_text: str, label: str = None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str = None, amount: float = 1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def get(self, label_value: str = None):
+        return self._values.get(label_value, 0)
+
+    def _labels(self, label_value) -> dict:
+        return {self.label: label_value} if self.label else {}
+
+    def collect(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f'{self.name}{_format_labels(self._labels(k))} {_format_value(v)}'
+            for k, v in sorted(values.items(), key=lambda kv: str(kv[0]))
+        ]
+
+
+class Gauge(Counter):
+    """可增可减的当前值"""
+    type_name = 'gauge'
+
+    def dec(self, label_value: str = None, amount: float = 1):
+        self.inc(label_value, -amount)
+
+    def set(self, value: float, label_value: str = None):
+        with self._lock:
+            self._values[label_value] = value
+
+
+class Histogram:
+    """累积分桶直方图，observe 只做一次二分查找和加锁累加"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label: str = None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        # label_value -> [各桶计数(非累积), 总和, 总数]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = None):
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, label_value: str = None):
+        """记录 with 代码块的耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, label_value)
+
+    def get(self, label_value: str = None) -> dict:
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                return {'count': 0, 'sum': 0.0}
+            return {'count': series[2], 'sum': series[1]}
+
+    def collect(self) -> list:
+        with self._lock:
+            snapshot = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        lines = []
+        for label_value, (counts, total, count) in sorted(snapshot.items(), key=lambda kv: str(kv[0])):
+            labels = {self.label: label_value} if self.label else {}
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                bucket_labels = dict(labels, le=_format_value(float(bound)))
+                lines.append(f'{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """进程内指标注册表，按 Prometheus 文本格式输出"""
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# 热路径各阶段耗时，stage 取值:
+#   driver_acquire 借出/新建浏览器    page_load 页面或接口请求    ready_wait 等待结果就绪
+#   extract 提取/解析演出项目         date_processing 日期拆分    dedup 批量查重
+#   insert 批量插入                    commit 提交事务              detail_enrich 并发抓取详情页（每页搜索结果一次）
+STAGE_SECONDS = registry.register(Histogram(
+    'damai_stage_duration_seconds', 'Time spent in each crawl/upload stage', label='stage'
+))
+
+# 演出计数，result 取值: found 原始演出, expanded 拆分后, new 新增, skipped 重复跳过, extract_failed 提取失败,
+#   sync 模式另有 updated 内容更新, unchanged 内容未变, removed 标记下架
+SHOWS_TOTAL = registry.register(Counter(
+    'damai_shows_total', 'Shows seen by the crawl pipeline', label='result'
+))
+
+DB_POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    'damai_db_pool_checkout_wait_seconds', 'Time spent waiting for a database connection from the pool'
+))
+DB_POOL_CONNECTIONS = registry.register(Counter(
+    'damai_db_pool_connections_total', 'Database connections opened by the pool'
+))
+DB_POOL_CHECKED_OUT = registry.register(Gauge(
+    'damai_db_pool_checked_out', 'Database connections currently checked out of the pool'
+))
+
+# 共享任务队列中 worker 处理的艺人任务，result 取值: done 成功, failed 失败, retried 出错后重新入队, lease_lost 租约被接手
+QUEUE_TASKS_TOTAL = registry.register(Counter(
+    'damai_queue_tasks_total', 'Artist tasks processed by queue workers', label='result'
+))
+
+# 按站点限流（见 crawler/rate_limiter.py）：AIMD 调整后的当前并发上限，以及识别到的限流页面，
+#   reason 取值: http_429/http_403/http_503 状态码, captcha 验证页, empty_anomaly 异常空结果
+CRAWLER_CONCURRENCY_LIMIT = registry.register(Gauge(
+    'damai_crawler_concurrency_limit', 'Current adaptive concurrency limit per host', label='host'
+))
+CRAWLER_THROTTLED_TOTAL = registry.register(Counter(
+    'damai_crawler_throttled_total', 'Responses recognised as throttling', label='reason'
+))
+
+# 详情页抓取（见 crawler/detail_pages.py），result 取值: cached 缓存未过期, revalidated 304 未修改,
+#   fetched 重新下载, failed 请求或解析失败（回退到按日期范围拆分）
+DETAIL_PAGES_TOTAL = registry.register(Counter(
+    'damai_detail_pages_total', 'Detail page lookups by the enrichment stage', label='result'
+))
+
+
+def time_stage(stage: str):
+    """记录某个阶段的耗时: with time_stage('dedup'): ..."""
+    return STAGE_SECONDS.time(stage)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage)
+
+
+def count_shows(result: str, amount: int = 1):
+    if amount:
+        SHOWS_TOTAL.inc(result, amount)
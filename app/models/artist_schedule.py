@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+from ..config.database import Base
+
+
+class ArtistSchedule(Base):
+    """自适应重新抓取的艺人抓取历史与下次到期时间（见 services/recrawl_scheduler.py）"""
+    __tablename__ = "artist_schedules"
+    __table_args__ = (
+        Index('ix_artist_schedules_due', 'next_due_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    artist = Column(String(255), nullable=False, unique=True)
+    crawls = Column(Integer, nullable=False, default=0)
+    last_crawled_at = Column(Float)
+    last_success = Column(Integer)
+    # 最近一次抓取新增、更新和下架的演出数
+    last_changes = Column(Integer)
+    # 每次抓取变化数的指数加权平均
+    change_rate = Column(Float, nullable=False, default=0.0)
+    # shows 表中该艺人最近一场未开始的演出
+    next_show_date = Column(Date)
+    interval_seconds = Column(Float)
+    next_due_at = Column(Float, nullable=False)
+    # 已提交抓取但尚未记录结果，避免重复提交
+    dispatched_at = Column(Float)
+    created_at = Column(Float, nullable=False)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Float, Text, Index
+from ..config.database import Base
+
+
+class CrawlTask(Base):
+    """多进程爬取的共享任务队列，一行对应一个任务中的一个艺人（见 services/task_queue.py）"""
+    __tablename__ = "crawl_tasks"
+    __table_args__ = (
+        # 领取任务：按状态和可领取时间找最早入队的任务
+        Index('ix_crawl_tasks_state_available', 'state', 'available_at', 'id'),
+        Index('ix_crawl_tasks_job', 'job_id', 'position'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # 去重键 job_id:position，重复入队不会产生第二个任务
+    dedup_key = Column(String(80), nullable=False, unique=True)
+    job_id = Column(String(32), nullable=False)
+    position = Column(Integer, nullable=False)
+    artist = Column(String(255), nullable=False)
+    force = Column(Integer, nullable=False, default=0)
+    profile = Column(String(32))
+    # queued / leased / done / failed；leased 时 stage 记录 crawling/processing/uploading
+    state = Column(String(16), nullable=False, default='queued')
+    stage = Column(String(16))
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # 租约：worker_id + lease_token 标识当前持有者，lease_expires_at 之前没有续约视为 worker 已退出
+    worker_id = Column(String(128))
+    lease_token = Column(String(32))
+    lease_expires_at = Column(Float)
+    available_at = Column(Float, nullable=False)
+    queued_at = Column(Float, nullable=False)
+    started_at = Column(Float)
+    stage_started_at = Column(Float)
+    finished_at = Column(Float)
+    success = Column(Integer)
+    message = Column(Text)
+    cache = Column(String(16))
+    changes = Column(Text)
+    timings = Column(Text, nullable=False, default='{}')
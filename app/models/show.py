@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
 from ..config.database import Base
 from datetime import datetime
 
 class Show(Base):
     __tablename__ = "shows"
+    __table_args__ = (
+        # 列表接口按 (date, id) 游标分页，索引带上 id 使排序和翻页条件都在索引内完成
+        Index('ix_shows_artist_date', 'artist', 'date', 'id'),
+        Index('ix_shows_city_date', 'city', 'date', 'id'),
+        Index('ix_shows_date', 'date', 'id'),
+        # 写入时批量查重的键
+        Index('ix_shows_name_date_city', 'name', 'date', 'city'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255))
@@ -17,4 +25,9 @@ class Show(Base):
     status = Column(String(50))
     detail_url = Column(String(255))
     poster = Column(String(255))
-    created_at = Column(DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # 可变字段（价格、状态等）的摘要，同步模式据此只更新内容有变化的行
+    content_hash = Column(String(40))
+    updated_at = Column(DateTime)
+    # 同步模式下从最新抓取结果中消失的演出，标记而不删除
+    removed_at = Column(DateTime) 
\ No newline at end of file
@@ -0,0 +1,174 @@
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional
+
+# 演出日期格式：
+#   2024.12.21                 单日
+#   2024.12.21 19:30           单日带时间
+#   2024.12.21-12.22           同年范围
+#   2024.12.31-01.02           跨年范围（结束月份小于开始月份时视为次年）
+#   2024.12.21-2025.01.02      带年份的结束日期
+#   2024.12.21-22              只有结束日
+# 日期后面的时间、星期等内容放入 time
+_DATE_PATTERN = re.compile(
+    r'^\s*(\d{4})\.(\d{1,2})\.(\d{1,2})'
+    r'(?:\s*[-~至]\s*(?:(?:(\d{4})\.)?(\d{1,2})\.)?(\d{1,2}))?'
+    r'(?:\s+(.*?))?\s*$'
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_show_dates(date_str: str):
+    """
+    解析演出日期字符串
+    :return: (开始日期, 结束日期, 时间)，无法解析时抛出 ValueError
+    """
+    match = _DATE_PATTERN.match(date_str or "")
+    if match is None:
+        raise ValueError(f"无法解析的日期: {date_str}")
+    year, month, day, end_year, end_month, end_day, time_text = match.groups()
+    start = date(int(year), int(month), int(day))
+    if end_day is None:
+        return start, start, time_text or None
+
+    end_month = int(end_month) if end_month else start.month
+    end_year = int(end_year) if end_year else start.year
+    end = date(end_year, end_month, int(end_day))
+    if end < start and not match.group(4):
+        # 结束日期没有写年份且早于开始日期，视为跨年
+        end = date(end_year + 1, end_month, int(end_day))
+    if end < start:
+        raise ValueError(f"结束日期早于开始日期: {date_str}")
+    return start, end, time_text or None
+
+
+def _price_key(price: str):
+    try:
+        return 0, float(price), price
+    except ValueError:
+        return 1, 0.0, price
+
+
+def group_sessions(sessions) -> Optional[tuple]:
+    """
+    把详情页解析出的场次（见 crawler/detail_pages.parse_detail_page）按日期合并
+    :return: ((日期, 时间, 票档), ...)，同一天的多个场次时间以空格分隔，票档按价格以 / 分隔
+    """
+    days = {}
+    for session in sessions or ():
+        day = parse_show_dates(session['date'])[0]
+        times, prices = days.setdefault(day, ([], set()))
+        if session.get('time') and session['time'] not in times:
+            times.append(session['time'])
+        prices.update(session.get('prices') or ())
+    if not days:
+        return None
+    return tuple(
+        (day, ' '.join(times) or None, '/'.join(sorted(prices, key=_price_key)) or None)
+        for day, (times, prices) in sorted(days.items())
+    )
+
+
+@dataclass(slots=True)
+class ShowRecord:
+    """一条原始演出信息，日期只在构造时解析一次"""
+    name: str
+    tag: str
+    city: str
+    venue: str
+    lineup: str
+    date_text: str
+    price: str
+    status: str
+    detail_url: str
+    poster: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    time: Optional[str] = None
+    # 详情页中的实际场次，为空时按日期范围逐天拆分
+    sessions: Optional[tuple] = None
+
+    @classmethod
+    def from_dict(cls, show: dict) -> 'ShowRecord':
+        """从爬虫返回的 dict 构造，日期无法解析时 start_date 为 None"""
+        record = cls(
+            name=show['name'],
+            tag=show['tag'],
+            city=show['city'],
+            venue=show['venue'],
+            lineup=show['lineup'],
+            date_text=show['date'],
+            price=show['price'],
+            status=show['status'],
+            detail_url=show['detail_url'],
+            poster=show['poster']
+        )
+        try:
+            record.start_date, record.end_date, record.time = parse_show_dates(show['date'])
+        except (ValueError, TypeError):
+            pass
+        try:
+            record.sessions = group_sessions(show.get('sessions'))
+        except (ValueError, TypeError, KeyError):
+            pass
+        return record
+
+    def iter_days(self):
+        """
+        按天产出共享本记录的 ShowDay 视图：有详情页场次时每个演出日一个视图，
+        否则按日期范围逐天展开；日期无法解析时只产出一个日期为空的视图
+        """
+        if self.sessions:
+            for session in self.sessions:
+                yield ShowDay(self, session[0], session)
+            return
+        if self.start_date is None:
+            yield ShowDay(self, None)
+            return
+        current = self.start_date
+        while current <= self.end_date:
+            yield ShowDay(self, current)
+            current += timedelta(days=1)
+
+
+class ShowDay(Mapping):
+    """某条演出在某一天的轻量视图，按 dict 方式访问时与原有数据格式一致"""
+    __slots__ = ('record', 'show_date', 'session')
+
+    _KEYS = ('detail_url', 'poster', 'tag', 'city', 'name', 'lineup', 'venue', 'date', 'price', 'status')
+
+    def __init__(self, record: ShowRecord, show_date: Optional[date], session: Optional[tuple] = None):
+        self.record = record
+        self.show_date = show_date
+        # (日期, 时间, 票档)，来自详情页时日期带上场次时间，价格使用当天的票档
+        self.session = session
+
+    def __getitem__(self, key):
+        if self.session is not None:
+            if key == 'date':
+                day_text = self.show_date.strftime('%Y.%m.%d')
+                return f"{day_text} {self.session[1]}" if self.session[1] else day_text
+            if key == 'price' and self.session[2]:
+                return self.session[2]
+        if key == 'date':
+            if self.show_date is None:
+                return self.record.date_text
+            if self.record.start_date == self.record.end_date:
+                # 单日演出保留原始字符串（可能带时间）
+                return self.record.date_text
+            return self.show_date.strftime('%Y.%m.%d')
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self.record, key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __repr__(self):
+        return f"ShowDay({self.record.name!r}, {self.show_date})"
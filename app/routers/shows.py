@@ -0,0 +1,70 @@
+import json
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from ..config.database import SessionLocal
+from ..services.show_query import ShowQueryService, show_query_cache, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter()
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+
+def _response(request: Request, body: bytes, etag: str, cache_status: str) -> Response:
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'X-Cache': cache_status}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+@router.get("")
+def list_shows(
+    request: Request,
+    artist: Optional[str] = None,
+    city: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    按艺人、城市、日期范围和状态查询演出，按日期排序
+    翻页时把响应中的 next_cursor 作为 cursor 传回；支持 ETag / If-None-Match
+    """
+    params = {
+        'artist': artist, 'city': city, 'status': status, 'date_from': date_from,
+        'date_to': date_to, 'cursor': cursor, 'limit': limit
+    }
+    key = show_query_cache.make_key(params)
+    cached = show_query_cache.get(key)
+    if cached is not None:
+        body, etag = cached
+        return _response(request, body, etag, 'HIT')
+
+    generation = show_query_cache.generation(artist)
+    db = SessionLocal()
+    try:
+        result = ShowQueryService.list_shows(db, **params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        db.close()
+    body = json.dumps({
+        "success": True,
+        "data": result['items'],
+        "next_cursor": result['next_cursor']
+    }, ensure_ascii=False).encode('utf-8')
+    etag = show_query_cache.put(key, artist, generation, body)
+    return _response(request, body, etag, 'MISS')
+
+
+@router.get("/cache")
+async def show_query_cache_stats():
+    """列表响应缓存统计"""
+    return show_query_cache.get_stats()
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from sqlalchemy import and_, insert, select, tuple_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.show import Show
+from ..config.logging_config import sample_row_log
+from ..metrics import time_stage, count_shows
+from .upload_service import UploadService, UPLOAD_BATCH_SIZE
+from .show_query import show_query_cache
+from .task_queue import LeaseLostError
+
+logger = logging.getLogger(__name__)
+
+
+async def retry_backoff(retry_count: int, retry_delay: float):
+    """指数退避等待，使用 asyncio.sleep 不阻塞事件循环"""
+    delay = retry_delay * (2 ** (retry_count - 1))
+    logger.info("等待 %.1f 秒后进行第 %d 次重试...", delay, retry_count + 1)
+    await asyncio.sleep(delay)
+
+
+class AsyncUploadService:
+    """UploadService 写入路径的异步版本，行的构造与查重规则与同步版本共用"""
+    @staticmethod
+    async def init_db(engine):
+        """初始化数据库表"""
+        async with engine.begin() as conn:
+            await conn.run_sync(UploadService.upgrade_schema)
+
+    @staticmethod
+    async def is_duplicate(db: AsyncSession, show_data: dict, max_retries=3, retry_delay=1) -> bool:
+        """检查是否存在重复数据，带重试机制"""
+        retry_count = 0
+        while True:
+            try:
+                show_date = UploadService.get_show_date(show_data)
+                result = await db.execute(
+                    select(Show.id).where(and_(
+                        Show.name == show_data['name'],
+                        Show.date == show_date,
+                        Show.city == show_data['city']
+                    )).limit(1)
+                )
+                duplicate = result.first() is not None
+                if sample_row_log(logger):
+                    logger.debug("重复检查: %s - %s, 结果: %s",
+                                 show_data['name'], show_data['date'], '存在' if duplicate else '不存在')
+                return duplicate
+            except OperationalError as e:
+                retry_count += 1
+                logger.warning("检查重复数据失败 (尝试 %d/%d): %s", retry_count, max_retries, e)
+                if retry_count >= max_retries:
+                    raise
+                await retry_backoff(retry_count, retry_delay)
+
+    @staticmethod
+    async def fetch_existing_keys(db: AsyncSession, keys, batch_size: int = None) -> set:
+        """批量查询已存在的 (name, date, city) 键"""
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        keys = list(keys)
+        existing = set()
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            with time_stage('dedup'):
+                result = await db.execute(
+                    select(Show.name, Show.date, Show.city).where(
+                        tuple_(Show.name, Show.date, Show.city).in_(chunk)
+                    )
+                )
+            existing.update((row.name, row.date, row.city) for row in result)
+        return existing
+
+    @staticmethod
+    async def is_page_known(db: AsyncSession, shows: list) -> bool:
+        """处理后的一页演出是否全部已存在于 shows 表"""
+        keys = set()
+        for show_data in shows:
+            try:
+                show_date = UploadService.get_show_date(show_data)
+            except Exception:
+                return False
+            keys.add((show_data['name'], show_date, show_data['city']))
+        if not keys:
+            return False
+        return len(await AsyncUploadService.fetch_existing_keys(db, keys)) == len(keys)
+
+    @staticmethod
+    async def bulk_insert_shows(db: AsyncSession, shows: list, artist: str, batch_size: int = None):
+        """批量查重并分批插入新数据，返回 (新增数, 跳过数)，不提交事务"""
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        rows = UploadService.build_show_rows(shows, artist)
+        existing = await AsyncUploadService.fetch_existing_keys(db, UploadService.row_keys(rows), batch_size)
+        new_rows, skip_count = UploadService.select_new_rows(rows, existing)
+        for start in range(0, len(new_rows), batch_size):
+            with time_stage('insert'):
+                await db.execute(insert(Show), new_rows[start:start + batch_size])
+        return len(new_rows), skip_count
+
+    @staticmethod
+    async def upload_shows(db: AsyncSession, shows: list, artist: str, max_retries: int = 3,
+                           retry_delay: float = 1):
+        """上传演出数据到数据库，跳过重复数据，失败时回滚并退避重试"""
+        retry_count = 0
+        while True:
+            try:
+                logger.info("开始上传数据，艺人: %s, 数据量: %d", artist, len(shows))
+                new_count, skip_count = await AsyncUploadService.bulk_insert_shows(db, shows, artist)
+                with time_stage('commit'):
+                    await db.commit()
+                if new_count:
+                    show_query_cache.invalidate_artist(artist)
+                count_shows('new', new_count)
+                count_shows('skipped', skip_count)
+                logger.info("艺人 %s 数据上传完成: 新增 %d 条, 跳过 %d 条", artist, new_count, skip_count)
+                return True
+            except Exception as e:
+                logger.error("上传数据时发生错误: %s", e)
+                await db.rollback()
+                retry_count += 1
+                if retry_count >= max_retries:
+                    raise
+                await retry_backoff(retry_count, retry_delay)
+
+
+class AsyncShowWriter:
+    """
+    运行在事件循环上的批量写入器
+    爬虫工作线程通过 write_from_thread 提交批次并等待结果，每个批次临时从异步连接池取连接，
+    写完即归还，线程在等待浏览器渲染期间不占用数据库连接
+    """
+    def __init__(self, session_factory, loop: asyncio.AbstractEventLoop, max_concurrency: int = 5,
+                 max_retries: int = 3, retry_delay: float = 1):
+        """
+        :param session_factory: 异步会话工厂（async_database.get_async_sessionmaker()）
+        :param loop: 执行写入的事件循环，通常是 FastAPI 所在的循环
+        :param max_concurrency: 同时写入的批次数上限，不超过连接池大小
+        """
+        self.session_factory = session_factory
+        self.loop = loop
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def write(self, shows: list, artist: str, batch_size: int = None):
+        """写入并提交一个批次，返回 (新增数, 跳过数)"""
+        async with self._semaphore:
+            retry_count = 0
+            while True:
+                async with self.session_factory() as db:
+                    try:
+                        new_count, skip_count = await AsyncUploadService.bulk_insert_shows(
+                            db, shows, artist, batch_size
+                        )
+                        with time_stage('commit'):
+                            await db.commit()
+                        return new_count, skip_count
+                    except Exception as e:
+                        logger.error("写入批次失败: %s", e)
+                        await db.rollback()
+                        retry_count += 1
+                        if retry_count >= self.max_retries:
+                            raise
+                await retry_backoff(retry_count, self.retry_delay)
+
+    async def execute(self, operation):
+        """
+        用 AsyncSession.run_sync 在异步会话上执行同步写入函数 operation(db) 并提交，
+        sync 模式等复用 UploadService 同步实现的操作走这里
+        """
+        async with self._semaphore:
+            retry_count = 0
+            while True:
+                async with self.session_factory() as db:
+                    try:
+                        result = await db.run_sync(operation)
+                        with time_stage('commit'):
+                            await db.commit()
+                        return result
+                    except LeaseLostError:
+                        await db.rollback()
+                        raise
+                    except Exception as e:
+                        logger.error("写入批次失败: %s", e)
+                        await db.rollback()
+                        retry_count += 1
+                        if retry_count >= self.max_retries:
+                            raise
+                await retry_backoff(retry_count, self.retry_delay)
+
+    async def is_page_known(self, shows: list) -> bool:
+        async with self.session_factory() as db:
+            return await AsyncUploadService.is_page_known(db, shows)
+
+    def run_from_thread(self, coro, timeout: float = None):
+        """在工作线程中把协程交给事件循环执行并等待结果（不能在事件循环线程中调用）"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def write_from_thread(self, shows: list, artist: str, batch_size: int = None, timeout: float = None):
+        return self.run_from_thread(self.write(shows, artist, batch_size), timeout)
+
+    def execute_from_thread(self, operation, timeout: float = None):
+        return self.run_from_thread(self.execute(operation), timeout)
+
+    def is_page_known_from_thread(self, shows: list, timeout: float = None) -> bool:
+        return self.run_from_thread(self.is_page_known(shows), timeout)
@@ -0,0 +1,143 @@
+import os
+import socket
+import logging
+import threading
+from .task_queue import TaskQueue, LeaseLostError
+from .job_service import STATE_CRAWLING
+from ..metrics import QUEUE_TASKS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlWorker:
+    """
+    从共享任务队列领取艺人任务的 worker（一个进程内若干线程，见根目录 worker.py）
+    心跳线程定期为所有在处理的任务续约；进程退出或卡住时租约过期，任务由其他 worker 重新领取。
+    重复执行同一艺人是安全的：写库按 (name, date, city) 去重，已入库的演出只会被跳过或按内容更新；
+    每个批次在写入事务中确认仍持有租约（TaskQueue.check_lease），失去租约的 worker 不会与接手者同时写入
+    """
+    def __init__(self, queue: TaskQueue, runner, concurrency: int = 1, lease_seconds: float = 60,
+                 heartbeat_interval: float = None, poll_interval: float = 1.0, retry_delay: float = 30,
+                 worker_id: str = None):
+        """
+        :param runner: runner(artist, force, on_stage, on_cache, on_counts, profile, fence) -> bool，
+                       与 JobManager 相同，另外接收 fence(db)，在每个写库批次的事务中调用
+        :param lease_seconds: 租约时长，需明显大于心跳间隔
+        :param heartbeat_interval: 续约间隔，默认为租约时长的 1/3
+        :param poll_interval: 队列为空时的轮询间隔
+        :param retry_delay: 出错后重新入队的基础延迟，按尝试次数指数增长
+        """
+        self.queue = queue
+        self.runner = runner
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._active = {}
+        self._active_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._heartbeat_stop = threading.Event()
+        self._threads = []
+        self._heartbeat_thread = None
+        self.processed = 0
+
+    def start(self):
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f'crawl-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, name='crawl-worker-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+        logger.info("worker %s 已启动，并发 %d，租约 %ss", self.worker_id, self.concurrency, self.lease_seconds)
+
+    def stop(self, timeout: float = None):
+        """停止领取新任务，等待正在处理的任务完成；超时未完成的任务在租约过期后由其他 worker 接手"""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        # 处理中的任务结束后再停止续约
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(timeout)
+            self._heartbeat_thread = None
+        logger.info("worker %s 已停止，共处理 %d 个任务", self.worker_id, self.processed)
+
+    def _heartbeat(self):
+        while not self._heartbeat_stop.wait(self.heartbeat_interval):
+            with self._active_lock:
+                tasks = list(self._active.values())
+            try:
+                lost = self.queue.heartbeat(tasks, self.lease_seconds)
+            except Exception as e:
+                logger.error("任务续约失败: %s", e)
+                continue
+            for task in lost:
+                task.lost.set()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                task = self.queue.lease(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error("领取任务失败: %s", e)
+                task = None
+            if task is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+            with self._active_lock:
+                self._active[task.id] = task
+            try:
+                self._process(task)
+            finally:
+                with self._active_lock:
+                    self._active.pop(task.id, None)
+                self.processed += 1
+
+    def _process(self, task):
+        def on_stage(state):
+            if task.lost.is_set():
+                raise LeaseLostError(f"任务 {task.id} 的租约已失去")
+            self.queue.set_stage(task, state)
+
+        def on_cache(outcome):
+            self.queue.set_cache(task, outcome)
+
+        def on_counts(changes):
+            self.queue.set_changes(task, changes)
+
+        def fence(db):
+            if task.lost.is_set() or not self.queue.check_lease(db, task):
+                task.lost.set()
+                raise LeaseLostError(f"任务 {task.id} 的租约已失去")
+
+        try:
+            on_stage(STATE_CRAWLING)
+            success = self.runner(task.artist, force=task.force, on_stage=on_stage, on_cache=on_cache,
+                                  on_counts=on_counts, profile=task.profile, fence=fence)
+        except Exception as e:
+            # 租约失去后管道可能以其他异常结束，结果交给接手的 worker
+            if isinstance(e, LeaseLostError) or task.lost.is_set():
+                QUEUE_TASKS_TOTAL.inc('lease_lost')
+                logger.warning("任务 %s 的租约已失去，放弃处理", task)
+                return
+            # 异常（网络、数据库等）按尝试次数退避后重试；未找到演出属于正常结果，不重试
+            try:
+                if self.queue.retry(task, str(e), self.retry_delay * 2 ** (task.attempts - 1)):
+                    QUEUE_TASKS_TOTAL.inc('retried')
+                    logger.warning("艺人 %s 处理出错，稍后重试（第 %d 次）: %s", task.artist, task.attempts, e)
+                else:
+                    QUEUE_TASKS_TOTAL.inc('failed')
+            except Exception as record_error:
+                logger.error("记录任务状态失败: %s", record_error)
+            return
+        try:
+            if self.queue.complete(task, bool(success), "更新成功" if success else "更新失败"):
+                QUEUE_TASKS_TOTAL.inc('done' if success else 'failed')
+            else:
+                QUEUE_TASKS_TOTAL.inc('lease_lost')
+                logger.warning("任务 %s 完成时租约已失去，结果以接手的 worker 为准", task)
+        except Exception as e:
+            logger.error("记录任务状态失败: %s", e)
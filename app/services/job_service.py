@@ -0,0 +1,360 @@
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 单个艺人的处理状态
+STATE_QUEUED = 'queued'
+STATE_CRAWLING = 'crawling'
+STATE_PROCESSING = 'processing'
+STATE_UPLOADING = 'uploading'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+FINISHED_STATES = (STATE_DONE, STATE_FAILED)
+
+
+class JobStore:
+    """基于本地 SQLite 的任务表，进程重启后可以恢复未完成的任务"""
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('JOB_DB_PATH', os.path.join(os.getenv('DATA_SAVE_PATH', './data'), 'jobs.db'))
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_jobs (
+                    id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_job_artists (
+                    job_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    artist TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    success INTEGER,
+                    message TEXT,
+                    queued_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    stage_started_at REAL,
+                    timings TEXT NOT NULL DEFAULT '{}',
+                    PRIMARY KEY (job_id, position)
+                )
+            """)
+            self._ensure_column('crawl_jobs', 'force', 'INTEGER NOT NULL DEFAULT 0')
+            self._ensure_column('crawl_jobs', 'profile', 'TEXT')
+            self._ensure_column('crawl_job_artists', 'cache', 'TEXT')
+            self._ensure_column('crawl_job_artists', 'changes', 'TEXT')
+
+    def _ensure_column(self, table: str, column: str, ddl: str):
+        """为旧版本创建的任务表补充新增的列（需持有锁）"""
+        columns = [row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+    def create_job(self, artists: list, force: bool = False, profile: str = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            # 空任务直接视为已完成
+            self._conn.execute(
+                "INSERT INTO crawl_jobs (id, created_at, finished_at, force, profile) VALUES (?, ?, ?, ?, ?)",
+                (job_id, now, None if artists else now, int(force), profile)
+            )
+            self._conn.executemany(
+                "INSERT INTO crawl_job_artists (job_id, position, artist, state, queued_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, position, artist, STATE_QUEUED, now) for position, artist in enumerate(artists)]
+            )
+        return job_id
+
+    def set_stage(self, job_id: str, position: int, state: str):
+        """进入新阶段，并把上一阶段的耗时记入 timings"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT state, queued_at, started_at, stage_started_at, timings FROM crawl_job_artists "
+                "WHERE job_id = ? AND position = ?",
+                (job_id, position)
+            ).fetchone()
+            if row is None:
+                return
+            timings = json.loads(row['timings'])
+            previous_start = row['stage_started_at'] or row['queued_at']
+            timings[row['state']] = round(timings.get(row['state'], 0) + now - previous_start, 3)
+            self._conn.execute(
+                "UPDATE crawl_job_artists SET state = ?, started_at = ?, stage_started_at = ?, timings = ? "
+                "WHERE job_id = ? AND position = ?",
+                (state, row['started_at'] or now, now, json.dumps(timings), job_id, position)
+            )
+
+    def set_cache(self, job_id: str, position: int, outcome: str):
+        """记录该艺人的搜索缓存结果（hit/miss/coalesced/bypass）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE crawl_job_artists SET cache = ? WHERE job_id = ? AND position = ?",
+                (outcome, job_id, position)
+            )
+
+    def set_changes(self, job_id: str, position: int, changes: dict):
+        """记录该艺人的写入计数（inserted/updated/unchanged/removed 等）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE crawl_job_artists SET changes = ? WHERE job_id = ? AND position = ?",
+                (json.dumps(changes), job_id, position)
+            )
+
+    def finish_artist(self, job_id: str, position: int, success: bool, message: str):
+        self.set_stage(job_id, position, STATE_DONE if success else STATE_FAILED)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE crawl_job_artists SET success = ?, message = ?, finished_at = ? WHERE job_id = ? AND position = ?",
+                (int(success), message, now, job_id, position)
+            )
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM crawl_job_artists WHERE job_id = ? AND state NOT IN (?, ?)",
+                (job_id, *FINISHED_STATES)
+            ).fetchone()[0]
+            if pending == 0:
+                self._conn.execute("UPDATE crawl_jobs SET finished_at = ? WHERE id = ?", (now, job_id))
+        return pending == 0
+
+    def requeue_unfinished(self) -> list:
+        """将上次运行中未完成的艺人重置为 queued，返回 (job_id, position, artist, force, profile) 列表"""
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT a.job_id, a.position, a.artist, j.force, j.profile FROM crawl_job_artists a "
+                "JOIN crawl_jobs j ON j.id = a.job_id WHERE a.state NOT IN (?, ?) "
+                "ORDER BY a.queued_at, a.position",
+                FINISHED_STATES
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE crawl_job_artists SET state = ?, stage_started_at = ? WHERE state NOT IN (?, ?)",
+                (STATE_QUEUED, now, *FINISHED_STATES)
+            )
+        return [(row['job_id'], row['position'], row['artist'], bool(row['force']), row['profile']) for row in rows]
+
+    @staticmethod
+    def _format_time(value):
+        return datetime.fromtimestamp(value).isoformat() if value else None
+
+    def get_job(self, job_id: str):
+        with self._lock:
+            job = self._conn.execute("SELECT * FROM crawl_jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT * FROM crawl_job_artists WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+        artists = []
+        for row in rows:
+            artists.append({
+                "artist": row['artist'],
+                "state": row['state'],
+                "success": None if row['success'] is None else bool(row['success']),
+                "message": row['message'],
+                "cache": row['cache'],
+                "changes": json.loads(row['changes']) if row['changes'] else None,
+                "queued_at": self._format_time(row['queued_at']),
+                "started_at": self._format_time(row['started_at']),
+                "finished_at": self._format_time(row['finished_at']),
+                "timings": json.loads(row['timings'])
+            })
+        counts = {}
+        cache = {}
+        for artist in artists:
+            counts[artist['state']] = counts.get(artist['state'], 0) + 1
+            if artist['cache']:
+                cache[artist['cache']] = cache.get(artist['cache'], 0) + 1
+        return {
+            "job_id": job['id'],
+            "status": "finished" if job['finished_at'] else "running",
+            "created_at": self._format_time(job['created_at']),
+            "finished_at": self._format_time(job['finished_at']),
+            "force": bool(job['force']),
+            "profile": job['profile'],
+            "counts": counts,
+            "cache": cache,
+            "artists": artists
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """进程内的爬取任务队列，由固定数量的工作线程处理"""
+    def __init__(self, store: JobStore, runner, workers: int = 4):
+        """
+        :param runner: runner(artist, force, on_stage, on_cache, on_counts, profile) -> bool，阻塞地完成单个艺人的更新
+        :param workers: 工作线程数
+        """
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._threads = []
+        self._stopping = False
+        # 有任务完成时通知所有等待者，等待者重新检查自己的任务状态；不按任务保存状态，没有人等待的任务不占内存
+        self._finished = threading.Condition()
+
+    def start(self):
+        """启动工作线程，并恢复上次未完成的任务"""
+        recovered = self.store.requeue_unfinished()
+        if recovered:
+            logger.info(f"恢复 {len(recovered)} 个未完成的艺人任务")
+        for task in recovered:
+            self._queue.put(task)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'crawl-job-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = None):
+        """停止工作线程，正在处理的艺人会先完成，排队中的艺人留待下次启动恢复"""
+        self._stopping = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, artists: list, force: bool = False, profile: str = None) -> str:
+        """
+        提交任务，立即返回任务 id
+        :param force: 为 True 时跳过搜索结果缓存
+        :param profile: 浏览器配置（default/lean），为空时使用 CRAWLER_BROWSER_PROFILE
+        """
+        job_id = self.store.create_job(artists, force, profile)
+        for position, artist in enumerate(artists):
+            self._queue.put((job_id, position, artist, force, profile))
+        logger.info(f"任务 {job_id} 已提交，共 {len(artists)} 个艺人")
+        return job_id
+
+    def get(self, job_id: str):
+        return self.store.get_job(job_id)
+
+    def wait(self, job_id: str, timeout: float = None) -> bool:
+        """阻塞等待任务完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # 持有条件锁检查状态，工作线程在写入完成状态之后才能通知，不会错过通知
+        with self._finished:
+            while True:
+                job = self.store.get_job(job_id)
+                if job is None:
+                    return False
+                if job['status'] == 'finished':
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._finished.wait(remaining)
+
+    def close(self):
+        self.store.close()
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            if task is None or self._stopping:
+                return
+            job_id, position, artist, force, profile = task
+
+            def on_stage(state, job_id=job_id, position=position):
+                self.store.set_stage(job_id, position, state)
+
+            def on_cache(outcome, job_id=job_id, position=position):
+                self.store.set_cache(job_id, position, outcome)
+
+            def on_counts(changes, job_id=job_id, position=position):
+                self.store.set_changes(job_id, position, changes)
+
+            try:
+                on_stage(STATE_CRAWLING)
+                success = self.runner(artist, force=force, on_stage=on_stage, on_cache=on_cache, on_counts=on_counts,
+                                      profile=profile)
+                message = "更新成功" if success else "更新失败"
+            except Exception as e:
+                success = False
+                message = str(e)
+            try:
+                if self.store.finish_artist(job_id, position, bool(success), message):
+                    logger.info(f"任务 {job_id} 已完成")
+                    with self._finished:
+                        self._finished.notify_all()
+            except Exception as e:
+                logger.error(f"记录任务状态失败: {str(e)}")
+
+
+class QueueJobManager:
+    """
+    只入队的任务管理器（CRAWLER_QUEUE=shared）：艺人任务写入共享队列，由 worker.py 进程领取执行，
+    接口与 JobManager 相同
+    """
+    def __init__(self, task_queue, poll_interval: float = 0.5, max_empty_jobs: int = 1000):
+        self.queue = task_queue
+        self.poll_interval = poll_interval
+        # 空任务不写入队列，直接视为已完成；只保留最近 max_empty_jobs 个，更早的查询时返回 None
+        self.max_empty_jobs = max_empty_jobs
+        self._empty_jobs = OrderedDict()
+        self._empty_lock = threading.Lock()
+
+    def start(self):
+        self.queue.init()
+
+    def stop(self, timeout: float = None):
+        pass
+
+    def close(self):
+        self.queue.close()
+
+    def submit(self, artists: list, force: bool = False, profile: str = None) -> str:
+        job_id = uuid.uuid4().hex
+        if not artists:
+            now = datetime.now().isoformat()
+            with self._empty_lock:
+                self._empty_jobs[job_id] = {
+                    "job_id": job_id, "status": "finished", "created_at": now, "finished_at": now,
+                    "force": force, "profile": profile, "counts": {}, "cache": {}, "artists": []
+                }
+                while len(self._empty_jobs) > self.max_empty_jobs:
+                    self._empty_jobs.popitem(last=False)
+            return job_id
+        self.queue.enqueue(job_id, artists, force, profile)
+        logger.info(f"任务 {job_id} 已入队，共 {len(artists)} 个艺人")
+        return job_id
+
+    def get(self, job_id: str):
+        with self._empty_lock:
+            job = self._empty_jobs.get(job_id)
+        if job is not None:
+            return job
+        return self.queue.get_job(job_id)
+
+    def wait(self, job_id: str, timeout: float = None) -> bool:
+        """轮询队列直到任务完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return False
+            if job['status'] == 'finished':
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
@@ -0,0 +1,178 @@
+import os
+import time
+import queue
+import logging
+import threading
+from .upload_service import ShowBatchWriter
+from .job_service import STATE_PROCESSING, STATE_UPLOADING
+from .snapshot_archive import get_snapshot_archive
+from ..metrics import observe_stage, count_shows
+
+logger = logging.getLogger(__name__)
+
+# 队列中的控制标记
+_PAGE_END = object()
+_END = object()
+
+
+class ShowPipeline:
+    """
+    爬虫 → 详情页补全（可选）→ 日期拆分 → 批量写库 的流式管道
+    爬虫在生产者线程中逐页抓取，经有界队列交给当前线程逐条拆分日期并按批写入，
+    队列满时爬虫阻塞等待，内存占用与演出总数无关
+    """
+    def __init__(self, pages, processor, db, artist: str, buffer_size: int = None,
+                 batch_size: int = None, stop_page=None, on_stage=None, raw_log: bool = True,
+                 collect: bool = False, async_writer=None, mode: str = None, mark_removed: bool = False,
+                 enricher=None, fence=None):
+        """
+        :param pages: 逐页产出原始演出信息列表的可迭代对象（如 DamaiCrawler.iter_search_pages）
+        :param stop_page: stop_page(page) -> bool，在生产者线程中调用，返回 True 时处理完本页后停止翻页
+        :param on_stage: 阶段回调，收到第一条数据时进入 processing，第一次写库时进入 uploading
+        :param raw_log: 是否把每页原始数据写入快照归档（见 snapshot_archive）
+        :param collect: 是否保留全部原始演出信息（供搜索缓存使用，数量受翻页上限约束）
+        :param async_writer: 可选的 AsyncShowWriter，设置后批次经异步数据库层写入，db 可为 None
+        :param mode: 写入模式 insert/sync（见 upload_service.UPLOAD_MODE）
+        :param mark_removed: sync 模式下抓取完整结束后标记消失的演出：pages 的 complete 属性为 True
+                             （取完了全部结果页，见 crawler/http_spider.SearchPages）且没有提前停止翻页，
+                             没有 complete 属性的 pages 视为不完整
+        :param enricher: 可选的 DetailEnricher，在生产者线程中逐页并发抓取详情页，按实际场次拆分日期
+        :param fence: 可选的 fence(db)，每个批次提交前在同一事务中确认仍可写入（见 ShowBatchWriter）
+        """
+        self.pages = pages
+        self.processor = processor
+        self.db = db
+        self.artist = artist
+        self.buffer_size = buffer_size or int(os.getenv('PIPELINE_BUFFER_SIZE', '100'))
+        self.writer = ShowBatchWriter(
+            db, artist, batch_size or int(os.getenv('PIPELINE_BATCH_SIZE', '200')),
+            async_writer=async_writer, mode=mode, fence=fence
+        )
+        self.mark_removed = mark_removed
+        self.enricher = enricher
+        self.enriched = 0
+        self.stopped_early = False
+        self.complete = False
+        self.stop_page = stop_page
+        self.on_stage = on_stage or (lambda state: None)
+        self.archive = get_snapshot_archive() if raw_log else None
+        self.started_at = time.time()
+        self._page_items = []
+        self._page_no = 0
+        self.collected = [] if collect else None
+        self.found = 0
+        self.expanded = 0
+
+        self._reported = (0, 0)
+        self._queue = queue.Queue(maxsize=self.buffer_size)
+        self._cancelled = threading.Event()
+        self._error = None
+
+    def _put(self, item) -> bool:
+        """放入队列，消费者已退出时返回 False"""
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for page in self.pages:
+                # 详情页在爬虫线程中抓取，与上一页的写库重叠
+                if self.enricher is not None:
+                    self.enriched += self.enricher.enrich(page)
+                # 在本页写入数据库之前判断，避免把本次写入的数据当成已存在
+                stop = self.stop_page is not None and self.stop_page(page)
+                for show_data in page:
+                    if not self._put(show_data):
+                        return
+                if not self._put(_PAGE_END):
+                    return
+                if stop:
+                    self.stopped_early = True
+                    logger.info("艺人 %s 的本页演出均已入库或已过期，停止翻页", self.artist)
+                    break
+        except Exception as e:
+            self._error = e
+        finally:
+            # 提前结束时关闭生成器，让爬虫及时归还浏览器
+            close = getattr(self.pages, 'close', None)
+            if close is not None:
+                close()
+            # 与数据一样等待队列有空位，消费者写库较慢时也不能丢失结束标记，否则 run() 会一直阻塞
+            self._put(_END)
+
+    def _report_page(self, processing_time: float):
+        """记录一页的日期拆分耗时和新增的 found/expanded 计数"""
+        observe_stage('date_processing', processing_time)
+        count_shows('found', self.found - self._reported[0])
+        count_shows('expanded', self.expanded - self._reported[1])
+        self._reported = (self.found, self.expanded)
+
+    def _archive_page(self):
+        """把一页原始数据交给归档的后台线程，同一次运行的各页共用 started_at 时间戳"""
+        self._page_no += 1
+        if self.archive is not None and self._page_items:
+            self.archive.write(self.artist, self._page_items, source='pipeline',
+                               page=self._page_no, timestamp=self.started_at)
+        self._page_items = []
+
+    def run(self) -> dict:
+        """运行管道直到爬虫结束，返回各阶段计数"""
+        producer = threading.Thread(target=self._produce, name=f'pipeline-{self.artist}', daemon=True)
+        producer.start()
+        stage = None
+        page_processing = 0.0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    break
+                if item is _PAGE_END:
+                    self._report_page(page_processing)
+                    page_processing = 0.0
+                    self._archive_page()
+                    # 每页结束时写入已积累的数据，使数据尽早入库
+                    if self.writer.pending and stage != STATE_UPLOADING:
+                        stage = STATE_UPLOADING
+                        self.on_stage(stage)
+                    self.writer.flush()
+                    continue
+                if stage is None:
+                    stage = STATE_PROCESSING
+                    self.on_stage(stage)
+                self.found += 1
+                if self.archive is not None:
+                    self._page_items.append(item)
+                if self.collected is not None:
+                    self.collected.append(item)
+                # 日期拆分耗时和计数按页累计后记录一次，避免逐条记录指标的开销
+                started = time.perf_counter()
+                show_days = list(self.processor.iter_date_range((item,)))
+                page_processing += time.perf_counter() - started
+                self.expanded += len(show_days)
+                for show_data in show_days:
+                    self.writer.add(show_data)
+            self.writer.flush()
+            # 受翻页上限截断、某页出错被爬虫跳过的抓取都不完整，未抓到的页面上的演出不能当作已消失
+            self.complete = (self._error is None and not self.stopped_early
+                             and getattr(self.pages, 'complete', False))
+            if self.mark_removed and self.found and self.complete:
+                self.writer.mark_removed()
+        finally:
+            self._cancelled.set()
+            producer.join()
+        if self._error is not None:
+            raise self._error
+        result = {
+            'found': self.found,
+            'expanded': self.expanded,
+            'enriched': self.enriched,
+            **self.writer.get_counts(),
+            'batches': self.writer.batches
+        }
+        logger.info("艺人 %s 管道完成: %s", self.artist, result)
+        return result
@@ -0,0 +1,461 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from datetime import date
+from sqlalchemy import select, update, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from ..models.artist_schedule import ArtistSchedule
+from ..models.show import Show
+from ..models.show_record import parse_show_dates
+from .upload_service import CONTENT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600.0
+DAY = 86400.0
+
+RECRAWL_SCHEDULER_ENABLED = os.getenv('RECRAWL_SCHEDULER', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+# 写入计数中代表内容变化的部分
+CHANGE_KEYS = ('inserted', 'updated', 'removed')
+
+
+def count_changes(counts: dict) -> int:
+    return sum(counts.get(key, 0) for key in CHANGE_KEYS)
+
+
+class RecrawlPolicy:
+    """
+    下次抓取间隔：
+      活跃度  max_interval / (1 + activity_weight * 变化率)，变化率为每次抓取变化数的指数加权平均
+      临近度  最近一场演出在 proximity_days 天内时，间隔不超过距开演时间的 proximity_fraction
+    结果限制在 [min_interval, max_interval]；抓取出错时 min_interval 后重试
+    """
+    def __init__(self, min_interval: float = None, max_interval: float = None, alpha: float = None,
+                 activity_weight: float = None, proximity_days: int = None, proximity_fraction: float = None,
+                 initial_rate: float = None):
+        self.min_interval = min_interval if min_interval is not None else float(
+            os.getenv('RECRAWL_MIN_INTERVAL_HOURS', '6')
+        ) * HOUR
+        self.max_interval = max_interval if max_interval is not None else float(
+            os.getenv('RECRAWL_MAX_INTERVAL_HOURS', '72')
+        ) * HOUR
+        self.alpha = alpha if alpha is not None else float(os.getenv('RECRAWL_CHANGE_ALPHA', '0.5'))
+        self.activity_weight = activity_weight if activity_weight is not None else float(
+            os.getenv('RECRAWL_ACTIVITY_WEIGHT', '1')
+        )
+        self.proximity_days = proximity_days if proximity_days is not None else int(
+            os.getenv('RECRAWL_PROXIMITY_DAYS', '30')
+        )
+        self.proximity_fraction = proximity_fraction if proximity_fraction is not None else float(
+            os.getenv('RECRAWL_PROXIMITY_FRACTION', '0.25')
+        )
+        # 首次抓取的新增全部来自初次入库，不代表活跃度，变化率取该初始值
+        self.initial_rate = initial_rate if initial_rate is not None else 1.0
+
+    def update_rate(self, rate: float, changes: int, crawls: int) -> float:
+        if crawls == 0:
+            return self.initial_rate
+        return self.alpha * changes + (1 - self.alpha) * rate
+
+    def interval(self, change_rate: float, next_show_date, today: date) -> float:
+        interval = self.max_interval / (1 + self.activity_weight * change_rate)
+        if next_show_date is not None:
+            days = (next_show_date - today).days
+            if 0 <= days <= self.proximity_days:
+                interval = min(interval, days * DAY * self.proximity_fraction)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+
+class CrawlBudget:
+    """全局每小时抓取数上限：额度按时间累积，最多累积 burst 次"""
+    def __init__(self, crawls_per_hour: float, burst: float = None, now: float = None):
+        self.crawls_per_hour = crawls_per_hour
+        self.burst = burst if burst is not None else max(1.0, crawls_per_hour / 12)
+        self.tokens = self.burst
+        self.updated_at = now if now is not None else time.time()
+
+    def available(self, now: float) -> int:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.crawls_per_hour / HOUR)
+        self.updated_at = now
+        return int(self.tokens)
+
+    def spend(self, count: int):
+        self.tokens -= count
+
+
+def apply_crawl(entry: ArtistSchedule, changes: int, success: bool, next_show_date, now: float,
+                policy: RecrawlPolicy):
+    """把一次抓取结果记入艺人的调度状态并计算下次到期时间（在线调度与模拟共用）"""
+    crawls = entry.crawls or 0
+    if success:
+        entry.change_rate = policy.update_rate(entry.change_rate or 0.0, changes, crawls)
+        entry.next_show_date = next_show_date
+        entry.interval_seconds = policy.interval(entry.change_rate, next_show_date, date.fromtimestamp(now))
+        entry.last_changes = changes
+    else:
+        entry.interval_seconds = policy.min_interval
+    entry.crawls = crawls + 1
+    entry.last_crawled_at = now
+    entry.last_success = int(success)
+    entry.next_due_at = now + entry.interval_seconds
+    entry.dispatched_at = None
+
+
+def overdue_ratio(entry: ArtistSchedule, now: float, policy: RecrawlPolicy) -> float:
+    # min_interval 可以配置为 0，按至少 1 秒计算超期比例
+    return (now - entry.next_due_at) / max(entry.interval_seconds or policy.min_interval, 1.0)
+
+
+def pick_due(entries, now: float, limit: int, policy: RecrawlPolicy) -> list:
+    """到期的艺人按逾期程度（逾期时长 / 抓取间隔）从高到低取前 limit 个"""
+    due = [entry for entry in entries if entry.next_due_at <= now]
+    due.sort(key=lambda entry: (-overdue_ratio(entry, now, policy), entry.next_due_at))
+    return due[:limit]
+
+
+class RecrawlScheduler:
+    """
+    自适应重新抓取：artist_schedules 表记录每个艺人的抓取历史和下次到期时间，
+    后台线程按全局预算把到期的艺人提交为爬取任务；抓取完成后由 record 更新到期时间。
+    多个 API 进程同时运行时，以带条件的 UPDATE 认领艺人，同一艺人不会被重复提交
+    """
+    def __init__(self, engine=None, policy: RecrawlPolicy = None, crawls_per_hour: float = None,
+                 tick_seconds: float = None, dispatch_timeout: float = None):
+        if engine is None:
+            from ..config.database import get_engine
+            engine = get_engine()
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        self.policy = policy or RecrawlPolicy()
+        self.budget = CrawlBudget(
+            crawls_per_hour if crawls_per_hour is not None else float(os.getenv('RECRAWL_CRAWLS_PER_HOUR', '120'))
+        )
+        self.tick_seconds = tick_seconds if tick_seconds is not None else float(os.getenv('RECRAWL_TICK_SECONDS', '60'))
+        # 提交后超过该时间仍未记录结果（任务丢失）时重新提交
+        self.dispatch_timeout = dispatch_timeout if dispatch_timeout is not None else float(
+            os.getenv('RECRAWL_DISPATCH_TIMEOUT_HOURS', '2')
+        ) * HOUR
+        self.dispatched = 0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def init(self):
+        ArtistSchedule.__table__.create(self.engine, checkfirst=True)
+
+    def add_artists(self, artists: list, now: float = None) -> int:
+        """登记新艺人，立即到期；已登记的艺人不变，返回新增数量"""
+        now = now if now is not None else time.time()
+        added = 0
+        for artist in dict.fromkeys(artists):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(ArtistSchedule), [{
+                        'artist': artist, 'crawls': 0, 'change_rate': 0.0, 'next_due_at': now, 'created_at': now
+                    }])
+                added += 1
+            except IntegrityError:
+                pass
+        return added
+
+    def import_known_artists(self) -> int:
+        """把 shows 表中已有的艺人登记到调度表"""
+        with self.Session() as db:
+            artists = db.execute(
+                select(Show.artist).where(Show.artist.is_not(None)).distinct()
+            ).scalars().all()
+            known = set(db.execute(select(ArtistSchedule.artist)).scalars().all())
+        added = self.add_artists([artist for artist in artists if artist not in known])
+        if added:
+            logger.info("调度表登记 %d 个已有艺人", added)
+        return added
+
+    @staticmethod
+    def next_show_date(db, artist: str, today: date = None):
+        """该艺人最近一场未开始且未下架的演出日期"""
+        return db.execute(
+            select(func.min(Show.date)).where(
+                (Show.artist == artist) & (Show.date >= (today or date.today())) & Show.removed_at.is_(None)
+            )
+        ).scalar()
+
+    def record(self, artist: str, counts: dict, success: bool = True, now: float = None):
+        """记录一次抓取结果（手动提交和调度提交的抓取都会记录），未登记的艺人自动登记"""
+        now = now if now is not None else time.time()
+        with self.Session() as db, db.begin():
+            entry = db.execute(select(ArtistSchedule).where(ArtistSchedule.artist == artist)).scalar_one_or_none()
+            if entry is None:
+                entry = ArtistSchedule(artist=artist, crawls=0, change_rate=0.0, next_due_at=now, created_at=now)
+                db.add(entry)
+            next_show = self.next_show_date(db, artist, date.fromtimestamp(now)) if success else None
+            apply_crawl(entry, count_changes(counts), success, next_show, now, self.policy)
+        logger.debug("艺人 %s 下次抓取间隔 %.1f 小时", artist, entry.interval_seconds / HOUR)
+
+    def tick(self, submit, now: float = None) -> list:
+        """按预算提交到期的艺人，返回本次提交的艺人"""
+        now = now if now is not None else time.time()
+        available = self.budget.available(now)
+        if available <= 0:
+            return []
+        stale = now - self.dispatch_timeout
+        with self.Session() as db:
+            candidates = db.execute(
+                select(ArtistSchedule).where(
+                    (ArtistSchedule.next_due_at <= now)
+                    & (ArtistSchedule.dispatched_at.is_(None) | (ArtistSchedule.dispatched_at < stale))
+                ).order_by(ArtistSchedule.next_due_at).limit(available * 10)
+            ).scalars().all()
+        claimed = []
+        for entry in pick_due(candidates, now, available, self.policy):
+            with self.Session() as db, db.begin():
+                owned = db.execute(
+                    update(ArtistSchedule).where(
+                        (ArtistSchedule.id == entry.id)
+                        & (ArtistSchedule.dispatched_at.is_(None) | (ArtistSchedule.dispatched_at < stale))
+                    ).values(dispatched_at=now).execution_options(synchronize_session=False)
+                ).rowcount
+            if owned:
+                claimed.append(entry.artist)
+        if not claimed:
+            return []
+        try:
+            submit(claimed)
+        except Exception:
+            with self.Session() as db, db.begin():
+                db.execute(update(ArtistSchedule).where(ArtistSchedule.artist.in_(claimed))
+                           .values(dispatched_at=None).execution_options(synchronize_session=False))
+            raise
+        self.budget.spend(len(claimed))
+        self.dispatched += len(claimed)
+        logger.info("调度提交 %d 个到期艺人", len(claimed))
+        return claimed
+
+    def start(self, submit):
+        """启动后台调度线程，submit(artists) 提交爬取任务"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, args=(submit,), name='recrawl-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self, submit):
+        while not self._stopping.is_set():
+            try:
+                self.tick(submit)
+            except Exception as e:
+                logger.error("调度提交失败: %s", e)
+            self._stopping.wait(self.tick_seconds)
+
+    @staticmethod
+    def _to_dict(entry: ArtistSchedule) -> dict:
+        return {
+            'artist': entry.artist,
+            'crawls': entry.crawls,
+            'last_crawled_at': entry.last_crawled_at,
+            'last_success': None if entry.last_success is None else bool(entry.last_success),
+            'last_changes': entry.last_changes,
+            'change_rate': round(entry.change_rate or 0.0, 3),
+            'next_show_date': entry.next_show_date.isoformat() if entry.next_show_date else None,
+            'interval_hours': round(entry.interval_seconds / HOUR, 2) if entry.interval_seconds else None,
+            'next_due_at': entry.next_due_at,
+            'dispatched': entry.dispatched_at is not None
+        }
+
+    def list_artists(self, limit: int = 100) -> list:
+        """按下次到期时间排序的艺人调度状态"""
+        with self.Session() as db:
+            entries = db.execute(
+                select(ArtistSchedule).order_by(ArtistSchedule.next_due_at).limit(limit)
+            ).scalars().all()
+        return [self._to_dict(entry) for entry in entries]
+
+    def get_stats(self, now: float = None) -> dict:
+        now = now if now is not None else time.time()
+        with self.Session() as db:
+            total = db.execute(select(func.count()).select_from(ArtistSchedule)).scalar()
+            due = db.execute(
+                select(func.count()).select_from(ArtistSchedule).where(ArtistSchedule.next_due_at <= now)
+            ).scalar()
+            in_flight = db.execute(
+                select(func.count()).select_from(ArtistSchedule).where(ArtistSchedule.dispatched_at.is_not(None))
+            ).scalar()
+            average_interval = db.execute(select(func.avg(ArtistSchedule.interval_seconds))).scalar()
+        return {
+            'artists': total,
+            'due': due,
+            'in_flight': in_flight,
+            'dispatched': self.dispatched,
+            'crawls_per_hour': self.budget.crawls_per_hour,
+            'average_interval_hours': round(average_interval / HOUR, 2) if average_interval else None,
+            # 所有艺人按当前间隔抓取时每小时的抓取数
+            'planned_crawls_per_hour': round(self._planned_rate(), 2)
+        }
+
+    def _planned_rate(self) -> float:
+        with self.Session() as db:
+            intervals = db.execute(
+                select(ArtistSchedule.interval_seconds).where(ArtistSchedule.interval_seconds.is_not(None))
+            ).scalars().all()
+        return sum(HOUR / interval for interval in intervals)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_recrawl_scheduler() -> RecrawlScheduler:
+    """进程级的调度器，首次使用时创建"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RecrawlScheduler()
+            _scheduler.init()
+        return _scheduler
+
+
+def record_crawl(artist: str, counts: dict, success: bool = True):
+    """开启调度（RECRAWL_SCHEDULER）时记录抓取结果，失败只记日志，不影响抓取本身"""
+    if not RECRAWL_SCHEDULER_ENABLED:
+        return
+    try:
+        get_recrawl_scheduler().record(artist, counts, success)
+    except Exception as e:
+        logger.warning("记录艺人 %s 的抓取历史失败: %s", artist, e)
+
+
+# 模拟：用抓取历史（快照归档或合成数据）回放，比较固定周期与自适应调度的抓取次数和发现变化的延迟
+
+def show_state(shows: list) -> dict:
+    """一次抓取结果的状态：(name, date, city) -> 可变字段"""
+    return {
+        (show.get('name'), show.get('date'), show.get('city')):
+            '\x1f'.join(str(show.get(field) or '') for field in CONTENT_FIELDS)
+        for show in shows
+    }
+
+
+def diff_states(old: dict, new: dict) -> int:
+    """两次抓取之间新增、内容变化和消失的演出数"""
+    changed = sum(1 for key, content in new.items() if old.get(key) != content)
+    return changed + sum(1 for key in old if key not in new)
+
+
+def nearest_show_date(shows: list, today: date):
+    nearest = None
+    for show in shows:
+        try:
+            start, end, _ = parse_show_dates(show.get('date'))
+        except ValueError:
+            continue
+        if end >= today:
+            start = max(start, today)
+            nearest = start if nearest is None else min(nearest, start)
+    return nearest
+
+
+def _quantile(values: list, quantile: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(quantile * len(values)))]
+
+
+def simulate(histories: dict, policy: RecrawlPolicy = None, crawls_per_hour: float = 120,
+             tick_seconds: float = 300) -> dict:
+    """
+    回放抓取历史：histories 为 {艺人: [(时间戳, 演出列表), ...]}，每条记录是原固定周期抓取的一次结果，
+    视为该时刻起的真实状态。自适应调度在同一时间段内按预算抓取，统计：
+      - 抓取次数及其中没有发现任何变化的比例（原周期抓取 vs 自适应）
+      - 历史中每次变化到被自适应调度发现的延迟
+    """
+    policy = policy or RecrawlPolicy()
+    timelines = {}
+    times = {}
+    events = []
+    baseline_crawls = baseline_empty = 0
+    for artist, records in histories.items():
+        records = sorted(records, key=lambda record: record[0])
+        if not records:
+            continue
+        states = [(timestamp, show_state(shows), shows) for timestamp, shows in records]
+        timelines[artist] = states
+        times[artist] = [timestamp for timestamp, _, _ in states]
+        baseline_crawls += len(states)
+        for (_, previous, _), (timestamp, state, _) in zip(states, states[1:]):
+            changes = diff_states(previous, state)
+            if changes:
+                events.append((artist, timestamp))
+            else:
+                baseline_empty += 1
+    if not timelines:
+        return {'artists': 0}
+
+    start = min(states[0][0] for states in timelines.values())
+    end = max(states[-1][0] for states in timelines.values())
+    entries = {
+        artist: ArtistSchedule(artist=artist, crawls=0, change_rate=0.0, next_due_at=states[0][0],
+                               created_at=states[0][0])
+        for artist, states in timelines.items()
+    }
+    pending = {}
+    for artist, timestamp in events:
+        pending.setdefault(artist, []).append(timestamp)
+    seen = {}
+    budget = CrawlBudget(crawls_per_hour, now=start)
+    crawls = empty = 0
+    delays = []
+    hourly = {}
+    now = start
+    while now <= end:
+        for entry in pick_due(entries.values(), now, budget.available(now), policy):
+            states = timelines[entry.artist]
+            _, state, shows = states[bisect.bisect_right(times[entry.artist], now) - 1]
+            changes = diff_states(seen[entry.artist], state) if entry.artist in seen else len(state)
+            if entry.artist in seen and not changes:
+                empty += 1
+            seen[entry.artist] = state
+            for timestamp in pending.get(entry.artist, []):
+                if timestamp <= now:
+                    delays.append(now - timestamp)
+            pending[entry.artist] = [timestamp for timestamp in pending.get(entry.artist, []) if timestamp > now]
+            apply_crawl(entry, changes, True, nearest_show_date(shows, date.fromtimestamp(now)), now, policy)
+            budget.spend(1)
+            crawls += 1
+            hour = int((now - start) // HOUR)
+            hourly[hour] = hourly.get(hour, 0) + 1
+        now += tick_seconds
+    undetected = sum(len(timestamps) for timestamps in pending.values())
+
+    def hours(value):
+        return None if value is None else round(value / HOUR, 2)
+
+    return {
+        'artists': len(timelines),
+        'days': round((end - start) / DAY, 1),
+        'crawls_per_hour_budget': crawls_per_hour,
+        'baseline': {
+            'crawls': baseline_crawls,
+            'empty_crawls_pct': round(100 * baseline_empty / max(1, baseline_crawls - len(timelines)), 1)
+        },
+        'adaptive': {
+            'crawls': crawls,
+            'empty_crawls_pct': round(100 * empty / max(1, crawls - len(timelines)), 1),
+            'max_crawls_in_hour': max(hourly.values()) if hourly else 0
+        },
+        'crawls_saved_pct': round(100 * (1 - crawls / baseline_crawls), 1) if baseline_crawls else 0,
+        'change_events': len(events),
+        'detection_delay_hours': {
+            'mean': hours(sum(delays) / len(delays)) if delays else None,
+            'p50': hours(_quantile(delays, 0.5)),
+            'p95': hours(_quantile(delays, 0.95)),
+            # 历史结束时仍未被发现的变化
+            'undetected': undetected
+        }
+    }
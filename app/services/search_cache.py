@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# get_or_fetch 返回的缓存结果类型
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+CACHE_COALESCED = 'coalesced'
+CACHE_BYPASS = 'bypass'
+
+
+class _InFlight:
+    """正在进行中的一次抓取，等待者共享其结果"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SearchCache:
+    """
+    艺人搜索结果缓存：内存 LRU + 磁盘两级，带 TTL；
+    同一艺人的并发请求只触发一次抓取（single-flight）
+    """
+    def __init__(self, ttl: float = None, max_entries: int = None, disk_path: str = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('SEARCH_CACHE_TTL', '600'))
+        self.max_entries = max_entries or int(os.getenv('SEARCH_CACHE_SIZE', '256'))
+        self.disk_path = disk_path if disk_path is not None else os.getenv(
+            'SEARCH_CACHE_DIR', os.path.join(os.getenv('DATA_SAVE_PATH', './data'), 'search_cache')
+        )
+        self._memory = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {CACHE_HIT: 0, CACHE_MISS: 0, CACHE_COALESCED: 0, CACHE_BYPASS: 0}
+
+    @staticmethod
+    def normalize_key(artist: str) -> str:
+        """规范化艺人名：全半角统一、去除多余空白、忽略大小写"""
+        return ' '.join(unicodedata.normalize('NFKC', artist).split()).casefold()
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_disk(self, key: str):
+        if not self.disk_path:
+            return None
+        try:
+            with open(self._disk_file(key), encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry['fetched_at'], entry['value']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取磁盘缓存失败: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, fetched_at: float, value):
+        if not self.disk_path:
+            return
+        try:
+            os.makedirs(self.disk_path, exist_ok=True)
+            path = self._disk_file(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'fetched_at': fetched_at, 'value': value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入磁盘缓存失败: {str(e)}")
+
+    def _remember(self, key: str, fetched_at: float, value):
+        """写入内存 LRU，超出容量时淘汰最久未用的条目（需持有锁）"""
+        self._memory[key] = (fetched_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, artist: str):
+        """读取未过期的缓存，不存在时返回 None"""
+        key = self.normalize_key(artist)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+        entry = self._read_disk(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            with self._lock:
+                self._remember(key, *entry)
+            return entry[1]
+        return None
+
+    def put(self, artist: str, value):
+        key = self.normalize_key(artist)
+        fetched_at = time.time()
+        with self._lock:
+            self._remember(key, fetched_at, value)
+        self._write_disk(key, fetched_at, value)
+
+    def get_or_fetch(self, artist: str, fetch, force: bool = False, cacheable=None):
+        """
+        返回 (结果, 缓存结果类型)
+        :param fetch: 无参可调用对象，缓存未命中时执行；返回空结果时不写入缓存
+        :param force: 为 True 时跳过缓存读取，但仍会刷新缓存并与进行中的抓取合并
+        :param cacheable: 可选的 cacheable(结果) -> bool，返回 False 时不写入缓存（如提前停止翻页的不完整结果），
+                          本次合并等待的请求仍共享该结果
+        """
+        key = self.normalize_key(artist)
+        if not force:
+            value = self.get(artist)
+            if value is not None:
+                self._count(CACHE_HIT)
+                return value, CACHE_HIT
+
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            self._count(CACHE_COALESCED)
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, CACHE_COALESCED
+
+        outcome = CACHE_BYPASS if force else CACHE_MISS
+        self._count(outcome)
+        try:
+            flight.value = fetch()
+            if flight.value and (cacheable is None or cacheable(flight.value)):
+                self.put(artist, flight.value)
+            return flight.value, outcome
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.event.set()
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['in_flight'] = len(self._in_flight)
+        return stats
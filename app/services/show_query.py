@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from ..models.show import Show
+
+# 列表接口返回的字段
+SHOW_FIELDS = ('id', 'name', 'artist', 'tag', 'city', 'venue', 'lineup', 'date', 'price', 'status',
+               'detail_url', 'poster')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(show_date: date, show_id: int) -> str:
+    """游标为上一页最后一行的 (date, id)"""
+    raw = f"{show_date.isoformat()}|{show_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        show_date, show_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        return date.fromisoformat(show_date), int(show_id)
+    except Exception:
+        raise ValueError(f"无效的分页游标: {cursor}")
+
+
+class ShowQueryService:
+    @staticmethod
+    def list_shows(db: Session, artist: str = None, city: str = None, status: str = None,
+                   date_from: date = None, date_to: date = None, cursor: str = None,
+                   limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        """
+        按 (date, id) 顺序分页查询演出，使用游标（keyset）而不是 OFFSET，
+        翻到任意深度都只扫描一页的数据；按 artist/city/无条件 分别走 (artist, date, id)、(city, date, id)、(date, id) 索引
+        :return: {'items': [...], 'next_cursor': 下一页游标或 None}
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        # sync 模式标记为已下架的演出不返回
+        query = select(*(getattr(Show, field) for field in SHOW_FIELDS)).where(Show.removed_at.is_(None))
+        if artist is not None:
+            query = query.where(Show.artist == artist)
+        if city is not None:
+            query = query.where(Show.city == city)
+        if status is not None:
+            query = query.where(Show.status == status)
+        if date_from is not None:
+            query = query.where(Show.date >= date_from)
+        if date_to is not None:
+            query = query.where(Show.date <= date_to)
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            query = query.where(tuple_(Show.date, Show.id) > (last_date, last_id))
+        # 多取一行判断是否还有下一页
+        rows = db.execute(query.order_by(Show.date, Show.id).limit(limit + 1)).all()
+        items = [
+            {field: (value.isoformat() if isinstance(value, date) else value)
+             for field, value in zip(SHOW_FIELDS, row)}
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last.date, last.id)
+        return {'items': items, 'next_cursor': next_cursor}
+
+
+class _CachedResponse:
+    __slots__ = ('artist', 'body', 'etag', 'expires_at')
+
+    def __init__(self, artist, body: bytes, etag: str, expires_at: float):
+        self.artist = artist
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class ShowQueryCache:
+    """
+    列表接口的进程内响应缓存（LRU + TTL），缓存序列化后的响应体和 ETag；
+    某个艺人的数据写入提交后，该艺人的缓存页和不限艺人的缓存页全部失效。
+    只有本进程的提交会触发失效，数据由其他进程写入时（CRAWLER_QUEUE=shared）需要关闭缓存（enabled=False），
+    关闭后每次都查询数据库，ETag 仍按响应体计算
+    """
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('SHOW_QUERY_CACHE_TTL', '300'))
+        self.max_entries = max_entries or int(os.getenv('SHOW_QUERY_CACHE_SIZE', '1024'))
+        self.enabled = self.ttl > 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 失效代数：查询开始时记录，写入缓存前若已变化说明期间有提交，结果不再缓存
+        self._generation = 0
+        self._artist_generations = {}
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @staticmethod
+    def make_key(params: dict) -> str:
+        return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    def get(self, key: str):
+        """返回缓存的 (body, etag)，未命中或已过期时返回 None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry.body, entry.etag
+
+    def generation(self, artist: str = None):
+        """查询开始前调用，返回传给 put 的失效代数"""
+        with self._lock:
+            if artist is None:
+                return self._generation
+            return self._artist_generations.get(artist, 0)
+
+    def put(self, key: str, artist, generation, body: bytes) -> str:
+        """缓存响应体并返回 ETag；查询期间该艺人有新的提交时不缓存"""
+        etag = self.make_etag(body)
+        if not self.enabled:
+            return etag
+        with self._lock:
+            current = self._generation if artist is None else self._artist_generations.get(artist, 0)
+            if current != generation:
+                return etag
+            self._entries[key] = _CachedResponse(artist, body, etag, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate_artist(self, artist: str):
+        """艺人数据已提交：删除该艺人的缓存页以及不限艺人的缓存页"""
+        with self._lock:
+            self._generation += 1
+            self._artist_generations[artist] = self._artist_generations.get(artist, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry.artist in (artist, None)]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidations'] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {'enabled': self.enabled, 'entries': len(self._entries), **self._stats}
+
+
+# 进程级的列表响应缓存，写入路径提交后调用 invalidate_artist
+show_query_cache = ShowQueryCache()
@@ -0,0 +1,232 @@
+import os
+import re
+import gzip
+import json
+import time
+import queue
+import atexit
+import socket
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# 每个进程每天一个分段文件，文件内每条快照是一个独立的 gzip member，可以按偏移单独解压；
+# API 和各个 worker 进程写各自的分段，偏移不会被其他进程的追加打乱（旧版本的分段没有主机和进程号）
+SEGMENT_PATTERN = re.compile(r'^snapshots-(\d{8})(?:-[^.]+)?\.jsonl\.gz$')
+
+_STOP = object()
+
+
+class SnapshotArchive:
+    """
+    原始抓取结果的只追加归档：按进程、按天分段的 gzip 压缩 JSONL，
+    SQLite 索引记录 (artist, timestamp) -> (分段, 偏移, 长度)；
+    写入由后台线程完成，调用方只把快照放入队列
+    """
+    def __init__(self, root: str = None, retention_days: int = None, compress_level: int = None,
+                 queue_size: int = None):
+        self.root = root or os.getenv(
+            'SNAPSHOT_DIR', os.path.join(os.getenv('DATA_SAVE_PATH', './data'), 'snapshots')
+        )
+        self.retention_days = retention_days if retention_days is not None else int(
+            os.getenv('SNAPSHOT_RETENTION_DAYS', '30')
+        )
+        self.compress_level = compress_level or int(os.getenv('SNAPSHOT_COMPRESS_LEVEL', '6'))
+        os.makedirs(self.root, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(self.root, 'index.db'), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    artist TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    source TEXT NOT NULL,
+                    page INTEGER NOT NULL DEFAULT 1,
+                    segment TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    count INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_snapshots_artist_ts ON snapshots (artist, timestamp)"
+            )
+
+        self._queue = queue.Queue(maxsize=queue_size or int(os.getenv('SNAPSHOT_QUEUE_SIZE', '1000')))
+        self._segment_day = None
+        self._segment = None
+        self._file = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='snapshot-archive', daemon=True)
+        self._thread.start()
+
+    def write(self, artist: str, shows: list, source: str = 'crawler', page: int = 1, timestamp: float = None):
+        """
+        提交一条快照，立即返回；队列满时等待后台线程写出
+        :param timestamp: 快照时间，同一次抓取的多页使用相同的时间戳
+        """
+        if self._closed:
+            logger.warning("快照归档已关闭，丢弃艺人 %s 的快照", artist)
+            return
+        record = {
+            'artist': artist,
+            'timestamp': timestamp or time.time(),
+            'source': source,
+            'page': page,
+            'shows': [dict(show) for show in shows]
+        }
+        self._queue.put(record)
+
+    def flush(self):
+        """等待队列中的快照全部写出"""
+        self._queue.join()
+
+    def close(self):
+        """写出剩余快照并停止后台线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        with self._lock:
+            self._conn.close()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP:
+                    break
+                self._append(record)
+            except Exception as e:
+                logger.error("写入快照失败: %s", e)
+            finally:
+                self._queue.task_done()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _segment_name(day: str) -> str:
+        host = re.sub(r'[^A-Za-z0-9_]', '_', socket.gethostname()) or 'host'
+        return f'snapshots-{day}-{host}-{os.getpid()}.jsonl.gz'
+
+    def _open_segment(self, day: str):
+        """切换到当天的分段，跨天时顺便清理过期分段"""
+        if self._file is not None:
+            self._file.close()
+        self._segment_day = day
+        self._segment = self._segment_name(day)
+        self._file = open(os.path.join(self.root, self._segment), 'ab')
+        self.cleanup()
+
+    def _append(self, record: dict):
+        # 分段按写入时的日期划分；同一次抓取的各页共用开始时间，跨过零点时不能切回前一天的分段
+        day = datetime.now().strftime('%Y%m%d')
+        if day != self._segment_day:
+            self._open_segment(day)
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        data = gzip.compress(line, compresslevel=self.compress_level)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO snapshots (artist, timestamp, source, page, segment, offset, length, count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (record['artist'], record['timestamp'], record['source'], record['page'],
+                 self._segment, offset, len(data), len(record['shows']))
+            )
+
+    def cleanup(self, now: datetime = None) -> int:
+        """删除超过保留天数的分段及其索引，返回删除的分段数"""
+        if self.retention_days <= 0:
+            return 0
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).strftime('%Y%m%d')
+        removed = 0
+        for name in os.listdir(self.root):
+            match = SEGMENT_PATTERN.match(name)
+            if match is None or match.group(1) >= cutoff or name == self._segment:
+                continue
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM snapshots WHERE segment = ?", (name,))
+            try:
+                os.remove(os.path.join(self.root, name))
+                removed += 1
+            except OSError as e:
+                logger.warning("删除过期快照分段 %s 失败: %s", name, e)
+        if removed:
+            logger.info("已清理 %d 个过期快照分段", removed)
+        return removed
+
+    def list_snapshots(self, artist: str, since: float = None, limit: int = 100) -> list:
+        """按时间倒序列出艺人的快照索引"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM snapshots WHERE artist = ? AND timestamp >= ? "
+                "ORDER BY timestamp DESC, page LIMIT ?",
+                (artist, since or 0, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def read(self, entry: dict) -> dict:
+        """按索引项读取并解压一条快照"""
+        with open(os.path.join(self.root, entry['segment']), 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['length'])
+        return json.loads(gzip.decompress(data))
+
+    def list_artists(self) -> list:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT artist FROM snapshots ORDER BY artist").fetchall()
+        return [row['artist'] for row in rows]
+
+    def history(self, artist: str, since: float = None) -> list:
+        """艺人的全部抓取结果 [(时间戳, 演出列表)]，按时间正序，同一时间戳的各页合并"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM snapshots WHERE artist = ? AND timestamp >= ? ORDER BY timestamp, page",
+                (artist, since or 0)
+            ).fetchall()
+        result = []
+        for row in rows:
+            shows = self.read(dict(row))['shows']
+            if result and result[-1][0] == row['timestamp']:
+                result[-1][1].extend(shows)
+            else:
+                result.append((row['timestamp'], list(shows)))
+        return result
+
+    def latest(self, artist: str):
+        """艺人最近一次抓取的全部演出（合并同一时间戳的各页），没有快照时返回 None"""
+        entries = self.list_snapshots(artist, limit=1)
+        if not entries:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM snapshots WHERE artist = ? AND timestamp = ? ORDER BY page",
+                (artist, entries[0]['timestamp'])
+            ).fetchall()
+        shows = []
+        for row in rows:
+            shows.extend(self.read(dict(row))['shows'])
+        return shows
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_snapshot_archive() -> SnapshotArchive:
+    """进程级的快照归档，首次使用时创建"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = SnapshotArchive()
+            atexit.register(_archive.close)
+        return _archive
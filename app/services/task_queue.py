@@ -0,0 +1,408 @@
+import os
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from sqlalchemy import select, update, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from ..models.crawl_task import CrawlTask
+
+logger = logging.getLogger(__name__)
+
+# 任务状态；leased 期间 stage 记录 crawling/processing/uploading
+TASK_QUEUED = 'queued'
+TASK_LEASED = 'leased'
+TASK_DONE = 'done'
+TASK_FAILED = 'failed'
+TASK_FINISHED_STATES = (TASK_DONE, TASK_FAILED)
+
+
+class LeaseLostError(Exception):
+    """租约已过期并被其他 worker 接手，当前 worker 应放弃该任务"""
+    pass
+
+
+class LeasedTask:
+    """worker 领取到的任务；lease_token 用于确认写回时仍持有租约"""
+    def __init__(self, task_id: int, job_id: str, position: int, artist: str, force: bool, profile: str,
+                 attempts: int, max_attempts: int, lease_token: str):
+        self.id = task_id
+        self.job_id = job_id
+        self.position = position
+        self.artist = artist
+        self.force = force
+        self.profile = profile
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.lease_token = lease_token
+        # 续约失败时由心跳线程设置
+        self.lost = threading.Event()
+
+    def __repr__(self):
+        return f"<LeasedTask {self.id} {self.artist} attempt={self.attempts}>"
+
+
+class TaskQueue(ABC):
+    """
+    多进程共享的艺人任务队列接口，租约 + 心跳语义：
+    worker 领取任务后定期续约，租约过期的任务重新入队（超过最大尝试次数时记为失败）
+    """
+    @abstractmethod
+    def init(self):
+        """创建队列所需的表等，可重复调用"""
+
+    @abstractmethod
+    def enqueue(self, job_id: str, artists: list, force: bool = False, profile: str = None) -> int:
+        """把一个任务的艺人逐个入队，返回新入队的数量（重复入队的艺人忽略）"""
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float):
+        """领取一个任务，返回 LeasedTask；没有可领取的任务时返回 None"""
+
+    @abstractmethod
+    def heartbeat(self, tasks: list, lease_seconds: float) -> list:
+        """为持有的任务续约，返回已失去租约的任务"""
+
+    @abstractmethod
+    def check_lease(self, db, task: LeasedTask) -> bool:
+        """
+        在写入演出的数据库事务 db 中确认仍持有未过期的租约，并锁定任务行直到该事务结束，
+        租约不会在这批数据提交之前被其他 worker 接手；返回 False 时调用方应回滚并放弃任务
+        """
+
+    @abstractmethod
+    def set_stage(self, task: LeasedTask, stage: str):
+        """进入新阶段（crawling/processing/uploading），租约已失去时抛出 LeaseLostError"""
+
+    @abstractmethod
+    def set_cache(self, task: LeasedTask, outcome: str):
+        """记录搜索缓存结果"""
+
+    @abstractmethod
+    def set_changes(self, task: LeasedTask, changes: dict):
+        """记录写入计数"""
+
+    @abstractmethod
+    def complete(self, task: LeasedTask, success: bool, message: str) -> bool:
+        """记录任务结果，租约已失去时不写入并返回 False"""
+
+    @abstractmethod
+    def retry(self, task: LeasedTask, message: str, delay: float) -> bool:
+        """任务出错：未达最大尝试次数时 delay 秒后重新入队，否则记为失败；返回是否重新入队（租约已失去时为 False）"""
+
+    @abstractmethod
+    def get_job(self, job_id: str):
+        """与 JobStore.get_job 格式相同的任务进度，任务不存在时返回 None"""
+
+    @abstractmethod
+    def get_stats(self) -> dict:
+        """各状态的任务数、过期租约数和活跃 worker 数"""
+
+    def close(self):
+        pass
+
+
+class SqlTaskQueue(TaskQueue):
+    """
+    基于数据库表 crawl_tasks 的队列（SQLite / MySQL）
+    MySQL 8 / PostgreSQL 使用 SELECT ... FOR UPDATE SKIP LOCKED 领取任务；
+    SQLite 先选出若干候选，再用带状态条件的 UPDATE 抢占，抢占失败换下一个
+    """
+    LOCKING_DIALECTS = ('mysql', 'postgresql')
+
+    def __init__(self, engine=None, max_attempts: int = None, reap_interval: float = None):
+        if engine is None:
+            from ..config.database import get_engine
+            engine = get_engine()
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        self.max_attempts = max_attempts or int(os.getenv('TASK_MAX_ATTEMPTS', '3'))
+        # 回收过期租约的最短间隔，避免每次领取都扫描
+        self.reap_interval = reap_interval if reap_interval is not None else float(
+            os.getenv('TASK_REAP_INTERVAL', '5')
+        )
+        self._next_reap = 0.0
+        self._skip_locked = engine.dialect.name in self.LOCKING_DIALECTS
+
+    def init(self):
+        CrawlTask.__table__.create(self.engine, checkfirst=True)
+
+    def enqueue(self, job_id: str, artists: list, force: bool = False, profile: str = None) -> int:
+        now = time.time()
+        rows = [
+            {
+                'dedup_key': f"{job_id}:{position}",
+                'job_id': job_id,
+                'position': position,
+                'artist': artist,
+                'force': int(force),
+                'profile': profile,
+                'state': TASK_QUEUED,
+                'attempts': 0,
+                'max_attempts': self.max_attempts,
+                'available_at': now,
+                'queued_at': now,
+                'timings': '{}'
+            }
+            for position, artist in enumerate(artists)
+        ]
+        if not rows:
+            return 0
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(CrawlTask), rows)
+            return len(rows)
+        except IntegrityError:
+            # 部分已入队：逐行插入，跳过去重键冲突的行
+            added = 0
+            for row in rows:
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(insert(CrawlTask), [row])
+                    added += 1
+                except IntegrityError:
+                    logger.debug("任务 %s 已入队，跳过", row['dedup_key'])
+            return added
+
+    def reap_expired(self, now: float = None) -> int:
+        """把租约过期的任务重新入队，超过最大尝试次数的记为失败，返回处理的任务数"""
+        now = now or time.time()
+        expired = (CrawlTask.state == TASK_LEASED) & (CrawlTask.lease_expires_at < now)
+        with self.Session() as db, db.begin():
+            failed = db.execute(
+                update(CrawlTask)
+                .where(expired & (CrawlTask.attempts >= CrawlTask.max_attempts))
+                .values(state=TASK_FAILED, success=0, finished_at=now, lease_token=None, lease_expires_at=None,
+                        message='worker 租约过期，已达最大尝试次数')
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            requeued = db.execute(
+                update(CrawlTask)
+                .where(expired)
+                .values(state=TASK_QUEUED, stage=None, worker_id=None, lease_token=None, lease_expires_at=None,
+                        available_at=now, message='worker 租约过期，重新入队')
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        if failed or requeued:
+            logger.warning("回收过期租约: 重新入队 %d 个，失败 %d 个", requeued, failed)
+        return failed + requeued
+
+    def lease(self, worker_id: str, lease_seconds: float):
+        now = time.time()
+        if now >= self._next_reap:
+            self._next_reap = now + self.reap_interval
+            self.reap_expired(now)
+        token = uuid.uuid4().hex
+        available = (CrawlTask.state == TASK_QUEUED) & (CrawlTask.available_at <= now)
+        values = dict(
+            state=TASK_LEASED, worker_id=worker_id, lease_token=token, lease_expires_at=now + lease_seconds,
+            attempts=CrawlTask.attempts + 1, started_at=func.coalesce(CrawlTask.started_at, now),
+            stage_started_at=now
+        )
+        with self.Session() as db:
+            if self._skip_locked:
+                with db.begin():
+                    task_id = db.execute(
+                        select(CrawlTask.id).where(available).order_by(CrawlTask.id).limit(1)
+                        .with_for_update(skip_locked=True)
+                    ).scalar()
+                    if task_id is None:
+                        return None
+                    db.execute(update(CrawlTask).where(CrawlTask.id == task_id).values(**values)
+                               .execution_options(synchronize_session=False))
+            else:
+                candidates = db.execute(
+                    select(CrawlTask.id).where(available).order_by(CrawlTask.id).limit(8)
+                ).scalars().all()
+                db.rollback()
+                # 多个 worker 同时领取时打散顺序，减少抢同一行
+                random.shuffle(candidates)
+                task_id = None
+                for candidate in candidates:
+                    with db.begin():
+                        claimed = db.execute(
+                            update(CrawlTask).where((CrawlTask.id == candidate) & (CrawlTask.state == TASK_QUEUED))
+                            .values(**values).execution_options(synchronize_session=False)
+                        ).rowcount
+                    if claimed:
+                        task_id = candidate
+                        break
+                if task_id is None:
+                    return None
+            row = db.get(CrawlTask, task_id)
+            return LeasedTask(row.id, row.job_id, row.position, row.artist, bool(row.force), row.profile,
+                              row.attempts, row.max_attempts, token)
+
+    def _owned(self, task: LeasedTask):
+        return ((CrawlTask.id == task.id) & (CrawlTask.lease_token == task.lease_token)
+                & (CrawlTask.state == TASK_LEASED))
+
+    def heartbeat(self, tasks: list, lease_seconds: float) -> list:
+        if not tasks:
+            return []
+        lost = []
+        expires_at = time.time() + lease_seconds
+        with self.Session() as db, db.begin():
+            for task in tasks:
+                renewed = db.execute(
+                    update(CrawlTask).where(self._owned(task)).values(lease_expires_at=expires_at)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not renewed:
+                    lost.append(task)
+        return lost
+
+    def check_lease(self, db, task: LeasedTask) -> bool:
+        """
+        crawl_tasks 与 shows 在同一个数据库中：带租约条件的 UPDATE 在调用方的事务里锁定任务行
+        （SQLite 为数据库写锁），回收过期租约的 UPDATE 要等这批数据提交后才能执行，
+        接手的 worker 查重时一定能看到已提交的数据
+        """
+        return bool(db.execute(
+            update(CrawlTask).where(self._owned(task) & (CrawlTask.lease_expires_at > time.time()))
+            .values(lease_expires_at=CrawlTask.lease_expires_at)
+            .execution_options(synchronize_session=False)
+        ).rowcount)
+
+    def _advance(self, db, task: LeasedTask, stage: str, now: float, **values) -> bool:
+        """进入新阶段，把上一阶段的耗时记入 timings（与 JobStore.set_stage 相同）"""
+        row = db.execute(
+            select(CrawlTask.stage, CrawlTask.stage_started_at, CrawlTask.queued_at, CrawlTask.timings)
+            .where(self._owned(task))
+        ).first()
+        if row is None:
+            return False
+        timings = json.loads(row.timings or '{}')
+        previous = row.stage or TASK_QUEUED
+        started = row.stage_started_at or row.queued_at
+        timings[previous] = round(timings.get(previous, 0) + now - started, 3)
+        db.execute(
+            update(CrawlTask).where(self._owned(task))
+            .values(stage=stage, stage_started_at=now, timings=json.dumps(timings), **values)
+            .execution_options(synchronize_session=False)
+        )
+        return True
+
+    def set_stage(self, task: LeasedTask, stage: str):
+        with self.Session() as db, db.begin():
+            if not self._advance(db, task, stage, time.time()):
+                raise LeaseLostError(f"任务 {task.id} 的租约已失去")
+
+    def _set(self, task: LeasedTask, **values):
+        with self.Session() as db, db.begin():
+            db.execute(update(CrawlTask).where(self._owned(task)).values(**values)
+                       .execution_options(synchronize_session=False))
+
+    def set_cache(self, task: LeasedTask, outcome: str):
+        self._set(task, cache=outcome)
+
+    def set_changes(self, task: LeasedTask, changes: dict):
+        self._set(task, changes=json.dumps(changes))
+
+    def complete(self, task: LeasedTask, success: bool, message: str) -> bool:
+        now = time.time()
+        state = TASK_DONE if success else TASK_FAILED
+        with self.Session() as db, db.begin():
+            return self._advance(
+                db, task, state, now, state=state, success=int(success), message=message, finished_at=now,
+                lease_expires_at=None
+            )
+
+    def retry(self, task: LeasedTask, message: str, delay: float) -> bool:
+        if task.attempts >= task.max_attempts:
+            self.complete(task, False, message)
+            return False
+        now = time.time()
+        with self.Session() as db, db.begin():
+            return self._advance(
+                db, task, None, now, state=TASK_QUEUED, worker_id=None, lease_token=None, lease_expires_at=None,
+                available_at=now + delay, message=message
+            )
+
+    @staticmethod
+    def _format_time(value):
+        return datetime.fromtimestamp(value).isoformat() if value else None
+
+    def get_job(self, job_id: str):
+        with self.Session() as db:
+            rows = db.execute(
+                select(CrawlTask).where(CrawlTask.job_id == job_id).order_by(CrawlTask.position)
+            ).scalars().all()
+        if not rows:
+            return None
+        artists = []
+        counts = {}
+        cache = {}
+        for row in rows:
+            state = row.stage if row.state == TASK_LEASED and row.stage else row.state
+            counts[state] = counts.get(state, 0) + 1
+            if row.cache:
+                cache[row.cache] = cache.get(row.cache, 0) + 1
+            artists.append({
+                "artist": row.artist,
+                "state": state,
+                "success": None if row.success is None else bool(row.success),
+                "message": row.message,
+                "cache": row.cache,
+                "changes": json.loads(row.changes) if row.changes else None,
+                "attempts": row.attempts,
+                "worker_id": row.worker_id,
+                "queued_at": self._format_time(row.queued_at),
+                "started_at": self._format_time(row.started_at),
+                "finished_at": self._format_time(row.finished_at),
+                "timings": json.loads(row.timings or '{}')
+            })
+        finished = all(row.state in TASK_FINISHED_STATES for row in rows)
+        return {
+            "job_id": job_id,
+            "status": "finished" if finished else "running",
+            "created_at": self._format_time(min(row.queued_at for row in rows)),
+            "finished_at": self._format_time(max(row.finished_at or 0 for row in rows)) if finished else None,
+            "force": bool(rows[0].force),
+            "profile": rows[0].profile,
+            "counts": counts,
+            "cache": cache,
+            "artists": artists
+        }
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        with self.Session() as db:
+            by_state = dict(db.execute(
+                select(CrawlTask.state, func.count()).group_by(CrawlTask.state)
+            ).all())
+            expired = db.execute(
+                select(func.count()).select_from(CrawlTask)
+                .where((CrawlTask.state == TASK_LEASED) & (CrawlTask.lease_expires_at < now))
+            ).scalar()
+            workers = db.execute(
+                select(func.count(func.distinct(CrawlTask.worker_id))).where(CrawlTask.state == TASK_LEASED)
+            ).scalar()
+        return {'states': by_state, 'expired_leases': expired, 'active_workers': workers}
+
+
+# 可插拔的队列后端，TASK_QUEUE_BACKEND 选择
+TASK_QUEUE_BACKENDS = {
+    'sql': SqlTaskQueue,
+}
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_task_queue(backend: str = None) -> TaskQueue:
+    """进程级的共享任务队列，首次使用时按 TASK_QUEUE_BACKEND 创建"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            name = backend or os.getenv('TASK_QUEUE_BACKEND', 'sql')
+            if name not in TASK_QUEUE_BACKENDS:
+                raise ValueError(f"未知的任务队列后端: {name}，可选: {', '.join(TASK_QUEUE_BACKENDS)}")
+            _queue = TASK_QUEUE_BACKENDS[name]()
+            _queue.init()
+        return _queue
@@ -1,51 +1,97 @@
-from datetime import datetime
+from datetime import datetime, date
 import time
+import hashlib
 import logging
-import json
 import os
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, update, inspect, text, tuple_
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from ..models.show import Show
-from ..config.database import engine, Base
+from ..models.show_record import parse_show_dates
+from ..config.database import get_engine, Base
+from ..config.logging_config import setup_logging, sample_row_log
+from ..metrics import time_stage, count_shows
+from .show_query import show_query_cache
+from .task_queue import LeaseLostError
 
 # 配置日志
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+# 批量写入时每批的行数（同时用于批量查重的分块大小）
+UPLOAD_BATCH_SIZE = int(os.getenv('UPLOAD_BATCH_SIZE', '500'))
+
+# 写入模式: insert 只插入新演出，已存在的跳过; sync 同时更新价格、状态等有变化的已有演出
+UPLOAD_MODE = os.getenv('UPLOAD_MODE', 'insert')
+# sync 模式下是否把最新抓取中消失的未来演出标记为 removed
+SYNC_MARK_REMOVED = os.getenv('SYNC_MARK_REMOVED', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+# 参与内容摘要的可变字段，(name, date, city) 是演出的键，不参与摘要
+CONTENT_FIELDS = ('tag', 'venue', 'lineup', 'price', 'status', 'detail_url', 'poster')
+
 class UploadService:
     @staticmethod
-    def init_db():
-        """初始化数据库表"""
-        try:
-            logger.info("开始初始化数据库表...")
-            Base.metadata.create_all(bind=engine)
-            logger.info("数据库表初始化成功")
-        except Exception as e:
-            logger.error(f"初始化数据库失败: {str(e)}")
-            raise
+    def init_db(max_retries: int = 3):
+        """初始化数据库表；多个进程同时启动时可能同时建表或加列，冲突时重试（已存在的表和列会被跳过）"""
+        retry_count = 0
+        while True:
+            try:
+                logger.info("开始初始化数据库表...")
+                with get_engine().begin() as conn:
+                    UploadService.upgrade_schema(conn)
+                logger.info("数据库表初始化成功")
+                return
+            except SQLAlchemyError as e:
+                retry_count += 1
+                if retry_count >= max_retries:
+                    logger.error("初始化数据库失败: %s", e)
+                    raise
+                logger.warning("初始化数据库失败 (尝试 %d/%d)，可能有其他进程同时建表: %s", retry_count, max_retries, e)
+                time.sleep(0.5)
+            except Exception as e:
+                logger.error("初始化数据库失败: %s", e)
+                raise
+    
+    @staticmethod
+    def upgrade_schema(conn):
+        """建表，并给已存在的 shows 表补充新增的列和索引（create_all 不会修改已存在的表）"""
+        Base.metadata.create_all(conn)
+        existing = {column['name'] for column in inspect(conn).get_columns(Show.__tablename__)}
+        for column in Show.__table__.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {Show.__tablename__} ADD COLUMN {column.name} {column_type}"))
+                logger.info("shows 表已添加列: %s", column.name)
+        for index in Show.__table__.indexes:
+            index.create(conn, checkfirst=True)
     
     @staticmethod
     def parse_show_date(date_str: str) -> datetime:
         """解析日期字符串，只保留日期部分"""
         try:
-            logger.info(f"开始解析日期: {date_str}")
-            # 分割字符串，只取日期部分
-            date_part = date_str.split(' ')[0]
-            result = datetime.strptime(date_part, '%Y.%m.%d')
-            logger.info(f"日期解析结果: {result}")
+            # 日期范围取开始日期，忽略日期后的时间
+            result = datetime.combine(parse_show_dates(date_str)[0], datetime.min.time())
+            if sample_row_log(logger):
+                logger.debug("日期解析结果: %s -> %s", date_str, result)
             return result
         except Exception as e:
-            logger.error(f"解析日期失败: {str(e)}, 日期字符串: {date_str}")
+            logger.error("解析日期失败: %s, 日期字符串: %s", e, date_str)
             raise
     
+    @staticmethod
+    def get_show_date(show_data) -> date:
+        """取演出日期：ShowDay 视图直接使用已解析的日期，dict 则解析 date 字段"""
+        show_date = getattr(show_data, 'show_date', None)
+        if show_date is not None:
+            return show_date
+        return UploadService.parse_show_date(show_data['date']).date()
+    
     @staticmethod
     def is_duplicate(db: Session, show_data: dict, max_retries=3) -> bool:
         """检查是否存在重复数据，带重试机制"""
         retry_count = 0
         while retry_count < max_retries:
             try:
-                logger.info(f"检查重复数据: {show_data['name']} - {show_data['date']}")
                 # 使用新的解析方法
                 show_date = UploadService.parse_show_date(show_data['date'])
                 result = db.query(Show).filter(
@@ -55,89 +101,360 @@ class UploadService:
                         Show.city == show_data['city']
                     )
                 ).first() is not None
-                logger.info(f"重复检查结果: {'存在' if result else '不存在'}")
+                if sample_row_log(logger):
+                    logger.debug("重复检查: %s - %s, 结果: %s",
+                                 show_data['name'], show_data['date'], '存在' if result else '不存在')
                 return result
             except OperationalError as e:
                 retry_count += 1
-                logger.warning(f"检查重复数据失败 (尝试 {retry_count}/{max_retries}): {str(e)}")
+                logger.warning("检查重复数据失败 (尝试 %d/%d): %s", retry_count, max_retries, e)
                 if retry_count < max_retries:
                     time.sleep(1)
                     continue
                 raise
             except Exception as e:
-                logger.error(f"检查重复数据时发生错误: {str(e)}")
+                logger.error("检查重复数据时发生错误: %s", e)
                 raise
     
     @staticmethod
     def upload_shows(db: Session, shows: list, artist: str, max_retries: int = 3):
         """上传演出数据到数据库，跳过重复数据，带重试机制"""
-        new_count = 0
-        skip_count = 0
         retry_count = 0
         
-        # 保存原始数据到JSON文件
-        try:
-            data_path = os.getenv('DATA_SAVE_PATH', './data')
-            os.makedirs(data_path, exist_ok=True)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            json_file = os.path.join(data_path, f'damai_shows_{artist}_{timestamp}.json')
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(shows, f, ensure_ascii=False, indent=2)
-            logger.info(f"原始数据已保存到: {json_file}")
-        except Exception as e:
-            logger.error(f"保存JSON文件失败: {str(e)}")
-        
         while retry_count < max_retries:
             try:
-                logger.info(f"开始上传数据，艺人: {artist}, 数据量: {len(shows)}")
-                # 转换并插入新数据
-                for show_data in shows:
-                    try:
-                        logger.info(f"处理演出数据: {show_data['name']}")
-                        # 检查是否重复
-                        if UploadService.is_duplicate(db, show_data):
-                            skip_count += 1
-                            logger.info(f"跳过重复数据: {show_data['name']} - {show_data['date']} - {show_data['city']}")
-                            continue
-                        
-                        # 解析日期
-                        show_date = UploadService.parse_show_date(show_data['date']).date()
-                        logger.info(f"创建Show对象: {show_data['name']} - {show_date}")
-                        
-                        # 插入新数据
-                        show = Show(
-                            name=show_data['name'],
-                            artist=artist,
-                            tag=show_data['tag'],
-                            city=show_data['city'],
-                            venue=show_data['venue'],
-                            lineup=show_data['lineup'],
-                            date=show_date,
-                            price=show_data['price'],
-                            status=show_data['status'],
-                            detail_url=show_data['detail_url'],
-                            poster=show_data['poster']
-                        )
-                        db.add(show)
-                        new_count += 1
-                        logger.info(f"数据已添加到会话: {show_data['name']}")
-                        
-                    except Exception as e:
-                        logger.error(f"处理数据时出错: {str(e)}, 数据: {show_data}")
-                        continue
+                logger.info("开始上传数据，艺人: %s, 数据量: %d", artist, len(shows))
+                new_count, skip_count = UploadService.bulk_insert_shows(db, shows, artist)
                 
                 # 提交事务
-                logger.info("开始提交事务...")
-                db.commit()
-                logger.info(f"数据上传完成: 新增 {new_count} 条, 跳过 {skip_count} 条")
+                logger.debug("开始提交事务...")
+                with time_stage('commit'):
+                    db.commit()
+                if new_count:
+                    show_query_cache.invalidate_artist(artist)
+                count_shows('new', new_count)
+                count_shows('skipped', skip_count)
+                logger.info("艺人 %s 数据上传完成: 新增 %d 条, 跳过 %d 条", artist, new_count, skip_count)
                 return True
                 
             except Exception as e:
-                logger.error(f"上传数据时发生错误: {str(e)}")
+                logger.error("上传数据时发生错误: %s", e)
                 db.rollback()
                 retry_count += 1
                 if retry_count < max_retries:
-                    logger.info(f"准备第 {retry_count + 1} 次重试...")
+                    logger.info("准备第 %d 次重试...", retry_count + 1)
                     time.sleep(1)
                     continue
-                raise 
\ No newline at end of file
+                raise
+
+    @staticmethod
+    def build_show_row(show_data: dict, artist: str) -> dict:
+        """将演出数据转换为 shows 表的一行"""
+        return {
+            'name': show_data['name'],
+            'artist': artist,
+            'tag': show_data['tag'],
+            'city': show_data['city'],
+            'venue': show_data['venue'],
+            'lineup': show_data['lineup'],
+            'date': UploadService.get_show_date(show_data),
+            'price': show_data['price'],
+            'status': show_data['status'],
+            'detail_url': show_data['detail_url'],
+            'poster': show_data['poster'],
+            'content_hash': UploadService.content_hash(show_data),
+            'created_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def content_hash(show_data) -> str:
+        """可变字段的摘要"""
+        content = '\x1f'.join(str(show_data[field] or '') for field in CONTENT_FIELDS)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def fetch_existing_keys(db: Session, keys, batch_size: int = None) -> set:
+        """批量查询已存在的 (name, date, city) 键，每个分块只需一次查询"""
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        keys = list(keys)
+        existing = set()
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            with time_stage('dedup'):
+                rows = db.query(Show.name, Show.date, Show.city).filter(
+                    tuple_(Show.name, Show.date, Show.city).in_(chunk)
+                ).all()
+            existing.update((row.name, row.date, row.city) for row in rows)
+        return existing
+
+    @staticmethod
+    def is_page_known(db: Session, shows: list) -> bool:
+        """处理后的一页演出是否全部已存在于 shows 表，用于提前结束翻页"""
+        keys = set()
+        for show_data in shows:
+            try:
+                show_date = UploadService.get_show_date(show_data)
+            except Exception:
+                return False
+            keys.add((show_data['name'], show_date, show_data['city']))
+        if not keys:
+            return False
+        return len(UploadService.fetch_existing_keys(db, keys)) == len(keys)
+
+    @staticmethod
+    def build_show_rows(shows: list, artist: str) -> list:
+        """转换一批演出数据，无法处理的数据记录日志后跳过"""
+        rows = []
+        for show_data in shows:
+            try:
+                rows.append(UploadService.build_show_row(show_data, artist))
+            except Exception as e:
+                logger.error("处理数据时出错: %s, 数据: %s", e, show_data)
+                continue
+        return rows
+
+    @staticmethod
+    def row_keys(rows: list) -> set:
+        return {(row['name'], row['date'], row['city']) for row in rows}
+
+    @staticmethod
+    def select_new_rows(rows: list, existing: set):
+        """按已存在的键过滤出需要插入的行，返回 (新行列表, 跳过数)"""
+        new_rows = []
+        skip_count = 0
+        for row in rows:
+            key = (row['name'], row['date'], row['city'])
+            if key in existing:
+                skip_count += 1
+                if sample_row_log(logger):
+                    logger.debug("跳过重复数据: %s - %s - %s", row['name'], row['date'], row['city'])
+                continue
+            # 同一批次内的重复数据也只插入一次
+            existing.add(key)
+            new_rows.append(row)
+        return new_rows, skip_count
+
+    @staticmethod
+    def bulk_insert_shows(db: Session, shows: list, artist: str, batch_size: int = None):
+        """批量查重并分批插入新数据，返回 (新增数, 跳过数)，不提交事务"""
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        rows = UploadService.build_show_rows(shows, artist)
+        existing = UploadService.fetch_existing_keys(db, UploadService.row_keys(rows), batch_size)
+        new_rows, skip_count = UploadService.select_new_rows(rows, existing)
+        
+        # 多行 INSERT 分批写入
+        for start in range(0, len(new_rows), batch_size):
+            with time_stage('insert'):
+                db.execute(insert(Show), new_rows[start:start + batch_size])
+        
+        return len(new_rows), skip_count
+
+    @staticmethod
+    def fetch_existing_rows(db: Session, keys, batch_size: int = None) -> dict:
+        """批量查询已存在的行，返回 (name, date, city) -> (id, content_hash, removed_at)"""
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        keys = list(keys)
+        existing = {}
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            with time_stage('dedup'):
+                rows = db.query(
+                    Show.id, Show.name, Show.date, Show.city, Show.content_hash, Show.removed_at
+                ).filter(tuple_(Show.name, Show.date, Show.city).in_(chunk)).all()
+            for row in rows:
+                existing[(row.name, row.date, row.city)] = (row.id, row.content_hash, row.removed_at)
+        return existing
+
+    @staticmethod
+    def sync_show_rows(db: Session, shows: list, artist: str, batch_size: int = None,
+                       seen_keys: set = None) -> dict:
+        """
+        同步一批演出：插入新演出，摘要不同的已有演出按主键批量 UPDATE，内容相同的不写入；
+        之前被标记为 removed 又重新出现的演出恢复。不提交事务
+        :param seen_keys: 可选，收集本批次出现过的键，供 mark_removed 使用
+        :return: {'inserted': n, 'updated': n, 'unchanged': n, 'skipped': n}，
+                 skipped 为同一批次内重复出现的键，各项之和等于转换成功的行数
+        """
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        rows = UploadService.build_show_rows(shows, artist)
+        keys = UploadService.row_keys(rows)
+        if seen_keys is not None:
+            seen_keys.update(keys)
+        existing = UploadService.fetch_existing_rows(db, keys, batch_size)
+
+        now = datetime.utcnow()
+        new_rows = []
+        changed_rows = {}
+        unchanged = 0
+        skipped = 0
+        batch_keys = set()
+        for row in rows:
+            key = (row['name'], row['date'], row['city'])
+            # 同一批次内的重复数据只处理第一次出现的，与 insert 模式一样计入跳过数
+            if key in batch_keys:
+                skipped += 1
+                continue
+            batch_keys.add(key)
+            current = existing.get(key)
+            if current is None:
+                new_rows.append(row)
+                continue
+            show_id, content_hash, removed_at = current
+            if content_hash == row['content_hash'] and removed_at is None:
+                unchanged += 1
+                continue
+            changed = {field: row[field] for field in CONTENT_FIELDS}
+            changed.update(id=show_id, content_hash=row['content_hash'], updated_at=now, removed_at=None)
+            changed_rows[show_id] = changed
+
+        for start in range(0, len(new_rows), batch_size):
+            with time_stage('insert'):
+                db.execute(insert(Show), new_rows[start:start + batch_size])
+        # 按主键的批量 UPDATE（executemany），只包含内容有变化的行
+        changed_rows = list(changed_rows.values())
+        for start in range(0, len(changed_rows), batch_size):
+            with time_stage('update'):
+                db.execute(update(Show), changed_rows[start:start + batch_size])
+        return {'inserted': len(new_rows), 'updated': len(changed_rows), 'unchanged': unchanged, 'skipped': skipped}
+
+    @staticmethod
+    def mark_removed(db: Session, artist: str, seen_keys: set, since: date = None,
+                     batch_size: int = None) -> int:
+        """
+        把艺人在 since（默认今天）及以后、本次完整抓取中没有出现的演出标记为 removed，不提交事务
+        :return: 标记的行数
+        """
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        since = since or date.today()
+        with time_stage('dedup'):
+            rows = db.query(Show.id, Show.name, Show.date, Show.city).filter(
+                Show.artist == artist, Show.removed_at.is_(None), Show.date >= since
+            ).all()
+        missing = [row.id for row in rows if (row.name, row.date, row.city) not in seen_keys]
+        now = datetime.utcnow()
+        for start in range(0, len(missing), batch_size):
+            with time_stage('update'):
+                db.execute(
+                    update(Show).where(Show.id.in_(missing[start:start + batch_size]))
+                    .values(removed_at=now, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+        return len(missing)
+
+
+class ShowBatchWriter:
+    """按固定批量写入演出数据并定期提交，会话中不保留 ORM 对象"""
+    def __init__(self, db: Session, artist: str, batch_size: int = None, max_retries: int = 3,
+                 async_writer=None, mode: str = None, fence=None):
+        """
+        :param async_writer: 可选的 AsyncShowWriter，设置后批次交给事件循环上的异步会话写入，
+                             当前线程只等待结果，不占用数据库连接（此时 db 可为 None）
+        :param mode: insert 或 sync（见 UPLOAD_MODE），sync 模式会更新内容有变化的已有演出
+        :param fence: 可选的 fence(db)，在每个批次的事务开始时调用，抛出 LeaseLostError 时回滚并不再重试；
+                      共享队列的 worker 用它确认仍持有任务租约（见 TaskQueue.check_lease）
+        """
+        self.db = db
+        self.fence = fence
+        self.async_writer = async_writer
+        self.artist = artist
+        self.batch_size = batch_size or UPLOAD_BATCH_SIZE
+        self.max_retries = max_retries
+        self.mode = mode or UPLOAD_MODE
+        self.pending = []
+        self.new_count = 0
+        self.skip_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self.removed_count = 0
+        self.batches = 0
+        # sync 模式下记录本次出现过的键，用于标记消失的演出
+        self.seen_keys = set() if self.mode == 'sync' else None
+
+    def add(self, show_data: dict):
+        self.pending.append(show_data)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """写入并提交当前批次，失败时回滚并重试该批次"""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        if self.mode == 'sync':
+            counts = self._execute(lambda db: UploadService.sync_show_rows(
+                db, batch, self.artist, self.batch_size, self.seen_keys
+            ))
+            new_count, skip_count = counts['inserted'], counts['skipped']
+            self.updated_count += counts['updated']
+            self.unchanged_count += counts['unchanged']
+            count_shows('updated', counts['updated'])
+            count_shows('unchanged', counts['unchanged'])
+            changed = new_count + counts['updated']
+        else:
+            if self.async_writer is not None and self.fence is None:
+                new_count, skip_count = self.async_writer.write_from_thread(batch, self.artist, self.batch_size)
+            else:
+                new_count, skip_count = self._execute(lambda db: UploadService.bulk_insert_shows(
+                    db, batch, self.artist, self.batch_size
+                ))
+            changed = new_count
+        self.new_count += new_count
+        self.skip_count += skip_count
+        self.batches += 1
+        if changed:
+            show_query_cache.invalidate_artist(self.artist)
+        count_shows('new', new_count)
+        count_shows('skipped', skip_count)
+        logger.debug("批次 %d 已提交，艺人: %s, 新增 %d 条, 跳过 %d 条", self.batches, self.artist, new_count, skip_count)
+
+    def mark_removed(self) -> int:
+        """
+        sync 模式下在完整抓取之后调用：标记本次没有出现的未来演出
+        提前停止翻页时抓取结果不完整，不应调用
+        """
+        if self.mode != 'sync':
+            return 0
+        self.flush()
+        seen_keys = self.seen_keys
+        removed = self._execute(lambda db: UploadService.mark_removed(db, self.artist, seen_keys, None, self.batch_size))
+        self.removed_count += removed
+        count_shows('removed', removed)
+        if removed:
+            show_query_cache.invalidate_artist(self.artist)
+        return removed
+
+    def get_counts(self) -> dict:
+        """本艺人的写入计数"""
+        counts = {'inserted': self.new_count, 'skipped': self.skip_count}
+        if self.mode == 'sync':
+            counts.update(updated=self.updated_count, unchanged=self.unchanged_count, removed=self.removed_count)
+        return counts
+
+    def _execute(self, operation):
+        """在会话中执行 operation(db) 并提交，失败时回滚重试；启用异步层时交给事件循环执行"""
+        if self.fence is not None:
+            fenced_operation = operation
+
+            def operation(db):
+                self.fence(db)
+                return fenced_operation(db)
+        if self.async_writer is not None:
+            return self.async_writer.execute_from_thread(operation)
+        retry_count = 0
+        while True:
+            try:
+                result = operation(self.db)
+                with time_stage('commit'):
+                    self.db.commit()
+                return result
+            except LeaseLostError:
+                self.db.rollback()
+                raise
+            except Exception as e:
+                logger.error("写入批次失败: %s", e)
+                self.db.rollback()
+                retry_count += 1
+                if retry_count >= self.max_retries:
+                    raise
+                logger.info("准备第 %d 次重试...", retry_count + 1)
+                time.sleep(1)
@@ -0,0 +1,169 @@
+"""
+浏览器配置对比：default 与 lean
+
+在本地替身服务器（--assets，页面带海报图片、样式表、字体和统计脚本）上用两种配置各加载若干次搜索页，比较：
+  - 传输字节数：替身服务器实际发出的 HTML 与静态资源字节（被拦截的请求不会到达服务器）
+  - 页面加载（driver.get 返回）与就绪等待（wait_for_search_results）耗时
+  - 浏览器进程内存：渲染进程与全部 Chrome 进程的 RSS（读取 /proc，仅 Linux）
+  - 两种配置提取到的演出是否一致
+
+需要本机安装 Chrome。
+运行: python -m benchmarks.bench_browser_profile [--rounds 10] [--items 30] [--latency 0.05] [-o result.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app.crawler.spider import DamaiCrawler
+from app.crawler.waits import wait_for_search_results
+from app.crawler.extraction import extract_items_script
+from app.crawler.browser_profile import BROWSER_PROFILES
+from benchmarks.damai_stub import StubConfig, start_stub_server
+
+PROFILES = ['default', 'lean']
+
+
+def _children(pid: int) -> list:
+    """pid 的全部子孙进程（读取 /proc/<pid>/task/*/children）"""
+    result = []
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        task_dir = f'/proc/{current}/task'
+        try:
+            tasks = os.listdir(task_dir)
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f'{task_dir}/{task}/children') as f:
+                    children = [int(child) for child in f.read().split()]
+            except OSError:
+                continue
+            result.extend(children)
+            stack.extend(children)
+    return result
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return f.read().replace(b'\0', b' ').decode('utf-8', 'replace')
+    except OSError:
+        return ''
+
+
+def browser_memory(driver) -> dict:
+    """chromedriver 启动的 Chrome 进程树的 RSS（MB），/proc 不可用时返回空值"""
+    service = getattr(driver, 'service', None)
+    process = getattr(service, 'process', None)
+    if process is None or not os.path.isdir('/proc'):
+        return {'renderer_rss_mb': None, 'total_rss_mb': None}
+    renderer = total = 0
+    for pid in _children(process.pid):
+        rss = _rss_kb(pid)
+        total += rss
+        if '--type=renderer' in _cmdline(pid):
+            renderer += rss
+    return {'renderer_rss_mb': round(renderer / 1024, 1), 'total_rss_mb': round(total / 1024, 1)}
+
+
+def stub_bytes(server) -> int:
+    stats = server.RequestHandlerClass.stats.snapshot()
+    return stats.get('html_bytes', 0) + stats.get('asset_bytes', 0)
+
+
+def run_profile(profile: str, search_url: str, server, rounds: int) -> dict:
+    crawler = DamaiCrawler(profile=profile, search_base_url=search_url)
+    started = time.perf_counter()
+    driver = crawler.create_driver()
+    startup = time.perf_counter() - started
+    load_times, ready_times, transferred, memory = [], [], [], []
+    shows = None
+    try:
+        driver.implicitly_wait(0)
+        for i in range(rounds):
+            url = crawler.get_artist_search_url(f'浏览器配置对比 {i}')
+            before = stub_bytes(server)
+            started = time.perf_counter()
+            driver.get(url)
+            load_times.append(time.perf_counter() - started)
+            ready = wait_for_search_results(driver)
+            ready_times.append(ready['elapsed'])
+            # 等待已发出的资源请求结束，再统计字节
+            time.sleep(0.2)
+            transferred.append(stub_bytes(server) - before)
+            if i == 0:
+                shows = extract_items_script(driver)
+            memory.append(browser_memory(driver))
+    finally:
+        driver.quit()
+
+    def median_ms(values):
+        return round(statistics.median(values) * 1000, 1)
+
+    renderer = [m['renderer_rss_mb'] for m in memory if m['renderer_rss_mb'] is not None]
+    total = [m['total_rss_mb'] for m in memory if m['total_rss_mb'] is not None]
+    return {
+        'page_load_strategy': BROWSER_PROFILES[profile]['page_load_strategy'],
+        'startup_ms': round(startup * 1000, 1),
+        'page_load_ms': median_ms(load_times),
+        'ready_wait_ms': median_ms(ready_times),
+        'page_ready_ms': median_ms([a + b for a, b in zip(load_times, ready_times)]),
+        'bytes_per_page': int(statistics.median(transferred)),
+        'renderer_rss_mb': max(renderer) if renderer else None,
+        'total_rss_mb': max(total) if total else None,
+        'shows': shows
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="浏览器配置对比")
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--items', type=int, default=30, help="每页演出数")
+    parser.add_argument('--latency', type=float, default=0.05, help="替身服务器每个请求的延迟（秒）")
+    parser.add_argument('-o', '--output', help="结果 JSON 写入的文件")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(items_min=args.items, items_max=args.items, page_size=args.items,
+                        latency=args.latency, assets=True)
+    server, search_url = start_stub_server(config)
+    results = {}
+    try:
+        for profile in PROFILES:
+            results[profile] = run_profile(profile, search_url, server, args.rounds)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    same = results['default'].pop('shows') == results['lean'].pop('shows')
+    print(f"{'':<18}" + ''.join(f'{profile:>12}' for profile in PROFILES))
+    for key in ('startup_ms', 'page_load_ms', 'ready_wait_ms', 'page_ready_ms', 'bytes_per_page',
+                'renderer_rss_mb', 'total_rss_mb'):
+        print(f"{key:<18}" + ''.join(f"{str(results[profile][key]):>12}" for profile in PROFILES))
+    print(f"提取结果一致: {same}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'rounds': args.rounds, 'items': args.items, 'latency': args.latency,
+                       'same_shows': same, 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+日期拆分与解析微基准（10 万条合成演出）
+
+对比旧实现（split + strptime 多次解析、每天一次 dict.copy）
+与 ShowRecord/ShowDay（一次解析、按天共享记录）的耗时和内存峰值。
+
+运行: python -m benchmarks.bench_date_processing
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data_processor import ShowDataProcessor
+from app.models.show_record import parse_show_dates
+
+SHOW_COUNT = 100_000
+
+
+def make_shows(count: int) -> list:
+    """生成合成演出：单日、带时间、同年范围和跨年范围各占一部分"""
+    start = date(2025, 1, 1)
+    shows = []
+    for i in range(count):
+        day = start + timedelta(days=i % 365)
+        kind = i % 4
+        if kind == 0:
+            date_str = day.strftime('%Y.%m.%d')
+        elif kind == 1:
+            date_str = day.strftime('%Y.%m.%d') + ' 19:30'
+        elif kind == 2:
+            date_str = day.strftime('%Y.%m.%d') + '-' + (day + timedelta(days=2)).strftime('%m.%d')
+        else:
+            date_str = '2024.12.31-01.02'
+        shows.append({
+            'name': f'演出 {i}',
+            'tag': '演唱会',
+            'city': '上海',
+            'venue': '场馆',
+            'lineup': '艺人',
+            'date': date_str,
+            'price': '380-1280',
+            'status': '售票中',
+            'detail_url': f'https://detail.damai.cn/item.htm?id={i}',
+            'poster': ''
+        })
+    return shows
+
+
+def legacy_process_date_range(shows):
+    """旧版 ShowDataProcessor.process_date_range"""
+    processed_shows = []
+    for show in shows:
+        date_str = show['date']
+        if '-' in date_str:
+            try:
+                date_parts = date_str.split('-')
+                start_date_str = date_parts[0].strip()
+                end_date_str = date_parts[1].strip()
+                year = start_date_str.split('.')[0]
+                start_month = start_date_str.split('.')[1]
+                start_day = start_date_str.split('.')[2]
+                end_parts = end_date_str.split('.')
+                start_date = datetime.strptime(f"{year}.{start_month}.{start_day}", '%Y.%m.%d')
+                end_date = datetime.strptime(f"{year}.{end_parts[0]}.{end_parts[1]}", '%Y.%m.%d')
+                current_date = start_date
+                while current_date <= end_date:
+                    show_copy = show.copy()
+                    show_copy['date'] = current_date.strftime('%Y.%m.%d')
+                    processed_shows.append(show_copy)
+                    current_date += timedelta(days=1)
+            except Exception:
+                processed_shows.append(show)
+        else:
+            processed_shows.append(show)
+    return processed_shows
+
+
+def legacy_pipeline(shows):
+    """旧路径：拆分后在查重和建行时各解析一次日期"""
+    rows = 0
+    for show in legacy_process_date_range(shows):
+        try:
+            for _ in range(2):
+                datetime.strptime(show['date'].split(' ')[0], '%Y.%m.%d').date()
+            rows += 1
+        except ValueError:
+            pass
+    return rows
+
+
+def record_pipeline(shows):
+    """新路径：每条演出解析一次，按天视图直接携带 date 对象"""
+    rows = 0
+    for show_day in ShowDataProcessor.iter_date_range(shows):
+        if show_day.show_date is not None:
+            rows += 1
+    return rows
+
+
+def materialized_peak(func, shows) -> int:
+    """保留全部拆分结果时的内存峰值（字节）"""
+    tracemalloc.start()
+    result = func(shows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main():
+    shows = make_shows(SHOW_COUNT)
+    print(f"合成演出 {SHOW_COUNT} 条")
+    for label, func in (('legacy', legacy_pipeline), ('record', record_pipeline)):
+        parse_show_dates.cache_clear()
+        started = time.perf_counter()
+        rows = func(shows)
+        elapsed = time.perf_counter() - started
+        print(f"{label:>8}: {rows} 行, {elapsed * 1000:.0f} ms")
+    legacy_peak = materialized_peak(legacy_process_date_range, shows)
+    record_peak = materialized_peak(lambda s: list(ShowDataProcessor.iter_date_range(s)), shows)
+    stream_peak = materialized_peak(record_pipeline, shows)
+    print(f"拆分结果内存峰值: legacy {legacy_peak / 1e6:.1f} MB, record {record_peak / 1e6:.1f} MB, "
+          f"record 流式 {stream_peak / 1e6:.1f} MB")
+    print("legacy 行数较少是因为跨年范围和带时间的日期在旧实现中解析失败")
+
+
+if __name__ == '__main__':
+    main()
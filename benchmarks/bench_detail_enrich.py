@@ -0,0 +1,100 @@
+"""
+详情页补全：逐个抓取与有界线程池并发抓取详情页的耗时，以及 ETag/TTL 缓存的效果
+
+本地替身服务器生成 --artists 个艺人的演出（每 3 条中有 1 条跨 --run-days 天、只在周末有场次），
+先经搜索接口取得全部搜索结果页，再按页调用 DetailEnricher.enrich：
+  - workers=1 / workers=N: 缓存为空时逐个与并发抓取
+  - cached: 缓存未过期，不发出请求
+  - revalidated: 缓存已过期（TTL=0），带 If-None-Match 请求，服务器返回 304
+同时比较按日期范围逐天展开与按详情页场次拆分得到的行数。
+
+运行: python -m benchmarks.bench_detail_enrich [--artists 10] [--items 60] [--latency 0.05] [--workers 8] [-o result.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+# 基准只测详情页的并发与缓存，不经过按站点限流
+os.environ.setdefault('CRAWLER_RATE_LIMIT', 'false')
+
+from app.crawler.http_spider import DamaiHttpCrawler
+from app.crawler.detail_pages import DetailEnricher, DetailCache
+from app.data_processor import ShowDataProcessor
+from benchmarks.damai_stub import StubConfig, start_stub_server
+
+
+def load_pages(search_url: str, artists: list) -> list:
+    crawler = DamaiHttpCrawler(search_base_url=search_url, detail_base_url=search_url.replace('search.html', 'item.htm'))
+    return [page for artist in artists for page in crawler.iter_search_pages(artist, max_pages=100)]
+
+
+def strip_sessions(pages: list):
+    for page in pages:
+        for show in page:
+            show.pop('sessions', None)
+
+
+def run_enrich(name: str, enricher: DetailEnricher, pages: list, server) -> dict:
+    strip_sessions(pages)
+    stats = server.RequestHandlerClass.stats
+    before = stats.snapshot()
+    started = time.perf_counter()
+    enriched = sum(enricher.enrich(page) for page in pages)
+    elapsed = time.perf_counter() - started
+    after = stats.snapshot()
+    return {
+        'mode': name,
+        'workers': enricher.max_workers,
+        'elapsed_s': round(elapsed, 3),
+        'enriched': enriched,
+        'requests': after.get('detail_requests', 0) - before.get('detail_requests', 0),
+        'not_modified': after.get('detail_not_modified', 0) - before.get('detail_not_modified', 0)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="详情页补全的并发与缓存")
+    parser.add_argument('--artists', type=int, default=10)
+    parser.add_argument('--items', type=int, default=60, help="每个艺人的演出数")
+    parser.add_argument('--run-days', type=int, default=21, help="跨天演出的日期范围天数")
+    parser.add_argument('--latency', type=float, default=0.05, help="替身服务器每个请求的延迟（秒）")
+    parser.add_argument('--workers', type=int, default=8, help="并发抓取的线程数")
+    parser.add_argument('-o', '--output', help="结果 JSON 写入的文件")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(items_min=args.items, items_max=args.items, run_days=args.run_days)
+    server, search_url = start_stub_server(config)
+    try:
+        pages = load_pages(search_url, [f'详情页测试艺人 {i}' for i in range(args.artists)])
+        config.latency = args.latency
+        shows = [show for page in pages for show in page]
+        heuristic_rows = len(ShowDataProcessor.process_date_range(shows))
+
+        results = [run_enrich('sequential', DetailEnricher(max_workers=1, cache=DetailCache()), pages, server)]
+        enricher = DetailEnricher(max_workers=args.workers, cache=DetailCache())
+        results.append(run_enrich('concurrent', enricher, pages, server))
+        session_rows = len(ShowDataProcessor.process_date_range(shows))
+        results.append(run_enrich('cached', enricher, pages, server))
+        enricher.cache.ttl = 0
+        results.append(run_enrich('revalidated', enricher, pages, server))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"演出 {len(shows)} 条: 按日期范围展开 {heuristic_rows} 行，按详情页场次 {session_rows} 行")
+    print(f"{'mode':<13}{'workers':>8}{'elapsed_s':>11}{'enriched':>10}{'requests':>10}{'304':>6}")
+    for result in results:
+        print(f"{result['mode']:<13}{result['workers']:>8}{result['elapsed_s']:>11}{result['enriched']:>10}"
+              f"{result['requests']:>10}{result['not_modified']:>6}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'shows': len(shows), 'heuristic_rows': heuristic_rows,
+                       'session_rows': session_rows, 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
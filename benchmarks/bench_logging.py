@@ -0,0 +1,104 @@
+"""
+上传路径在不同日志配置档下的耗时
+
+用 ShowBatchWriter 把合成演出写入临时 SQLite 文件（一半为重复数据），
+日志写入临时文件，比较以下配置：
+  debug            DEBUG 级别、SQL 日志、逐条明细全部输出、同步写出
+  debug+queue      同上，但经 QueueHandler 异步写出
+  production-1%    DEBUG 级别下逐条明细抽样 1%，无 SQL 日志，异步写出
+  production       INFO 级别，无 SQL 日志和逐条日志，异步写出
+
+运行: python -m benchmarks.bench_logging [演出条数]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config.database import Base
+from app.config.logging_config import setup_logging, stop_logging
+from app.data_processor import ShowDataProcessor
+from app.services.upload_service import ShowBatchWriter
+
+PROFILES = [
+    ('debug', {'LOG_PROFILE': 'debug'}),
+    ('debug+queue', {'LOG_PROFILE': 'debug', 'LOG_QUEUE': 'true'}),
+    ('production-1%', {'LOG_PROFILE': 'production', 'LOG_LEVEL': 'DEBUG', 'LOG_ROW_SAMPLE_RATE': '0.01'}),
+    ('production', {'LOG_PROFILE': 'production'}),
+]
+LOG_ENV_KEYS = ('LOG_PROFILE', 'LOG_LEVEL', 'LOG_SQL_ECHO', 'LOG_ROW_SAMPLE_RATE', 'LOG_QUEUE', 'LOG_FILE')
+
+
+def make_shows(count: int) -> list:
+    shows = []
+    for i in range(count):
+        shows.append({
+            'name': f'演出 {i % (count // 2 or 1)}',
+            'tag': '演唱会',
+            'city': '上海',
+            'venue': '场馆',
+            'lineup': '艺人',
+            'date': '2025.06.01',
+            'price': '380-1280',
+            'status': '售票中',
+            'detail_url': f'https://detail.damai.cn/item.htm?id={i}',
+            'poster': ''
+        })
+    return shows
+
+
+def run_profile(label: str, env: dict, shows: list, workdir: str) -> dict:
+    for key in LOG_ENV_KEYS:
+        os.environ.pop(key, None)
+    os.environ.update(env)
+    log_path = os.path.join(workdir, f'{label}.log')
+    handler = logging.FileHandler(log_path, encoding='utf-8')
+    setup_logging(force=True, handlers=[handler])
+
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, label + '.db')}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        started = time.perf_counter()
+        writer = ShowBatchWriter(db, 'bench', batch_size=200)
+        for show_data in ShowDataProcessor.iter_date_range(shows):
+            writer.add(show_data)
+        writer.flush()
+        elapsed = time.perf_counter() - started
+        # 异步写出时等待队列排空，单独统计
+        stop_logging()
+        drained = time.perf_counter() - started
+    finally:
+        db.close()
+        engine.dispose()
+        handler.close()
+    return {
+        'elapsed': elapsed,
+        'drained': drained,
+        'log_bytes': os.path.getsize(log_path),
+        'new': writer.new_count,
+        'skipped': writer.skip_count
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    shows = make_shows(count)
+    print(f"合成演出 {count} 条")
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, env in PROFILES:
+            result = run_profile(label, env, shows, workdir)
+            print(f"{label:>14}: 上传 {result['elapsed'] * 1000:7.0f} ms, "
+                  f"含日志排空 {result['drained'] * 1000:7.0f} ms, "
+                  f"日志 {result['log_bytes'] / 1024:8.0f} KB, "
+                  f"新增 {result['inserted']}, 跳过 {result['skipped']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+按站点限流：固定并发与 AIMD 自适应并发在会限流的站点上的有效吞吐
+
+本地替身服务器最近 1 秒内的搜索请求超过 --throttle-rps 时返回 429（或验证页 / 空响应），
+--threads 个线程并发抓取同一批艺人（HTTP 后端，不需要 Chrome），被限流的艺人按 --retry-delay 退避后重试，
+最多 --attempts 次，与 worker 的任务重试一致。
+  - fixed: CRAWLER_RATE_LIMIT=false，线程数即并发数，只识别限流
+  - adaptive: 令牌桶 + AIMD，从 --threads 的并发上限开始按限流信号收缩、按成功恢复
+报告完成的艺人数、有效吞吐（成功页数/秒）、被限流的请求数和最终的并发上限。
+
+运行: python -m benchmarks.bench_rate_limit [--artists 60] [--threads 16] [--throttle-rps 20] [-o result.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app.crawler import rate_limiter
+from app.crawler.http_spider import DamaiHttpCrawler
+from app.crawler.rate_limiter import ThrottledError
+from benchmarks.damai_stub import StubConfig, start_stub_server
+
+
+def crawl_artist(crawler, artist: str, args, counts: dict, lock: threading.Lock):
+    for attempt in range(args.attempts):
+        pages = 0
+        try:
+            for _ in crawler.iter_search_pages(artist, args.max_pages):
+                pages += 1
+        except ThrottledError:
+            with lock:
+                counts['throttled_attempts'] += 1
+                counts['wasted_pages'] += pages
+            time.sleep(args.retry_delay * (attempt + 1))
+            continue
+        with lock:
+            counts['pages'] += pages
+            counts['completed' if pages else 'empty'] += 1
+        return
+    with lock:
+        counts['failed'] += 1
+
+
+def run_mode(mode: str, args) -> dict:
+    rate_limiter.RATE_LIMIT_ENABLED = mode == 'adaptive'
+    rate_limiter.reset_host_limiters()
+    os.environ.update({
+        'CRAWLER_RATE_PER_HOST': str(args.rate),
+        'CRAWLER_RATE_BURST': str(args.burst),
+        'CRAWLER_MAX_CONCURRENCY': str(args.threads),
+        'CRAWLER_INITIAL_CONCURRENCY': str(args.threads),
+        'CRAWLER_THROTTLE_COOLDOWN': str(args.cooldown)
+    })
+    config = StubConfig(items_min=args.items, items_max=args.items, latency=args.latency,
+                        throttle_rps=args.throttle_rps, throttle_mode=args.throttle_mode)
+    server, search_url = start_stub_server(config)
+    crawler = DamaiHttpCrawler(search_base_url=search_url, timeout=10)
+    counts = {'completed': 0, 'empty': 0, 'failed': 0, 'pages': 0, 'throttled_attempts': 0, 'wasted_pages': 0}
+    lock = threading.Lock()
+    artists = [f'{mode} 限流测试艺人 {i}' for i in range(args.artists)]
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            for future in [executor.submit(crawl_artist, crawler, artist, args, counts, lock) for artist in artists]:
+                future.result()
+        elapsed = time.perf_counter() - started
+        stub_stats = server.RequestHandlerClass.stats.snapshot()
+    finally:
+        server.shutdown()
+        server.server_close()
+    limits = rate_limiter.get_limiter_stats()
+    return {
+        'mode': mode,
+        'elapsed_s': round(elapsed, 2),
+        **counts,
+        'goodput_pages_per_s': round(counts['pages'] / elapsed, 2),
+        'artists_per_s': round(counts['completed'] / elapsed, 2),
+        'throttled_responses': stub_stats.get('throttled', 0),
+        'limiter': next(iter(limits.values()), None)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="固定并发与自适应并发在限流站点上的有效吞吐")
+    parser.add_argument('--modes', default='fixed,adaptive')
+    parser.add_argument('--artists', type=int, default=60)
+    parser.add_argument('--threads', type=int, default=16, help="抓取线程数（固定模式下的并发数和自适应模式的并发上限）")
+    parser.add_argument('--items', type=int, default=60, help="每个艺人的演出数（分页）")
+    parser.add_argument('--max-pages', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05, help="替身服务器每个请求的延迟（秒）")
+    parser.add_argument('--throttle-rps', type=float, default=20, help="替身服务器每秒容忍的请求数")
+    parser.add_argument('--throttle-mode', choices=['429', 'captcha', 'empty'], default='429')
+    parser.add_argument('--rate', type=float, default=60, help="自适应模式并发上限为最大值时的每秒请求数")
+    parser.add_argument('--burst', type=float, default=2, help="自适应模式令牌桶最多累积的请求数")
+    parser.add_argument('--cooldown', type=float, default=1.0, help="多次限流只降低一次并发上限的时间窗（秒）")
+    parser.add_argument('--attempts', type=int, default=3, help="每个艺人的最大尝试次数")
+    parser.add_argument('--retry-delay', type=float, default=1.0, help="被限流后的重试退避（秒，按次数线性增加）")
+    parser.add_argument('-o', '--output', help="结果 JSON 写入的文件")
+    args = parser.parse_args(argv)
+
+    results = [run_mode(mode, args) for mode in args.modes.split(',')]
+    print(f"{'mode':<10}{'elapsed_s':>10}{'done':>6}{'failed':>8}{'pages/s':>10}{'throttled':>11}{'limit':>7}")
+    for result in results:
+        limit = result['limiter']['limit'] if result['limiter'] else '-'
+        print(f"{result['mode']:<10}{result['elapsed_s']:>10}{result['completed']:>6}{result['failed']:>8}"
+              f"{result['goodput_pages_per_s']:>10}{result['throttled_responses']:>11}{limit:>7}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
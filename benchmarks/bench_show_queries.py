@@ -0,0 +1,154 @@
+"""
+演出列表查询基准（默认 100 万行 SQLite）
+
+在临时 SQLite 文件中生成演出数据，分别在无索引和有复合索引时比较：
+  - OFFSET 分页与游标（keyset）分页翻到深页的耗时（单个艺人、全部演出）
+  - 按城市 + 日期范围查询
+  - 响应缓存命中的耗时
+
+运行: python -m benchmarks.bench_show_queries [行数]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.models.show import Show
+from app.services.show_query import ShowQueryService, ShowQueryCache, SHOW_FIELDS, encode_cursor
+
+ARTISTS = 1000
+CITIES = 300
+PAGE_SIZE = 50
+DEEP_PAGE = 15
+GLOBAL_DEEP_PAGE = 10000
+REPEAT = 20
+
+
+def build_database(path: str, rows: int):
+    """用 sqlite3 直接批量写入，建表语句取自 Show 模型（不含索引）"""
+    engine = create_engine(f"sqlite:///{path}")
+    Show.__table__.create(engine)
+    for index in Show.__table__.indexes:
+        index.drop(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    start = date(2024, 1, 1)
+    rng = random.Random(0)
+    columns = [c for c in SHOW_FIELDS if c != 'id'] + ['created_at']
+    sql = f"INSERT INTO shows ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    batch = []
+    for i in range(rows):
+        batch.append((
+            f'演出 {i}', f'艺人 {i % ARTISTS}', '演唱会', f'城市 {rng.randrange(CITIES)}', '场馆', '阵容',
+            (start + timedelta(days=rng.randrange(730))).isoformat(), '380-1280',
+            rng.choice(('售票中', '预售', '已结束')), f'https://detail.damai.cn/item.htm?id={i}', '', '2024-01-01'
+        ))
+        if len(batch) >= 50000:
+            conn.executemany(sql, batch)
+            batch = []
+    conn.executemany(sql, batch)
+    conn.commit()
+    conn.close()
+
+
+def create_indexes(engine):
+    for index in Show.__table__.indexes:
+        index.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def timed(func, repeat: int = REPEAT) -> float:
+    """返回多次执行的中位数耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def offset_page(db, artist: str, page: int):
+    query = select(*(getattr(Show, f) for f in SHOW_FIELDS))
+    if artist is not None:
+        query = query.where(Show.artist == artist)
+    query = query.order_by(Show.date, Show.id).offset(page * PAGE_SIZE).limit(PAGE_SIZE)
+    return db.execute(query).all()
+
+
+def keyset_cursor(db, artist: str, page: int):
+    """翻到第 page 页所需的游标（准备阶段，不计时）"""
+    cursor = None
+    for _ in range(page):
+        cursor = ShowQueryService.list_shows(db, artist=artist, cursor=cursor, limit=PAGE_SIZE)['next_cursor']
+    return cursor
+
+
+def global_deep_cursor(db):
+    """不限条件按日期排序时第 GLOBAL_DEEP_PAGE 页的游标，直接取上一页最后一行"""
+    last = offset_page(db, None, GLOBAL_DEEP_PAGE - 1)[-1]
+    return encode_cursor(date.fromisoformat(str(last.date)), last.id)
+
+
+def run_queries(db, label: str):
+    artist = '艺人 7'
+    cursor = keyset_cursor(db, artist, DEEP_PAGE)
+    global_cursor = global_deep_cursor(db)
+    results = {
+        '第 1 页 OFFSET': timed(lambda: offset_page(db, artist, 0)),
+        f'第 {DEEP_PAGE + 1} 页 OFFSET': timed(lambda: offset_page(db, artist, DEEP_PAGE)),
+        '第 1 页 游标': timed(lambda: ShowQueryService.list_shows(db, artist=artist, limit=PAGE_SIZE)),
+        f'第 {DEEP_PAGE + 1} 页 游标': timed(
+            lambda: ShowQueryService.list_shows(db, artist=artist, cursor=cursor, limit=PAGE_SIZE)
+        ),
+        '全部 第 1 页 OFFSET': timed(lambda: offset_page(db, None, 0), repeat=5),
+        f'全部 第 {GLOBAL_DEEP_PAGE + 1} 页 OFFSET': timed(lambda: offset_page(db, None, GLOBAL_DEEP_PAGE), repeat=5),
+        f'全部 第 {GLOBAL_DEEP_PAGE + 1} 页 游标': timed(
+            lambda: ShowQueryService.list_shows(db, cursor=global_cursor, limit=PAGE_SIZE), repeat=5
+        ),
+        '城市 + 日期范围': timed(lambda: ShowQueryService.list_shows(
+            db, city='城市 42', date_from=date(2024, 6, 1), date_to=date(2024, 9, 1), limit=PAGE_SIZE
+        )),
+    }
+    print(f"\n[{label}]")
+    for name, elapsed in results.items():
+        print(f"  {name:<20} {elapsed:9.2f} ms")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'shows.db')
+        started = time.perf_counter()
+        build_database(path, rows)
+        print(f"生成 {rows} 行用时 {time.perf_counter() - started:.1f} 秒")
+
+        engine = create_engine(f"sqlite:///{path}")
+        db = sessionmaker(bind=engine)()
+        run_queries(db, '无索引')
+
+        started = time.perf_counter()
+        create_indexes(engine)
+        print(f"\n创建复合索引用时 {time.perf_counter() - started:.1f} 秒")
+        run_queries(db, '复合索引')
+
+        cache = ShowQueryCache(ttl=60)
+        key = cache.make_key({'artist': '艺人 7'})
+        body = str(ShowQueryService.list_shows(db, artist='艺人 7', limit=PAGE_SIZE)).encode('utf-8')
+        cache.put(key, '艺人 7', cache.generation('艺人 7'), body)
+        print(f"\n响应缓存命中 {timed(lambda: cache.get(key), repeat=1000):9.4f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+UploadService 写入路径基准测试（SQLite）
+
+对比逐行查重 + db.add 的旧路径与批量查重 + 多行 INSERT 的新路径，
+统计不同批量下的数据库往返次数与耗时。
+
+运行: python -m benchmarks.bench_upload
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import Base
+from app.models.show import Show
+from app.services.upload_service import UploadService
+
+BATCH_SIZES = [100, 1000, 5000]
+
+
+def make_shows(count: int, offset: int = 0) -> list:
+    """生成测试用演出数据"""
+    start = date(2025, 1, 1)
+    shows = []
+    for i in range(offset, offset + count):
+        shows.append({
+            'name': f'测试演唱会 {i % 97}',
+            'tag': '演唱会',
+            'city': ['北京', '上海', '广州', '深圳'][i % 4],
+            'venue': f'场馆 {i % 13}',
+            'lineup': '测试艺人',
+            'date': (start + timedelta(days=i)).strftime('%Y.%m.%d'),
+            'price': '380-1280',
+            'status': '售票中',
+            'detail_url': f'https://detail.damai.cn/item.htm?id={i}',
+            'poster': f'https://img.alicdn.com/{i}.jpg'
+        })
+    return shows
+
+
+def legacy_upload(db, shows: list, artist: str):
+    """旧路径：每行一次查重查询 + 一次 db.add"""
+    new_count = skip_count = 0
+    for show_data in shows:
+        if UploadService.is_duplicate(db, show_data):
+            skip_count += 1
+            continue
+        db.add(Show(**UploadService.build_show_row(show_data, artist)))
+        new_count += 1
+    db.commit()
+    return new_count, skip_count
+
+
+def bulk_upload(db, shows: list, artist: str):
+    """新路径：批量查重 + 多行 INSERT"""
+    counts = UploadService.bulk_insert_shows(db, shows, artist)
+    db.commit()
+    return counts
+
+
+def run_case(upload, size: int):
+    """在新的 SQLite 库上运行一次上传，一半数据预先存在"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        
+        existing = make_shows(size // 2)
+        with Session() as db:
+            UploadService.bulk_insert_shows(db, existing, 'bench')
+            db.commit()
+        
+        statements = [0]
+        
+        @event.listens_for(engine, 'before_cursor_execute')
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements[0] += 1
+        
+        shows = make_shows(size)
+        with Session() as db:
+            started = time.perf_counter()
+            new_count, skip_count = upload(db, shows, 'bench')
+            elapsed = time.perf_counter() - started
+        engine.dispose()
+        return new_count, skip_count, statements[0], elapsed
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'批量':>6} {'路径':>8} {'新增':>6} {'跳过':>6} {'往返':>6} {'耗时(ms)':>10}")
+    for size in BATCH_SIZES:
+        for label, upload in (('legacy', legacy_upload), ('bulk', bulk_upload)):
+            new_count, skip_count, round_trips, elapsed = run_case(upload, size)
+            print(f"{size:>6} {label:>8} {new_count:>6} {skip_count:>6} {round_trips:>6} {elapsed * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
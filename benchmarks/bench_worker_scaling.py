@@ -0,0 +1,151 @@
+"""
+多进程 worker 扩展性：同一批艺人任务由 1、2、4 个 worker.py 进程处理时的吞吐
+
+每轮使用新的 SQLite 文件数据库和本地替身服务器（HTTP 后端，不需要 Chrome），
+每个 worker 都领取过预热任务后再入队，计时到全部任务完成，报告吞吐（艺人/秒）和相对 1 个 worker 的扩展效率。
+替身服务器的延迟模拟真实搜索页的网络等待，爬取以等待为主时吞吐应接近线性增长；
+SQLite 同一时刻只允许一个写事务，worker 较多时写库会成为瓶颈，MySQL 上扩展性更好。
+
+运行: python -m benchmarks.bench_worker_scaling [--workers 1,2,4] [--artists 40] [--concurrency 1] [-o result.json]
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import create_engine
+from app.models.crawl_task import CrawlTask  # noqa: F401  注册 crawl_tasks 表
+from app.services.upload_service import UploadService
+from app.services.task_queue import SqlTaskQueue
+from benchmarks.damai_stub import StubConfig, start_stub_server
+
+
+def start_workers(count: int, concurrency: int, env: dict) -> list:
+    return [
+        subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'worker.py'), '--concurrency', str(concurrency),
+             '--poll-interval', '0.05', '--worker-id', f'bench-{i}'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        for i in range(count)
+    ]
+
+
+def stop_workers(processes: list):
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def wait_finished(task_queue, job_id: str, processes: list, timeout: float) -> dict:
+    started = time.perf_counter()
+    while True:
+        job = task_queue.get_job(job_id)
+        if job['status'] == 'finished':
+            return job
+        for process in processes:
+            if process.poll() is not None:
+                raise RuntimeError(f"worker 已退出: {process.stderr.read().decode('utf-8', 'replace')}")
+        if time.perf_counter() - started > timeout:
+            raise RuntimeError(f"{timeout}s 内未完成: {job['counts']}")
+        time.sleep(0.05)
+
+
+def wait_ready(task_queue, processes: list, timeout: float):
+    """入队预热任务，直到每个 worker 都领取过任务，导入与启动耗时不计入吞吐"""
+    seen = set()
+    round_index = 0
+    while len(seen) < len(processes):
+        job_id = f'warmup-{round_index}'
+        task_queue.enqueue(job_id, [f'预热艺人 {round_index}-{i}' for i in range(len(processes))])
+        job = wait_finished(task_queue, job_id, processes, timeout)
+        seen.update(artist['worker_id'] for artist in job['artists'])
+        round_index += 1
+
+
+def run_round(workers: int, args, search_url: str) -> dict:
+    with tempfile.TemporaryDirectory(prefix='bench-workers-') as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'shows.db')}"
+        engine = create_engine(database_url)
+        with engine.begin() as conn:
+            UploadService.upgrade_schema(conn)
+        task_queue = SqlTaskQueue(engine)
+        env = dict(
+            os.environ, DATABASE_URL=database_url, DATA_SAVE_PATH=tmp, SEARCH_BASE_URL=search_url,
+            CRAWLER_BACKEND='http', DRIVER_POOL_WARM='0', LOG_LEVEL='ERROR',
+            LOG_FILE='', SEARCH_CACHE_TTL='0'
+        )
+        processes = start_workers(workers, args.concurrency, env)
+        try:
+            wait_ready(task_queue, processes, args.timeout)
+            artists = [f'扩展性测试艺人 {i}' for i in range(args.artists)]
+            started = time.perf_counter()
+            task_queue.enqueue('bench', artists)
+            job = wait_finished(task_queue, 'bench', processes, args.timeout)
+            elapsed = time.perf_counter() - started
+        finally:
+            stop_workers(processes)
+        rows = sum((artist['changes'] or {}).get('inserted', 0) for artist in job['artists'])
+        by_worker = {}
+        for artist in job['artists']:
+            by_worker[artist['worker_id']] = by_worker.get(artist['worker_id'], 0) + 1
+        engine.dispose()
+        return {
+            'workers': workers,
+            'elapsed_s': round(elapsed, 2),
+            'artists_per_s': round(args.artists / elapsed, 2),
+            'rows_inserted': rows,
+            'counts': job['counts'],
+            'tasks_per_worker': by_worker
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多进程 worker 扩展性")
+    parser.add_argument('--workers', default='1,2,4', help="逗号分隔的 worker 进程数")
+    parser.add_argument('--artists', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=1, help="每个 worker 的线程数")
+    parser.add_argument('--items', type=int, default=60, help="每个艺人的演出数（分页）")
+    parser.add_argument('--latency', type=float, default=0.3, help="替身服务器每个请求的延迟（秒）")
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('-o', '--output', help="结果 JSON 写入的文件")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(items_min=args.items, items_max=args.items, latency=args.latency)
+    server, search_url = start_stub_server(config)
+    results = []
+    try:
+        for workers in [int(value) for value in args.workers.split(',')]:
+            results.append(run_round(workers, args, search_url))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    base = results[0]['artists_per_s'] / results[0]['workers']
+    print(f"{'workers':>8}{'elapsed_s':>12}{'artists/s':>12}{'efficiency':>12}{'rows':>8}")
+    for result in results:
+        result['efficiency'] = round(result['artists_per_s'] / (base * result['workers']), 2)
+        print(f"{result['workers']:>8}{result['elapsed_s']:>12}{result['artists_per_s']:>12}"
+              f"{result['efficiency']:>12}{result['rows_inserted']:>8}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'artists': args.artists, 'concurrency': args.concurrency, 'latency': args.latency,
+                       'items': args.items, 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
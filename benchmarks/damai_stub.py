@@ -0,0 +1,415 @@
+"""
+本地大麦替身服务器，用于压测完整的 /crawler/update 路径而不访问 damai.cn
+
+提供与真实站点相同路径的两个入口：
+  /search.html?keyword=...&page=N            搜索结果页 HTML（结构与 fixtures/damai/search_basic.html 相同，
+                                              带 a.next-page 翻页链接，Selenium 后端也能逐页抓取）
+  /searchajax.html?keyword=...&currPage=N    搜索页使用的 JSON 接口（HTTP 后端）
+  /item.htm?id=...                           详情页，场次和票档放在 #dataDefault 中，支持 ETag 条件请求
+  /stats                                     替身服务器自身的请求、错误计数
+  /assets/...                                --assets 时页面引用的海报图片、样式表、字体和统计脚本，
+                                              用于比较浏览器配置（见 benchmarks/bench_browser_profile.py）
+
+每个艺人的演出由艺人名确定性生成（数量在 --items-min ~ --items-max 之间），
+重复抓取同一艺人得到相同的数据；可配置固定延迟、随机抖动和错误率。
+跨天演出在详情页中只在范围内的周末有场次（范围内没有周末时只有第一天），--run-days 设置跨天演出的天数。
+--throttle-rps 模拟站点限流：最近 1 秒内的请求数超过该值时，按 --throttle-mode 返回
+429、验证页（captcha）或没有数据的空响应（empty）。
+
+运行:
+  python -m benchmarks.damai_stub --port 8900 --latency 0.2 --jitter 0.1 --error-rate 0.02
+  SEARCH_BASE_URL=http://127.0.0.1:8900/search.html CRAWLER_BACKEND=http python run.py
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+import urllib.parse
+from html import escape
+from collections import deque
+from datetime import date, datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CITIES = ['北京', '上海', '广州', '深圳', '成都', '杭州', '武汉', '南京', '西安', '重庆']
+CATEGORIES = ['演唱会', '音乐节', 'Livehouse', '话剧']
+STATUSES = ['售票中', '预售', '已售罄', '即将开抢']
+
+
+class StubConfig:
+    """替身服务器的行为参数，运行中可直接修改属性"""
+    def __init__(self, items_min: int = 30, items_max: int = 90, page_size: int = 30, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503, seed: int = 0,
+                 assets: bool = False, throttle_rps: float = 0, throttle_mode: str = '429', run_days: int = 2):
+        self.items_min = items_min
+        self.items_max = max(items_min, items_max)
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        # 页面引用本服务器上的静态资源，模拟真实搜索页的图片、字体和样式表
+        self.assets = assets
+        # 每秒容忍的搜索请求数，0 表示不限流；throttle_mode 为 429 / captcha / empty
+        self.throttle_rps = throttle_rps
+        self.throttle_mode = throttle_mode
+        # 跨天演出（每 3 条中的 1 条）的日期范围天数
+        self.run_days = max(2, run_days)
+
+
+def artist_seed(artist: str, seed: int = 0) -> int:
+    return zlib.crc32(artist.encode('utf-8')) ^ seed
+
+
+def artist_item_count(artist: str, config: StubConfig) -> int:
+    span = config.items_max - config.items_min + 1
+    return config.items_min + artist_seed(artist, config.seed) % span
+
+
+# projectid -> (艺人, 序号)，详情页据此重新生成演出
+ITEM_INDEX = {}
+
+
+def make_item(artist: str, index: int, config: StubConfig) -> dict:
+    """生成一条搜索接口格式的演出（字段与 fixtures/damai/search_ajax.json 相同）"""
+    rng = random.Random(artist_seed(artist, config.seed) * 100003 + index)
+    city = CITIES[rng.randrange(len(CITIES))]
+    day = date.today() + timedelta(days=7 + rng.randrange(365))
+    if index % 3 == 0:
+        showtime = day.strftime('%Y.%m.%d') + '-' + (day + timedelta(days=config.run_days - 1)).strftime('%m.%d')
+    elif index % 3 == 1:
+        showtime = day.strftime('%Y.%m.%d') + ' 19:30'
+    else:
+        showtime = day.strftime('%Y.%m.%d')
+    low = rng.choice((180, 280, 380, 480))
+    projectid = 700000000000 + artist_seed(artist, config.seed) % 10_000_000 * 1000 + index
+    ITEM_INDEX[projectid] = (artist, index)
+    return {
+        'projectid': projectid,
+        'name': f'<span class="search_highlight">{artist}</span> 巡回演唱会-{city}站 {index + 1}',
+        'nameNoHtml': f'{artist} 巡回演唱会-{city}站 {index + 1}',
+        'actors': f'<span class="search_highlight">{artist}</span>',
+        'categoryname': CATEGORIES[index % len(CATEGORIES)],
+        'cityname': city,
+        'venue': f'{city}体育馆 {rng.randrange(20)}号厅',
+        'venuecity': city,
+        'showtime': showtime,
+        'price_str': f'{low}-{low + 900}元',
+        'showstatus': rng.choice(STATUSES),
+        'verticalPic': f'https://img.alicdn.com/stub/{artist_seed(artist)}-{index}.jpg'
+    }
+
+
+def artist_page(artist: str, page: int, config: StubConfig, page_size: int = None):
+    """返回 (本页演出, 总页数)"""
+    page_size = page_size or config.page_size
+    total = artist_item_count(artist, config)
+    total_pages = max(1, (total + page_size - 1) // page_size)
+    start = (page - 1) * page_size
+    items = [make_item(artist, i, config) for i in range(start, min(start + page_size, total))]
+    return items, total_pages
+
+
+def item_sessions(item: dict) -> list:
+    """详情页中的场次: [(日期, 时间)]，跨天演出只在周末有场次，周六加演下午场"""
+    showtime = item['showtime']
+    start = datetime.strptime(showtime[:10], '%Y.%m.%d').date()
+    if not showtime[10:].startswith('-'):
+        return [(start, showtime[10:].strip() or '19:30')]
+    end = datetime.strptime(f"{start.year}.{showtime[11:]}", '%Y.%m.%d').date()
+    if end < start:
+        end = end.replace(year=start.year + 1)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    weekend = [day for day in days if day.weekday() >= 4] or [start]
+    sessions = []
+    for day in weekend:
+        if day.weekday() == 5:
+            sessions.append((day, '14:00'))
+        sessions.append((day, '19:30'))
+    return sessions
+
+
+def render_detail_page(item: dict) -> str:
+    low = int(item['price_str'].split('-')[0])
+    sku_list = [{'priceName': f'{price}元', 'price': f'{price}.00'} for price in range(low, low + 901, 300)]
+    weekdays = '一二三四五六日'
+    bases = {}
+    for day, time_text in item_sessions(item):
+        base = bases.setdefault(day, {'name': f"{day.isoformat()} 周{weekdays[day.weekday()]}", 'performs': []})
+        base['performs'].append({
+            'performId': len(base['performs']),
+            'performName': f"{base['name']} {time_text}",
+            'skuList': sku_list
+        })
+    data = {'itemId': item['projectid'], 'itemName': item['nameNoHtml'], 'performBases': list(bases.values())}
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{escape(item['nameNoHtml'])}</title>
+</head>
+<body>
+<div class="perform__order__box"><div class="title">{escape(item['nameNoHtml'])}</div></div>
+<div id="dataDefault" style="display: none;">{escape(json.dumps(data, ensure_ascii=False), quote=False)}</div>
+</body>
+</html>
+"""
+
+
+# 静态资源的大小（字节），与真实搜索页上同类资源的量级相当
+ASSET_SIZES = {
+    'poster': 60_000,
+    'site.css': 120_000,
+    'iconfont.woff2': 80_000,
+    'tracker.js': 40_000,
+}
+ASSET_TYPES = {
+    'poster': 'image/jpeg',
+    'site.css': 'text/css',
+    'iconfont.woff2': 'font/woff2',
+    'tracker.js': 'application/javascript',
+}
+
+
+def asset_body(name: str) -> bytes:
+    if name == 'site.css':
+        rule = b"@font-face{font-family:icon;src:url(/assets/iconfont.woff2)}.items{margin:4px;font-family:icon}\n"
+        return (rule * (ASSET_SIZES[name] // len(rule) + 1))[:ASSET_SIZES[name]]
+    if name == 'tracker.js':
+        line = b"var __stub_tracker = (window.__stub_tracker || 0) + 1;\n"
+        return (line * (ASSET_SIZES[name] // len(line) + 1))[:ASSET_SIZES[name]]
+    return b'\0' * ASSET_SIZES[name]
+
+
+def render_item(item: dict, assets: bool = False) -> str:
+    url = f"https://detail.damai.cn/item.htm?id={item['projectid']}"
+    poster = f"/assets/poster-{item['projectid']}.jpg" if assets else item['verticalPic']
+    return f"""    <div class="items">
+      <a href="{url}" target="_blank" class="items__img">
+        <img src="{escape(poster)}" alt="">
+        <span class="items__img__tag">{escape(item['categoryname'])}</span>
+      </a>
+      <div class="items__txt">
+        <div class="items__txt__title"><span>【{escape(item['cityname'])}】</span><a href="{url}" target="_blank">{escape(item['nameNoHtml'])}</a></div>
+        <div class="items__txt__time">艺人：{escape(item['actors'].replace('<span class="search_highlight">', '').replace('</span>', ''))}</div>
+        <div class="items__txt__time">{escape(item['cityname'])} | {escape(item['venue'])}</div>
+        <div class="items__txt__time">{escape(item['showtime'])}</div>
+        <div class="items__txt__price"><span>{escape(item['price_str'])}</span>{escape(item['showstatus'])}</div>
+      </div>
+    </div>
+"""
+
+
+def render_search_page(artist: str, page: int, config: StubConfig) -> str:
+    items, total_pages = artist_page(artist, page, config)
+    if items:
+        body = '  <div class="item__main">\n' + ''.join(render_item(item, config.assets) for item in items) + '  </div>\n'
+    else:
+        body = '  <div class="search__nodata">没有找到相关演出</div>\n'
+    if page < total_pages:
+        query = urllib.parse.urlencode({'keyword': artist, 'page': page + 1})
+        body += f'  <div class="pagination"><a class="next-page" href="?{query}">下一页</a></div>\n'
+    head = ''
+    if config.assets:
+        head = ('<link rel="stylesheet" href="/assets/site.css">\n'
+                '<script src="/assets/tracker.js"></script>\n')
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{escape(artist)} - 大麦搜索</title>
+{head}</head>
+<body>
+<div class="search__main">
+{body}</div>
+</body>
+</html>
+"""
+
+
+class StubStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def inc(self, key: str, amount: int = 1):
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+class RequestWindow:
+    """最近 1 秒内的请求时间，用于模拟按请求速率限流"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._times = deque()
+
+    def hit(self, now: float) -> int:
+        with self._lock:
+            self._times.append(now)
+            while self._times and self._times[0] <= now - 1.0:
+                self._times.popleft()
+            return len(self._times)
+
+
+CAPTCHA_PAGE = b"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>\xe9\xaa\x8c\xe8\xaf\x81</title>
+<script>window._config_ = {"action": "captcha", "x5secdata": "stub"};</script></head>
+<body><div id="nc_1_wrapper" class="baxia-dialog">\xe8\xaf\xb7\xe6\x8b\x96\xe5\x8a\xa8\xe6\xbb\x91\xe5\x9d\x97</div></body></html>
+"""
+
+
+class DamaiStubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    stats = StubStats()
+    window = RequestWindow()
+    protocol_version = 'HTTP/1.1'
+
+    def _throttle(self, api: bool):
+        self.stats.inc('throttled')
+        mode = self.config.throttle_mode
+        if mode == 'captcha':
+            return self._send(200, 'text/html; charset=utf-8', CAPTCHA_PAGE)
+        if mode == 'empty':
+            if api:
+                return self._send(200, 'application/json;charset=UTF-8', b'{}')
+            return self._send(200, 'text/html; charset=utf-8', b'<!DOCTYPE html><html><body></body></html>')
+        return self._send(429, 'text/plain', b'too many requests')
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed.query)
+        if parsed.path == '/stats':
+            return self._send(200, 'application/json', json.dumps(self.stats.snapshot()).encode('utf-8'))
+
+        if parsed.path.startswith('/assets/'):
+            name = parsed.path[len('/assets/'):]
+            name = 'poster' if name.startswith('poster-') else name
+            if name not in ASSET_SIZES:
+                return self._send(404, 'text/plain', b'not found')
+            self.stats.inc('asset_requests')
+            self.stats.inc('asset_bytes', ASSET_SIZES[name])
+            return self._send(200, ASSET_TYPES[name], asset_body(name))
+
+        config = self.config
+        delay = config.latency + (random.uniform(-config.jitter, config.jitter) if config.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        if config.error_rate and random.random() < config.error_rate:
+            self.stats.inc('errors')
+            return self._send(config.error_status, 'text/plain', b'stub error')
+
+        api = parsed.path.endswith('/searchajax.html')
+        if config.throttle_rps and (api or parsed.path.endswith('/search.html')):
+            if self.window.hit(time.monotonic()) > config.throttle_rps:
+                return self._throttle(api)
+
+        if parsed.path.endswith('/item.htm'):
+            return self._detail(query)
+
+        keyword = (query.get('keyword') or [''])[0]
+        if api:
+            self.stats.inc('api_requests')
+            page = int((query.get('currPage') or ['1'])[0])
+            page_size = int((query.get('pageSize') or [str(config.page_size)])[0])
+            items, total_pages = artist_page(keyword, page, config, page_size)
+            payload = {'pageData': {
+                'currentPage': page,
+                'totalPage': total_pages,
+                'totalResults': artist_item_count(keyword, config),
+                'resultData': items
+            }}
+            return self._send(200, 'application/json;charset=UTF-8',
+                              json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+        if parsed.path.endswith('/search.html'):
+            self.stats.inc('html_requests')
+            page = int((query.get('page') or ['1'])[0])
+            html = render_search_page(keyword, page, config).encode('utf-8')
+            self.stats.inc('html_bytes', len(html))
+            return self._send(200, 'text/html; charset=utf-8', html)
+        self._send(404, 'text/plain', b'not found')
+
+    def _detail(self, query: dict):
+        self.stats.inc('detail_requests')
+        projectid = int((query.get('id') or ['0'])[0] or 0)
+        if projectid not in ITEM_INDEX:
+            return self._send(404, 'text/plain', b'not found')
+        artist, index = ITEM_INDEX[projectid]
+        html = render_detail_page(make_item(artist, index, self.config)).encode('utf-8')
+        etag = f'"{zlib.crc32(html):08x}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.stats.inc('detail_not_modified')
+            return self._send(304, None, b'', {'ETag': etag})
+        self.stats.inc('detail_bytes', len(html))
+        return self._send(200, 'text/html; charset=utf-8', html, {'ETag': etag})
+
+    def _send(self, status: int, content_type: str, body: bytes, headers: dict = None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(config: StubConfig = None, host: str = '127.0.0.1', port: int = 0):
+    """
+    在后台线程启动替身服务器
+    :return: (server, 搜索页地址)，停止时调用 server.shutdown()
+    """
+    handler = type('Handler', (DamaiStubHandler,), {
+        'config': config or StubConfig(), 'stats': StubStats(), 'window': RequestWindow()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='damai-stub', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/search.html"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地大麦替身服务器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.getenv('DAMAI_STUB_PORT', '8900')))
+    parser.add_argument('--items-min', type=int, default=30, help="每个艺人最少演出数")
+    parser.add_argument('--items-max', type=int, default=90, help="每个艺人最多演出数")
+    parser.add_argument('--page-size', type=int, default=30, help="HTML 搜索页每页条数（接口按请求的 pageSize）")
+    parser.add_argument('--latency', type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.0, help="延迟的随机抖动幅度（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回错误的比例，0~1")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--seed', type=int, default=0, help="改变后所有艺人生成不同的演出")
+    parser.add_argument('--assets', action='store_true', help="页面引用本地的海报、样式表、字体和统计脚本")
+    parser.add_argument('--throttle-rps', type=float, default=0, help="每秒容忍的搜索请求数，0 表示不限流")
+    parser.add_argument('--throttle-mode', choices=['429', 'captcha', 'empty'], default='429')
+    parser.add_argument('--run-days', type=int, default=2, help="跨天演出的日期范围天数")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(args.items_min, args.items_max, args.page_size, args.latency, args.jitter,
+                        args.error_rate, args.error_status, args.seed, args.assets,
+                        args.throttle_rps, args.throttle_mode, args.run_days)
+    server, search_url = start_stub_server(config, args.host, args.port)
+    print(f"替身服务器已启动: SEARCH_BASE_URL={search_url}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
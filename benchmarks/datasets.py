@@ -0,0 +1,159 @@
+"""
+离线基准使用的数据集
+
+- 搜索结果页：以 fixtures/damai/search_basic.html 中录制的演出项目为模板，
+  复制成不同大小的页面（演出 id 依次递增，其余结构不变）
+- 合成演出：固定随机种子生成，单日、带时间、同年范围和跨年范围按比例混合
+- 合成抓取历史：不常变化、一般和巡演中三类艺人，按固定周期抓取的结果序列
+"""
+import re
+import random
+import pathlib
+from datetime import date, datetime, timedelta
+
+FIXTURES_DIR = pathlib.Path(__file__).resolve().parent.parent / "fixtures" / "damai"
+RECORDED_PAGE = FIXTURES_DIR / "search_basic.html"
+PAGE_URL = "https://search.damai.cn/search.html?keyword=%E9%99%88%E6%A5%9A%E7%94%9F"
+
+# 搜索结果页大小：录制原样（5 项）、一整页（30 项）、异常大的页面
+HTML_SIZES = {'recorded': 0, 'page': 30, 'large': 300}
+
+ITEM_PATTERN = re.compile(r'( *<div class="items">.*?\n    </div>\n)', re.S)
+ITEM_ID_PATTERN = re.compile(r'item\.htm\?id=\d+')
+
+CITIES = ['北京', '上海', '广州', '深圳', '成都', '杭州', '武汉', '南京']
+STATUSES = ['售票中', '预售', '已售罄', '即将开抢']
+
+
+def load_recorded_page() -> str:
+    with open(RECORDED_PAGE, encoding='utf-8') as f:
+        return f.read()
+
+
+def make_search_html(item_count: int = 0) -> str:
+    """
+    生成包含 item_count 个演出项目的搜索结果页，item_count 为 0 时返回录制页原样；
+    录制页中缺少必需元素的项目也会按比例出现，覆盖提取失败的分支
+    """
+    html = load_recorded_page()
+    if not item_count:
+        return html
+    templates = ITEM_PATTERN.findall(html)
+    items = []
+    for i in range(item_count):
+        template = templates[i % len(templates)]
+        items.append(ITEM_ID_PATTERN.sub(f'item.htm?id={900000000000 + i}', template))
+    start = html.index(templates[0])
+    end = html.index(templates[-1]) + len(templates[-1])
+    return html[:start] + ''.join(items) + html[end:]
+
+
+def make_date_string(day: date, kind: int) -> str:
+    if kind == 0:
+        return day.strftime('%Y.%m.%d')
+    if kind == 1:
+        return day.strftime('%Y.%m.%d') + ' 19:30'
+    if kind == 2:
+        return day.strftime('%Y.%m.%d') + '-' + (day + timedelta(days=2)).strftime('%m.%d')
+    # 跨年范围
+    end_of_year = date(day.year, 12, 30)
+    return end_of_year.strftime('%Y.%m.%d') + '-01.02'
+
+
+def make_shows(count: int, start: date = date(2025, 1, 1), seed: int = 0, ranges: bool = True,
+               offset: int = 0) -> list:
+    """
+    生成 count 条原始演出（与爬虫输出的字段相同）
+    :param ranges: 为 False 时只生成单日演出（即已经过 process_date_range 的形态）
+    :param offset: 演出编号起点，不同 offset 生成的演出不重复
+    """
+    rng = random.Random(seed)
+    shows = []
+    for i in range(offset, offset + count):
+        day = start + timedelta(days=rng.randrange(730))
+        kind = rng.randrange(4) if ranges else 0
+        shows.append({
+            'name': f'合成演出 {i}',
+            'tag': '演唱会',
+            'city': CITIES[i % len(CITIES)],
+            'venue': f'场馆 {i % 97}',
+            'lineup': '合成艺人',
+            'date': make_date_string(day, kind),
+            'price': f'{rng.choice((180, 280, 380))}-1280元',
+            'status': rng.choice(STATUSES),
+            'detail_url': f'https://detail.damai.cn/item.htm?id={i}',
+            'poster': f'https://img.alicdn.com/{i}.jpg'
+        })
+    return shows
+
+
+# 合成抓取历史的艺人类型：(比例, 平均每天的变化次数, 新演出距今天数范围)
+ARTIST_KINDS = {
+    'dormant': (0.6, 1 / 30, (60, 300)),
+    'regular': (0.3, 1 / 5, (20, 180)),
+    'touring': (0.1, 1.0, (3, 40)),
+}
+
+
+def make_crawl_history(artists: int, days: int = 30, cron_hours: float = 6, seed: int = 0,
+                       start: datetime = datetime(2025, 1, 1)) -> dict:
+    """
+    生成固定周期抓取的历史：{艺人: [(时间戳, 演出列表), ...]}
+    各艺人按类型以泊松过程发生变化（新演出上架、售票状态变化、价格变化），每 cron_hours 小时抓取一次；
+    已结束的演出不再出现在搜索结果中
+    """
+    rng = random.Random(seed)
+    start_ts = start.timestamp()
+    end_ts = start_ts + days * 86400
+    kinds = list(ARTIST_KINDS)
+    weights = [ARTIST_KINDS[kind][0] for kind in kinds]
+    histories = {}
+    for a in range(artists):
+        kind = rng.choices(kinds, weights)[0]
+        _, rate, (near, far) = ARTIST_KINDS[kind]
+        artist = f'合成艺人 {a}'
+        shows = {}
+        serial = 0
+
+        def announce(at: float):
+            nonlocal serial
+            day = datetime.fromtimestamp(at).date() + timedelta(days=rng.randint(near, far))
+            shows[serial] = {
+                'name': f'{artist} 巡演 {serial}', 'tag': '演唱会', 'city': rng.choice(CITIES),
+                'venue': f'场馆 {serial % 97}', 'lineup': artist, 'date': make_date_string(day, rng.randrange(3)),
+                'price': f'{rng.choice((180, 280, 380))}-1280元', 'status': '预售',
+                'detail_url': f'https://detail.damai.cn/item.htm?id={a * 10000 + serial}', 'poster': '',
+                'end': day + timedelta(days=2)
+            }
+            serial += 1
+
+        for _ in range(rng.randint(0, 3)):
+            announce(start_ts)
+        # 变化发生的时刻
+        changes = []
+        at = start_ts + rng.expovariate(rate) * 86400
+        while at < end_ts:
+            changes.append(at)
+            at += rng.expovariate(rate) * 86400
+        history = []
+        crawl_at = start_ts + rng.uniform(0, cron_hours * 3600)
+        index = 0
+        while crawl_at < end_ts:
+            while index < len(changes) and changes[index] <= crawl_at:
+                roll = rng.random()
+                if roll < 0.5 or not shows:
+                    announce(changes[index])
+                elif roll < 0.8:
+                    rng.choice(list(shows.values()))['status'] = rng.choice(STATUSES)
+                else:
+                    rng.choice(list(shows.values()))['price'] = f'{rng.choice((180, 280, 380, 480))}-1680元'
+                index += 1
+            today = datetime.fromtimestamp(crawl_at).date()
+            visible = [
+                {key: value for key, value in show.items() if key != 'end'}
+                for show in shows.values() if show['end'] >= today
+            ]
+            history.append((crawl_at, visible))
+            crawl_at += cron_hours * 3600
+        histories[artist] = history
+    return histories
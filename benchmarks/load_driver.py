@@ -0,0 +1,237 @@
+"""
+/crawler/update 端到端压测驱动
+
+按批次向 API 提交艺人（每个请求一批），多个请求并发，结束后报告：
+  - 吞吐（艺人/秒、请求/秒）与请求端到端延迟 p50/p95/p99
+  - 各阶段耗时 p50/p95/p99：取压测前后 /metrics 中 damai_stage_duration_seconds 的差值按分桶估算
+  - 写入数据库的行数：响应中各艺人的 changes 汇总，以及 damai_shows_total 的差值
+
+API 需要指向替身服务器启动（见 benchmarks/damai_stub.py），例如:
+  python -m benchmarks.damai_stub --port 8900 --latency 0.2 --jitter 0.1 &
+  DATABASE_URL=sqlite:///./data/load.db python -c "from app.services.upload_service import UploadService; UploadService.init_db()"
+  SEARCH_BASE_URL=http://127.0.0.1:8900/search.html CRAWLER_BACKEND=http \\
+      DATABASE_URL=sqlite:///./data/load.db uvicorn app.main:app --port 8000 &
+  python -m benchmarks.load_driver --artists 200 --batch-size 5 --concurrency 8 -o load.json
+"""
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+STAGE_METRIC = 'damai_stage_duration_seconds'
+SHOWS_METRIC = 'damai_shows_total'
+SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{([^}]*)\})?\s+(\S+)$')
+LABEL_PATTERN = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text: str) -> dict:
+    """解析 Prometheus 文本格式：{(名称, ((标签, 值), ...)): 数值}"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE_PATTERN.match(line)
+        if match is None:
+            continue
+        name, labels, value = match.groups()
+        key = tuple(sorted(LABEL_PATTERN.findall(labels or '')))
+        samples[(name, key)] = float(value)
+    return samples
+
+
+def fetch_metrics(session: requests.Session, api: str) -> dict:
+    try:
+        response = session.get(f"{api}/metrics", timeout=10)
+        response.raise_for_status()
+        return parse_metrics(response.text)
+    except Exception as e:
+        print(f"读取 /metrics 失败: {e}", file=sys.stderr)
+        return {}
+
+
+def histogram_quantile(quantile: float, buckets: list) -> float:
+    """按累积分桶 [(上界, 累积数)] 线性插值估算分位数，与 Prometheus histogram_quantile 相同"""
+    buckets = sorted(buckets)
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = quantile * buckets[-1][1]
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float('inf'):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def stage_report(before: dict, after: dict) -> dict:
+    """压测期间各阶段的次数、平均值和估算分位数（秒）"""
+    stages = {}
+    for (name, labels), value in after.items():
+        if name != f'{STAGE_METRIC}_bucket':
+            continue
+        labels = dict(labels)
+        delta = value - before.get((name, tuple(sorted(labels.items()))), 0)
+        stages.setdefault(labels['stage'], []).append((float(labels['le']), delta))
+    report = {}
+    for stage, buckets in sorted(stages.items()):
+        key = (('stage', stage),)
+        count = after.get((f'{STAGE_METRIC}_count', key), 0) - before.get((f'{STAGE_METRIC}_count', key), 0)
+        total = after.get((f'{STAGE_METRIC}_sum', key), 0) - before.get((f'{STAGE_METRIC}_sum', key), 0)
+        if count <= 0:
+            continue
+        report[stage] = {
+            'count': int(count),
+            'mean': total / count,
+            'p50': histogram_quantile(0.50, buckets),
+            'p95': histogram_quantile(0.95, buckets),
+            'p99': histogram_quantile(0.99, buckets)
+        }
+    return report
+
+
+def counter_delta(before: dict, after: dict, metric: str, label: str) -> dict:
+    deltas = {}
+    for (name, labels), value in after.items():
+        if name != metric:
+            continue
+        label_value = dict(labels).get(label)
+        deltas[label_value] = int(value - before.get((name, labels), 0))
+    return {k: v for k, v in deltas.items() if v}
+
+
+def percentile(values: list, quantile: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(quantile * len(values)))]
+
+
+class LoadDriver:
+    def __init__(self, api: str, artists: list, batch_size: int, concurrency: int, force: bool = True,
+                 timeout: float = 600):
+        self.api = api.rstrip('/')
+        self.batches = [artists[i:i + batch_size] for i in range(0, len(artists), batch_size)]
+        self.concurrency = concurrency
+        self.force = force
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.failed_requests = 0
+        self.artist_results = {'success': 0, 'failed': 0}
+        self.changes = {}
+
+    def send_batch(self, batch: list):
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.api}/crawler/update", json={'artists': batch, 'force': self.force}, timeout=self.timeout
+            )
+            response.raise_for_status()
+            results = response.json()['data']
+        except Exception as e:
+            print(f"请求失败: {e}", file=sys.stderr)
+            with self._lock:
+                self.failed_requests += 1
+            return
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies.append(elapsed)
+            for item in results:
+                self.artist_results['success' if item['success'] else 'failed'] += 1
+                for key, value in (item.get('changes') or {}).items():
+                    self.changes[key] = self.changes.get(key, 0) + value
+
+    def run(self) -> dict:
+        before = fetch_metrics(self.session, self.api)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(self.send_batch, self.batches))
+        wall = time.perf_counter() - started
+        after = fetch_metrics(self.session, self.api)
+        artists = sum(len(batch) for batch in self.batches)
+        return {
+            'config': {
+                'api': self.api, 'artists': artists, 'batches': len(self.batches),
+                'concurrency': self.concurrency, 'force': self.force
+            },
+            'wall_seconds': wall,
+            'throughput': {
+                'artists_per_sec': artists / wall if wall else None,
+                'requests_per_sec': len(self.latencies) / wall if wall else None
+            },
+            'requests': {
+                'ok': len(self.latencies),
+                'failed': self.failed_requests,
+                'p50': percentile(self.latencies, 0.50),
+                'p95': percentile(self.latencies, 0.95),
+                'p99': percentile(self.latencies, 0.99)
+            },
+            'artists': self.artist_results,
+            'rows': self.changes,
+            'shows_metrics': counter_delta(before, after, SHOWS_METRIC, 'result'),
+            'stages': stage_report(before, after)
+        }
+
+
+def format_seconds(value) -> str:
+    return '       -' if value is None else f'{value * 1000:8.1f}'
+
+
+def print_report(report: dict):
+    out = sys.stderr
+    config = report['config']
+    print(f"{config['artists']} 个艺人 / {config['batches']} 个请求，并发 {config['concurrency']}，"
+          f"用时 {report['wall_seconds']:.1f} 秒", file=out)
+    throughput = report['throughput']
+    print(f"吞吐: {throughput['artists_per_sec'] or 0:.2f} 艺人/秒, {throughput['requests_per_sec'] or 0:.2f} 请求/秒",
+          file=out)
+    requests_report = report['requests']
+    print(f"请求: 成功 {requests_report['ok']}, 失败 {requests_report['failed']}; 艺人: {report['artists']}", file=out)
+    print(f"\n{'阶段':<16}{'次数':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}", file=out)
+    print(f"{'request':<16}{requests_report['ok']:>8}{'':>10}{format_seconds(requests_report['p50']):>10}"
+          f"{format_seconds(requests_report['p95']):>10}{format_seconds(requests_report['p99']):>10}", file=out)
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<16}{stats['count']:>8}{format_seconds(stats['mean']):>10}{format_seconds(stats['p50']):>10}"
+              f"{format_seconds(stats['p95']):>10}{format_seconds(stats['p99']):>10}", file=out)
+    print(f"\n写入: {report['rows']}", file=out)
+    print(f"指标计数: {report['shows_metrics']}", file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="/crawler/update 压测驱动")
+    parser.add_argument('--api', default='http://127.0.0.1:8000')
+    parser.add_argument('--artists', type=int, default=100, help="艺人总数")
+    parser.add_argument('--batch-size', type=int, default=5, help="每个请求包含的艺人数")
+    parser.add_argument('--concurrency', type=int, default=4, help="同时进行的请求数")
+    parser.add_argument('--prefix', default=None, help="艺人名前缀，默认带时间戳以免命中搜索缓存和已入库数据")
+    parser.add_argument('--no-force', action='store_true', help="不跳过搜索结果缓存")
+    parser.add_argument('--timeout', type=float, default=600, help="单个请求超时（秒）")
+    parser.add_argument('-o', '--output', help="结果 JSON 写入的文件")
+    args = parser.parse_args(argv)
+
+    prefix = args.prefix if args.prefix is not None else f"压测艺人{int(time.time())}-"
+    artists = [f"{prefix}{i}" for i in range(args.artists)]
+    driver = LoadDriver(args.api, artists, args.batch_size, args.concurrency, force=not args.no_force,
+                        timeout=args.timeout)
+    report = driver.run()
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if not report['requests']['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+自适应重新抓取模拟：回放抓取历史，比较原固定周期抓取与自适应调度
+
+历史来源：
+  --archive DIR  快照归档目录（SNAPSHOT_DIR），每次抓取的原始结果
+  默认           合成历史（benchmarks/datasets.make_crawl_history），按 --cron-hours 固定周期抓取
+
+调度参数取自 RECRAWL_* 环境变量（见 .env.example），可用命令行覆盖。
+运行: python -m benchmarks.sim_recrawl [--artists 300] [--days 30] [--cron-hours 6] [--budget 120] [-o result.json]
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app.services.recrawl_scheduler import RecrawlPolicy, simulate, HOUR
+from app.services.snapshot_archive import SnapshotArchive
+from benchmarks.datasets import make_crawl_history
+
+
+def load_archive_history(root: str, since: float = None) -> dict:
+    # 只读取，不清理过期分段
+    archive = SnapshotArchive(root=root, retention_days=0)
+    try:
+        return {artist: archive.history(artist, since) for artist in archive.list_artists()}
+    finally:
+        archive.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="自适应重新抓取模拟")
+    parser.add_argument('--archive', help="快照归档目录，不指定时使用合成历史")
+    parser.add_argument('--since', type=float, help="只回放该时间戳之后的快照")
+    parser.add_argument('--artists', type=int, default=300, help="合成历史的艺人数")
+    parser.add_argument('--days', type=int, default=30, help="合成历史的天数")
+    parser.add_argument('--cron-hours', type=float, default=6, help="合成历史的固定抓取周期（小时）")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=float(os.getenv('RECRAWL_CRAWLS_PER_HOUR', '120')),
+                        help="每小时抓取数上限")
+    parser.add_argument('--min-hours', type=float, help="最短抓取间隔（小时）")
+    parser.add_argument('--max-hours', type=float, help="最长抓取间隔（小时）")
+    parser.add_argument('--tick', type=float, default=300, help="模拟的调度间隔（秒）")
+    parser.add_argument('-o', '--output', help="结果 JSON 写入的文件")
+    args = parser.parse_args(argv)
+
+    if args.archive:
+        histories = load_archive_history(args.archive, args.since)
+    else:
+        histories = make_crawl_history(args.artists, args.days, args.cron_hours, args.seed)
+    policy = RecrawlPolicy(
+        min_interval=args.min_hours * HOUR if args.min_hours else None,
+        max_interval=args.max_hours * HOUR if args.max_hours else None
+    )
+    result = simulate(histories, policy, crawls_per_hour=args.budget, tick_seconds=args.tick)
+    result['source'] = args.archive or 'synthetic'
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+离线基准套件：不访问大麦、不连接外部数据库
+
+  - extract:  parse_search_html 解析不同大小的搜索结果页（benchmarks/datasets.py）
+  - process:  ShowDataProcessor.process_date_range 处理合成演出（含日期范围）
+  - upload:   UploadService.upload_shows 写入临时 SQLite（全新写入、全部重复两种情况）
+
+结果以 JSON 输出，可与之前的结果比较；超过阈值或相对基线退化过多时退出码为 1。
+
+运行:
+  python -m benchmarks.suite                          # 默认规模，结果打印到标准输出
+  python -m benchmarks.suite --full -o result.json    # 包含 100 万行的数据集
+  python -m benchmarks.suite --baseline old.json --max-regression 0.25
+"""
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import subprocess
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import Base
+from app.crawler.extraction import parse_search_html, HTML_PARSER
+from app.data_processor import ShowDataProcessor
+from app.services.upload_service import UploadService
+from benchmarks.datasets import HTML_SIZES, PAGE_URL, make_search_html, make_shows
+
+RESULT_VERSION = 1
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+
+# 各数据集规模：默认 / --full
+PROCESS_SIZES = {'default': [10_000, 100_000], 'full': [10_000, 100_000, 1_000_000]}
+UPLOAD_SIZES = {'default': [10_000], 'full': [10_000, 100_000]}
+
+
+def measure(func, rounds: int, setup=None) -> dict:
+    """执行 rounds 次，返回耗时统计（毫秒）；setup 在每轮前调用且不计时，返回值传给 func"""
+    samples = []
+    for _ in range(rounds):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        func(arg) if setup else func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'median_ms': round(samples[len(samples) // 2], 3),
+        'min_ms': round(samples[0], 3),
+        'max_ms': round(samples[-1], 3),
+        'rounds': rounds
+    }
+
+
+def with_throughput(stats: dict, items: int) -> dict:
+    stats['items'] = items
+    stats['items_per_sec'] = round(items / (stats['median_ms'] / 1000), 1) if stats['median_ms'] else None
+    return stats
+
+
+def bench_extract(results: dict):
+    for label, size in HTML_SIZES.items():
+        html = make_search_html(size)
+        shows = parse_search_html(html, PAGE_URL)
+        rounds = 20 if len(shows) < 100 else 5
+        results[f'extract.parse_search_html[{label}]'] = with_throughput(
+            measure(lambda: parse_search_html(html, PAGE_URL), rounds), len(shows)
+        )
+
+
+def bench_process(results: dict, sizes: list):
+    processor = ShowDataProcessor()
+    for size in sizes:
+        shows = make_shows(size)
+        rounds = 3 if size >= 1_000_000 else 5
+        results[f'process.process_date_range[{size}]'] = with_throughput(
+            measure(lambda: processor.process_date_range(shows), rounds), size
+        )
+
+
+def bench_upload(results: dict, sizes: list, workdir: str):
+    processor = ShowDataProcessor()
+    for size in sizes:
+        shows = processor.process_date_range(make_shows(size, ranges=False))
+        path = os.path.join(workdir, f'upload-{size}.db')
+        engine = create_engine(f"sqlite:///{path}")
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def fresh_session():
+            """每轮使用空表"""
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            return Session()
+
+        def upload(db):
+            with db:
+                UploadService.upload_shows(db, shows, 'bench')
+
+        results[f'upload.upload_shows.insert[{size}]'] = with_throughput(
+            measure(upload, 3, setup=fresh_session), len(shows)
+        )
+        # 表中已有全部数据：只有批量查重，没有写入
+        results[f'upload.upload_shows.duplicate[{size}]'] = with_throughput(
+            measure(lambda: upload(Session()), 3), len(shows)
+        )
+        engine.dispose()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def check_thresholds(results: dict, thresholds: dict) -> list:
+    """绝对阈值：{"基准名": {"max_ms": 上限}}"""
+    failures = []
+    for name, limit in thresholds.items():
+        stats = results.get(name)
+        if stats is not None and 'max_ms' in limit and stats['median_ms'] > limit['max_ms']:
+            failures.append(f"{name}: {stats['median_ms']:.1f} ms 超过阈值 {limit['max_ms']} ms")
+    return failures
+
+
+def check_regressions(results: dict, baseline: dict, max_regression: float) -> list:
+    """相对基线：中位数耗时增加超过 max_regression（比例）即视为退化"""
+    failures = []
+    for name, stats in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None or not previous.get('median_ms'):
+            continue
+        change = stats['median_ms'] / previous['median_ms'] - 1
+        stats['baseline_median_ms'] = previous['median_ms']
+        stats['change'] = round(change, 3)
+        if change > max_regression:
+            failures.append(
+                f"{name}: {stats['median_ms']:.1f} ms，比基线 {previous['median_ms']:.1f} ms 慢 {change:.0%}"
+            )
+    return failures
+
+
+def run(full: bool = False, only: list = None) -> dict:
+    scale = 'full' if full else 'default'
+    selected = set(only or ['extract', 'process', 'upload'])
+    results = {}
+    if 'extract' in selected:
+        bench_extract(results)
+    if 'process' in selected:
+        bench_process(results, PROCESS_SIZES[scale])
+    if 'upload' in selected:
+        with tempfile.TemporaryDirectory() as workdir:
+            bench_upload(results, UPLOAD_SIZES[scale], workdir)
+    return {
+        'version': RESULT_VERSION,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'scale': scale,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'html_parser': HTML_PARSER
+        },
+        'results': results
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="离线基准套件")
+    parser.add_argument('-o', '--output', help="结果 JSON 写入的文件，默认打印到标准输出")
+    parser.add_argument('--full', action='store_true', help="包含 100 万行等大数据集")
+    parser.add_argument('--only', action='append', choices=['extract', 'process', 'upload'],
+                        help="只运行指定分组，可重复")
+    parser.add_argument('--baseline', help="之前保存的结果 JSON，用于比较")
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help="相对基线允许的最大退化比例，默认 0.25")
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS, help="绝对阈值 JSON 文件")
+    args = parser.parse_args(argv)
+
+    # 写库的 INFO 日志和模板中缺字段项目的提取警告不计入基准
+    logging.getLogger('app').setLevel(logging.ERROR)
+
+    report = run(full=args.full, only=args.only)
+    failures = []
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, encoding='utf-8') as f:
+            failures += check_thresholds(report['results'], json.load(f))
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            failures += check_regressions(report['results'], json.load(f), args.max_regression)
+    report['failures'] = failures
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for name, stats in report['results'].items():
+        print(f"{name:<48} {stats['median_ms']:10.2f} ms  {stats['items_per_sec'] or 0:>12,.0f} 条/秒",
+              file=sys.stderr)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
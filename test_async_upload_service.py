@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.models.show import Show
+from app.services.async_upload_service import AsyncShowWriter, AsyncUploadService
+from app.services.task_queue import LeaseLostError
+from app.services.upload_service import UploadService
+
+pytest.importorskip('aiosqlite')
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+
+
+def make_show(name: str, price: str = '380') -> dict:
+    return {
+        'name': name, 'tag': '演唱会', 'city': '北京', 'venue': '体育馆', 'lineup': '艺人',
+        'date': '2030.01.01', 'price': price, 'status': '售票中', 'detail_url': '', 'poster': ''
+    }
+
+
+@pytest.fixture
+def loop():
+    """在后台线程运行事件循环，测试所在线程相当于爬虫工作线程"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def writer(tmp_path, loop):
+    path = tmp_path / 'shows.db'
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    asyncio.run_coroutine_threadsafe(AsyncUploadService.init_db(engine), loop).result(10)
+    writer = AsyncShowWriter(async_sessionmaker(engine, autoflush=False, expire_on_commit=False), loop,
+                             retry_delay=0)
+    sync_engine = create_engine(f"sqlite:///{path}")
+    yield writer, sync_engine
+    sync_engine.dispose()
+    asyncio.run_coroutine_threadsafe(engine.dispose(), loop).result(10)
+
+
+def prices(sync_engine) -> dict:
+    with Session(sync_engine) as db:
+        return dict(db.query(Show.name, Show.price))
+
+
+def test_execute_from_thread_round_trip(writer):
+    writer, sync_engine = writer
+    assert writer.write_from_thread([make_show('a'), make_show('b')], '艺人', timeout=10) == (2, 0)
+    processed = [make_show('a', '480'), make_show('b'), make_show('c')]
+    assert writer.is_page_known_from_thread(processed[:2], timeout=10)
+    assert not writer.is_page_known_from_thread(processed, timeout=10)
+
+    # 同步实现的 sync 写入在异步会话上执行并提交，结果返回给工作线程
+    counts = writer.execute_from_thread(
+        lambda db: UploadService.sync_show_rows(db, processed, '艺人'), timeout=10
+    )
+    assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 1, 'skipped': 0}
+    assert prices(sync_engine) == {'a': '480', 'b': '380', 'c': '380'}
+
+
+def test_execute_from_thread_rolls_back_and_does_not_retry_lost_lease(writer):
+    writer, sync_engine = writer
+    calls = []
+
+    def operation(db):
+        calls.append(1)
+        UploadService.bulk_insert_shows(db, [make_show('a')], '艺人')
+        raise LeaseLostError('任务租约已失效')
+
+    with pytest.raises(LeaseLostError):
+        writer.execute_from_thread(operation, timeout=10)
+    assert len(calls) == 1
+    assert prices(sync_engine) == {}
+
+    # 其他错误按 max_retries 重试
+    def failing(db):
+        calls.append(1)
+        raise RuntimeError('写入失败')
+
+    with pytest.raises(RuntimeError):
+        writer.execute_from_thread(failing, timeout=10)
+    assert len(calls) == 1 + writer.max_retries
@@ -24,7 +24,7 @@ def main():
         
         db = SessionLocal()
         try:
-            if upload_service.upload_shows(db, processed_shows):
+            if upload_service.upload_shows(db, processed_shows, "陈楚生"):
                 print("数据上传成功！")
             else:
                 print("数据上传失败！")
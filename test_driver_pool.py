@@ -0,0 +1,113 @@
+import threading
+import pytest
+from app.crawler.driver_pool import DriverPool
+
+
+class FakeDriver:
+    """只实现池用到的 window_handles 和 quit"""
+    def __init__(self, number: int):
+        self.number = number
+        self.alive = True
+        self.quit_called = False
+
+    @property
+    def window_handles(self):
+        if not self.alive:
+            raise RuntimeError('invalid session id')
+        return ['main']
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeFactory:
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver(len(self.drivers))
+        self.drivers.append(driver)
+        return driver
+
+
+@pytest.fixture
+def factory():
+    return FakeFactory()
+
+
+def test_checkout_reuses_checked_in_driver(factory):
+    pool = DriverPool(factory, max_size=2)
+    driver = pool.checkout()
+    pool.checkin(driver)
+    assert pool.checkout() is driver
+    other = pool.checkout()
+    assert other is not driver and len(factory.drivers) == 2
+    stats = pool.get_stats()
+    assert (stats['hits'], stats['misses'], stats['startups'], stats['in_use'], stats['idle']) == (1, 2, 2, 2, 0)
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+    pool.checkin(driver)
+    pool.checkin(other)
+    pool.close()
+    assert all(driver.quit_called for driver in factory.drivers)
+    assert pool.get_stats()['size'] == 0
+
+
+def test_dead_session_is_replaced(factory):
+    pool = DriverPool(factory, max_size=1)
+    driver = pool.checkout()
+    pool.checkin(driver)
+    driver.alive = False
+    replacement = pool.checkout()
+    assert replacement is not driver and driver.quit_called
+    stats = pool.get_stats()
+    assert (stats['replaced_dead'], stats['size'], stats['hits']) == (1, 1, 0)
+
+
+def test_driver_is_recycled_after_max_pages(factory):
+    pool = DriverPool(factory, max_size=1, max_pages=5)
+    driver = pool.checkout()
+    pool.checkin(driver, pages=3)
+    assert pool.checkout() is driver
+    pool.checkin(driver, pages=2)
+    assert driver.quit_called
+    assert pool.get_stats()['recycled'] == 1
+    assert pool.checkout() is not driver
+
+
+def test_discarded_driver_is_closed_and_frees_its_slot(factory):
+    pool = DriverPool(factory, max_size=1, checkout_timeout=5)
+    driver = pool.checkout()
+    pool.checkin(driver, discard=True)
+    assert driver.quit_called
+    stats = pool.get_stats()
+    assert (stats['size'], stats['idle'], stats['recycled']) == (0, 0, 0)
+    assert pool.checkout() is not driver
+
+
+def test_checkout_times_out_when_pool_is_exhausted(factory):
+    pool = DriverPool(factory, max_size=1, checkout_timeout=0.05)
+    driver = pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout()
+    assert pool.get_stats()['checkout_timeouts'] == 1
+
+    # 等待中的借出在实例归还后拿到它
+    pool.checkout_timeout = 5
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+    waiter.start()
+    pool.checkin(driver)
+    waiter.join()
+    assert result == [driver]
+
+
+def test_failed_startup_releases_the_slot():
+    def factory():
+        raise RuntimeError('chrome not found')
+
+    pool = DriverPool(factory, max_size=1, checkout_timeout=0.05)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match='chrome'):
+            pool.checkout()
+    stats = pool.get_stats()
+    assert (stats['startup_failures'], stats['size'], stats['checkout_timeouts']) == (2, 0, 0)
@@ -0,0 +1,91 @@
+import re
+import json
+import pathlib
+import pytest
+from bs4 import BeautifulSoup
+from app.crawler.spider import DamaiCrawler
+from app.crawler.extraction import (
+    extract_items_script, extract_items_legacy, extract_item_legacy, build_show_info, EXTRACT_ITEMS_SCRIPT
+)
+from app.crawler.waits import RESULT_ITEMS_SELECTOR
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures" / "damai"
+
+
+def load_expected(name: str) -> list:
+    with open(FIXTURES_DIR / f"{name}.expected.json", encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_raw_items(name: str) -> list:
+    """EXTRACT_ITEMS_SCRIPT 在浏览器中对 fixture 页面返回的原始数据（由下面的 Chrome 测试核对）"""
+    with open(FIXTURES_DIR / f"{name}.raw.json", encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SoupElement:
+    """用 BeautifulSoup 模拟 legacy 路径用到的 WebElement 接口"""
+    def __init__(self, tag):
+        self.tag = tag
+
+    @property
+    def text(self) -> str:
+        return re.sub(r'\s+', ' ', self.tag.get_text()).strip()
+
+    def get_attribute(self, name: str):
+        return self.tag.get(name)
+
+    def find_element(self, by, selector: str):
+        from selenium.common.exceptions import NoSuchElementException
+        found = self.tag.select_one(selector)
+        if found is None:
+            raise NoSuchElementException(selector)
+        return SoupElement(found)
+
+    def find_elements(self, by, selector: str) -> list:
+        return [SoupElement(found) for found in self.tag.select(selector)]
+
+
+class RawItemsDriver:
+    def __init__(self, raw_items: list):
+        self.raw_items = raw_items
+
+    def execute_script(self, script, selector):
+        assert script == EXTRACT_ITEMS_SCRIPT and selector == RESULT_ITEMS_SELECTOR
+        return self.raw_items
+
+
+def test_build_show_info_matches_legacy_mapping():
+    pytest.importorskip('selenium')
+    soup = BeautifulSoup((FIXTURES_DIR / "search_basic.html").read_text(encoding='utf-8'), 'html.parser')
+    items = [SoupElement(item) for item in soup.select(RESULT_ITEMS_SELECTOR)]
+    raw_items = load_raw_items("search_basic")
+    assert len(items) == len(raw_items)
+    for item, raw in zip(items, raw_items):
+        if raw is None:
+            # 缺少必需元素的项目两条路径都跳过
+            with pytest.raises(Exception):
+                extract_item_legacy(item)
+        else:
+            assert build_show_info(raw) == extract_item_legacy(item)
+    assert extract_items_script(RawItemsDriver(raw_items)) == load_expected("search_basic")
+
+
+@pytest.fixture(scope="module")
+def driver():
+    """加载本地 fixture 页面的无头 Chrome，环境中没有 Chrome 时跳过"""
+    try:
+        driver = DamaiCrawler().create_driver()
+    except Exception as e:
+        pytest.skip(f"Chrome 不可用: {str(e)}")
+    yield driver
+    driver.quit()
+
+
+def test_script_extraction_matches_legacy_loop(driver):
+    driver.get((FIXTURES_DIR / "search_basic.html").as_uri())
+    legacy = extract_items_legacy(driver)
+    script = extract_items_script(driver)
+    assert driver.execute_script(EXTRACT_ITEMS_SCRIPT, RESULT_ITEMS_SELECTOR) == load_raw_items("search_basic")
+    assert script == legacy
+    assert script == load_expected("search_basic")
@@ -0,0 +1,163 @@
+import json
+import pathlib
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from app.crawler.spider import DamaiCrawler
+from app.crawler.http_spider import DamaiHttpCrawler
+from app.crawler.rate_limiter import ThrottledError
+from app.crawler.detail_pages import DetailEnricher, DetailCache
+from app.crawler.extraction import is_search_results_page, parse_search_html
+from app.data_processor import ShowDataProcessor
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures" / "damai"
+
+
+def load_expected(name: str) -> list:
+    with open(FIXTURES_DIR / f"{name}.expected.json", encoding='utf-8') as f:
+        return json.load(f)
+
+
+class RecordedDamaiHandler(BaseHTTPRequestHandler):
+    """按路径返回录制好的搜索页和搜索接口响应"""
+    routes = {}
+
+    def do_GET(self):
+        path = urllib.parse.urlparse(self.path).path
+        route = self.routes.get(path)
+        if route is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        status, content_type, fixture = route
+        body = (FIXTURES_DIR / fixture).read_bytes() if fixture else b""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def damai_server():
+    """本地替身服务器，测试通过修改 routes 决定返回内容"""
+    handler = type('Handler', (RecordedDamaiHandler,), {'routes': {}})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, handler.routes, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_http_crawler(base_url: str) -> DamaiHttpCrawler:
+    return DamaiHttpCrawler(
+        search_base_url=f"{base_url}/search.html",
+        detail_base_url="https://detail.damai.cn/item.htm",
+        timeout=5
+    )
+
+
+def test_search_api_is_preferred(damai_server):
+    _, routes, base_url = damai_server
+    routes['/searchajax.html'] = (200, 'application/json', 'search_ajax.json')
+    routes['/search.html'] = (200, 'text/html; charset=utf-8', 'search_basic.html')
+    assert make_http_crawler(base_url).search("陈楚生") == load_expected("search_ajax")
+
+
+def test_search_html_used_when_api_fails(damai_server):
+    _, routes, base_url = damai_server
+    routes['/searchajax.html'] = (500, 'text/plain', None)
+    routes['/search.html'] = (200, 'text/html; charset=utf-8', 'search_basic.html')
+    assert make_http_crawler(base_url).search("陈楚生") == load_expected("search_basic")
+
+
+def test_falls_back_to_selenium_when_http_returns_nothing(damai_server, monkeypatch, tmp_path):
+    _, routes, base_url = damai_server
+    routes['/searchajax.html'] = (500, 'text/plain', None)
+    routes['/search.html'] = (500, 'text/plain', None)
+    monkeypatch.chdir(tmp_path)
+
+    crawler = DamaiCrawler(backend='auto')
+    crawler.http_crawler = make_http_crawler(base_url)
+    expected = load_expected("search_basic")
+    monkeypatch.setattr(crawler, 'iter_search_pages_selenium', lambda artist_name, max_pages: iter([expected]))
+    assert crawler.analyze_search_page("陈楚生") == expected
+
+    crawler.backend = 'http'
+    assert crawler.analyze_search_page("陈楚生") is None
+
+
+def test_throttled_responses_are_not_empty_results(damai_server):
+    _, routes, base_url = damai_server
+    crawler = make_http_crawler(base_url)
+
+    routes['/searchajax.html'] = (429, 'text/plain', None)
+    with pytest.raises(ThrottledError) as excinfo:
+        crawler.search("陈楚生")
+    assert excinfo.value.reason == 'http_429'
+
+    # 接口和搜索页都返回空内容：不是无结果页，而是异常的空响应
+    routes['/searchajax.html'] = (200, 'application/json', None)
+    routes['/search.html'] = (200, 'text/html; charset=utf-8', None)
+    with pytest.raises(ThrottledError) as excinfo:
+        crawler.search("陈楚生")
+    assert excinfo.value.reason == 'empty_anomaly'
+
+
+def test_detail_sessions_replace_date_range_expansion(damai_server):
+    _, routes, base_url = damai_server
+    routes['/item.htm'] = (200, 'text/html; charset=utf-8', 'detail_item.html')
+    show = {
+        'name': '陈楚生 2024 巡回演唱会', 'tag': '演唱会', 'city': '上海', 'venue': '上海体育馆', 'lineup': '陈楚生',
+        'date': '2024.12.21-2025.01.04', 'price': '380-1280', 'status': '售票中',
+        'detail_url': f"{base_url}/item.htm?id=721436712345", 'poster': ''
+    }
+    missing = dict(show, detail_url=f"{base_url}/missing.htm?id=1")
+    enricher = DetailEnricher(max_workers=4, cache=DetailCache(ttl=600), timeout=5)
+    assert enricher.enrich([show, missing]) == 1
+
+    days = ShowDataProcessor.process_date_range([show])
+    assert [(day['date'], day['price']) for day in days] == [
+        ('2024.12.21 14:00 19:30', '380/680/1280'),
+        ('2024.12.28 19:30', '480'),
+        ('2025.01.04 19:30', '580')
+    ]
+    # 详情页失败的演出仍按日期范围逐天展开
+    assert 'sessions' not in missing
+    assert len(ShowDataProcessor.process_date_range([missing])) == 15
+
+    # 缓存未过期时不再请求详情页
+    del routes['/item.htm']
+    show.pop('sessions')
+    assert enricher.enrich([show]) == 1
+    assert enricher.get_stats()['cached'] == 1
+
+
+def test_empty_api_result_is_complete_without_fallback(damai_server, monkeypatch, tmp_path):
+    _, routes, base_url = damai_server
+    routes['/searchajax.html'] = (200, 'application/json', 'search_ajax_empty.json')
+    routes['/search.html'] = (500, 'text/plain', None)
+    monkeypatch.chdir(tmp_path)
+
+    pages = make_http_crawler(base_url).iter_search_pages("不存在的艺人")
+    assert list(pages) == [] and pages.complete
+
+    # auto 模式下接口确认无结果时不回退到浏览器，不会因为无结果标记不匹配而被当作限流
+    crawler = DamaiCrawler(backend='auto')
+    crawler.http_crawler = make_http_crawler(base_url)
+    monkeypatch.setattr(crawler, 'iter_search_pages_selenium',
+                        lambda artist_name, max_pages: pytest.fail('不应回退到 Selenium'))
+    pages = crawler.iter_search_pages("不存在的艺人")
+    assert list(pages) == [] and pages.complete
+    assert crawler.analyze_search_page("不存在的艺人") is None
+
+
+def test_empty_search_page_is_a_results_page():
+    html = (FIXTURES_DIR / 'search_empty.html').read_text(encoding='utf-8')
+    assert is_search_results_page(html)
+    assert parse_search_html(html, 'https://search.damai.cn/search.html') == []
@@ -0,0 +1,115 @@
+import time
+import threading
+import pytest
+from app.services.job_service import (
+    JobStore, JobManager, QueueJobManager, STATE_CRAWLING, STATE_PROCESSING, STATE_UPLOADING, STATE_QUEUED
+)
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'jobs.db')
+
+
+def test_stage_timings(store_path, monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    store = JobStore(store_path)
+    job_id = store.create_job(['周杰伦'])
+    for delay, state in ((1.5, STATE_CRAWLING), (2.0, STATE_PROCESSING), (0.25, STATE_UPLOADING)):
+        now[0] += delay
+        store.set_stage(job_id, 0, state)
+    now[0] += 0.5
+    assert store.finish_artist(job_id, 0, True, '更新成功')
+    artist = store.get_job(job_id)['artists'][0]
+    assert artist['timings'] == {'queued': 1.5, 'crawling': 2.0, 'processing': 0.25, 'uploading': 0.5}
+    assert artist['state'] == 'done' and artist['success'] is True
+    store.close()
+
+
+def test_unfinished_artists_are_requeued_after_restart(store_path):
+    store = JobStore(store_path)
+    job_id = store.create_job(['a', 'b', 'c'], force=True, profile='lean')
+    store.set_stage(job_id, 0, STATE_CRAWLING)
+    store.set_stage(job_id, 1, STATE_UPLOADING)
+    store.finish_artist(job_id, 2, True, '更新成功')
+    store.close()
+
+    # 重启：处理中的艺人重置为 queued 并按原来的参数重新执行，已完成的保留结果
+    store = JobStore(store_path)
+    assert store.requeue_unfinished() == [(job_id, 0, 'a', True, 'lean'), (job_id, 1, 'b', True, 'lean')]
+    job = store.get_job(job_id)
+    assert job['status'] == 'running'
+    assert [artist['state'] for artist in job['artists']] == [STATE_QUEUED, STATE_QUEUED, 'done']
+
+    calls = []
+
+    def runner(artist, force, on_stage, on_cache, on_counts, profile):
+        calls.append((artist, force, profile))
+        return True
+
+    manager = JobManager(store, runner, workers=2)
+    manager.start()
+    assert manager.wait(job_id, timeout=5)
+    manager.stop()
+    assert sorted(calls) == [('a', True, 'lean'), ('b', True, 'lean')]
+    assert manager.get(job_id)['counts'] == {'done': 3}
+    manager.close()
+
+
+def test_wait_for_finished_unwaited_and_concurrent_jobs(store_path):
+    release = threading.Event()
+
+    def runner(artist, force, on_stage, on_cache, on_counts, profile):
+        release.wait(5)
+        if artist == 'bad':
+            raise RuntimeError('网络错误')
+        return True
+
+    manager = JobManager(JobStore(store_path), runner, workers=2)
+    manager.start()
+    # 不等待的任务完成后也不留下状态
+    for _ in range(3):
+        manager.submit(['x'])
+    job_id = manager.submit(['ok', 'bad'])
+    assert not manager.wait(job_id, timeout=0.05)
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(manager.wait(job_id, timeout=5))) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    release.set()
+    for waiter in waiters:
+        waiter.join()
+    assert results == [True, True, True]
+    assert manager.wait(job_id) is True
+    assert manager.wait('missing') is False
+    job = manager.get(job_id)
+    assert job['counts'] == {'done': 1, 'failed': 1}
+    assert job['artists'][1]['message'] == '网络错误'
+    assert manager.wait(manager.submit([]), timeout=0)
+    manager.stop()
+    manager.close()
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.enqueued = []
+
+    def enqueue(self, job_id, artists, force, profile):
+        self.enqueued.append(job_id)
+
+    def get_job(self, job_id):
+        return {'job_id': job_id, 'status': 'running'} if job_id in self.enqueued else None
+
+
+def test_queue_manager_keeps_a_bounded_number_of_empty_jobs():
+    manager = QueueJobManager(RecordingQueue(), max_empty_jobs=2)
+    empty = [manager.submit([]) for _ in range(3)]
+    job_id = manager.submit(['a'])
+    assert manager.queue.enqueued == [job_id]
+    assert manager.get(job_id)['status'] == 'running'
+    # 空任务不入队，只保留最近的几个
+    assert manager.get(empty[0]) is None
+    assert [manager.get(empty_id)['status'] for empty_id in empty[1:]] == ['finished', 'finished']
+    assert manager.wait(empty[2], timeout=0)
+    assert len(manager._empty_jobs) == 2
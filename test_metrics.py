@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import create_engine, text
+from app import metrics
+from app.config.database import SessionLocal
+from app.metrics import Histogram, MetricsRegistry, DB_POOL_CHECKOUT_WAIT
+from app.models.show import Show
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram('test_seconds', 'Test durations', label='stage', buckets=(0.1, 1.0)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, 'dedup')
+    pool_wait = registry.register(Histogram('test_wait_seconds', 'Test wait', buckets=(0.1, 1.0)))
+    pool_wait.observe(0.2)
+    assert registry.render().splitlines() == [
+        '# HELP test_seconds Test durations',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{stage="dedup",le="0.1"} 2',
+        'test_seconds_bucket{stage="dedup",le="1.0"} 3',
+        'test_seconds_bucket{stage="dedup",le="+Inf"} 4',
+        'test_seconds_sum{stage="dedup"} 3.65',
+        'test_seconds_count{stage="dedup"} 4',
+        '# HELP test_wait_seconds Test wait',
+        '# TYPE test_wait_seconds histogram',
+        'test_wait_seconds_bucket{le="0.1"} 0',
+        'test_wait_seconds_bucket{le="1.0"} 1',
+        'test_wait_seconds_bucket{le="+Inf"} 1',
+        'test_wait_seconds_sum 0.2',
+        'test_wait_seconds_count 1',
+    ]
+
+
+def test_pool_wait_is_observed_once_per_transaction(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shows.db'}")
+    Show.__table__.create(engine)
+    monkeypatch.setitem(SessionLocal.kw, 'bind', engine)
+    before = DB_POOL_CHECKOUT_WAIT.get()['count']
+
+    with SessionLocal() as db:
+        db.execute(text('SELECT 1'))
+        db.execute(text('SELECT 1'))
+        db.commit()
+        assert DB_POOL_CHECKOUT_WAIT.get()['count'] == before + 1
+        db.execute(text('SELECT 1'))
+        db.rollback()
+        # 只有 flush 的事务没有起始时间，不计入
+        db.add(Show(name='a'))
+        db.commit()
+    assert DB_POOL_CHECKOUT_WAIT.get()['count'] == before + 2
+    assert 'damai_db_pool_checkout_wait_seconds_count' in metrics.registry.render()
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def metrics_enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', True)
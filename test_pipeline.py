@@ -0,0 +1,121 @@
+import time
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.crawler.http_spider import DamaiHttpCrawler, SearchPages
+from app.data_processor import ShowDataProcessor
+from app.models.show import Show
+from app.services.pipeline import ShowPipeline
+
+
+class PassThroughProcessor:
+    """每条演出只产出自身，不拆分日期"""
+    def iter_date_range(self, shows):
+        yield from shows
+
+
+def make_show(name: str) -> dict:
+    return {'name': name, 'date': '2030.01.01', 'city': '北京'}
+
+
+def run_with_timeout(pipeline: ShowPipeline, timeout: float):
+    """在线程中运行管道，超时未结束时返回 None"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(pipeline.run()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return result if not thread.is_alive() else None
+
+
+def test_end_marker_survives_slow_writer():
+    pipeline = ShowPipeline(
+        pages=[[make_show('a')], [make_show('b')]], processor=PassThroughProcessor(), db=None,
+        artist='测试艺人', buffer_size=2, batch_size=100, raw_log=False
+    )
+    flushed = []
+
+    def slow_flush():
+        # 第一页写库期间爬虫填满队列，结束标记需要等待超过 1 秒
+        if pipeline.writer.pending:
+            flushed.append([show['name'] for show in pipeline.writer.pending])
+            pipeline.writer.pending = []
+            if len(flushed) == 1:
+                time.sleep(1.5)
+
+    pipeline.writer.flush = slow_flush
+    result = run_with_timeout(pipeline, 10)
+    assert result is not None, "管道没有结束"
+    assert result['found'] == 2
+    assert flushed == [['a'], ['b']]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shows.db'}")
+    Show.__table__.create(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+def make_full_show(name: str, show_date: str = '2099.01.01') -> dict:
+    return {
+        'name': name, 'tag': '演唱会', 'city': '北京', 'venue': '体育馆', 'lineup': '艺人', 'date': show_date,
+        'price': '380', 'status': '售票中', 'detail_url': '', 'poster': ''
+    }
+
+
+def make_pages(pages: list, complete: bool) -> SearchPages:
+    def iterate(result):
+        yield from pages
+        result.complete = complete
+    return SearchPages(iterate)
+
+
+def run_sync(db, pages, stop_page=None) -> ShowPipeline:
+    pipeline = ShowPipeline(pages=pages, processor=ShowDataProcessor(), db=db, artist='艺人', raw_log=False,
+                            mode='sync', mark_removed=True, stop_page=stop_page)
+    pipeline.run()
+    return pipeline
+
+
+def removed_names(db) -> set:
+    return {row.name for row in db.query(Show).filter(Show.removed_at.isnot(None))}
+
+
+def test_sync_marks_removed_only_after_complete_crawl(db):
+    run_sync(db, make_pages([[make_full_show('a'), make_full_show('b')], [make_full_show('c')]], complete=True))
+
+    # 受翻页上限截断或某页出错的抓取（complete=False）、没有 complete 属性的页面列表、提前停止翻页都不标记
+    partial = run_sync(db, make_pages([[make_full_show('a')]], complete=False))
+    assert not partial.complete and partial.writer.removed_count == 0
+    run_sync(db, [[make_full_show('a')]])
+    stopped = run_sync(db, make_pages([[make_full_show('a')], [make_full_show('b')]], complete=True),
+                       stop_page=lambda page: True)
+    assert stopped.stopped_early and stopped.writer.removed_count == 0
+    assert removed_names(db) == set()
+
+    full = run_sync(db, make_pages([[make_full_show('a')], [make_full_show('b')]], complete=True))
+    assert full.complete
+    assert full.writer.get_counts() == {'inserted': 0, 'skipped': 0, 'updated': 0, 'unchanged': 2, 'removed': 1}
+    assert removed_names(db) == {'c'}
+
+
+def test_http_pages_truncated_by_max_pages_are_incomplete():
+    class FakeApiCrawler(DamaiHttpCrawler):
+        def __init__(self, fail_page=None):
+            super().__init__(search_base_url='http://127.0.0.1:1/search.html', session=object())
+            self.fail_page = fail_page
+
+        def fetch_search_api(self, artist_name, page=1):
+            if page == self.fail_page:
+                raise ConnectionError('网络错误')
+            return [make_full_show(f'{artist_name}-{page}')], 3
+
+    pages = FakeApiCrawler().iter_search_pages('艺人', max_pages=3)
+    assert len(list(pages)) == 3 and pages.complete
+    pages = FakeApiCrawler().iter_search_pages('艺人', max_pages=2)
+    assert len(list(pages)) == 2 and not pages.complete
+    pages = FakeApiCrawler(fail_page=2).iter_search_pages('艺人', max_pages=3)
+    assert len(list(pages)) == 1 and not pages.complete
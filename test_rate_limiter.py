@@ -0,0 +1,43 @@
+import pytest
+from app.crawler.rate_limiter import HostLimiter, ThrottledError
+
+
+def make_limiter(**kwargs) -> HostLimiter:
+    options = dict(rate=0, burst=1, min_limit=1, max_limit=8, initial_limit=4, decrease_factor=0.5, cooldown=0)
+    options.update(kwargs)
+    return HostLimiter('limiter.test', **options)
+
+
+def test_limit_halves_on_throttle_and_grows_on_success():
+    limiter = make_limiter()
+    with pytest.raises(ThrottledError):
+        with limiter.slot():
+            raise ThrottledError('http_429', 'limiter.test')
+    assert limiter.limit == 2
+    assert limiter.get_stats()['throttled'] == {'http_429': 1}
+
+    # 连续成功 limit 次后加 1
+    for _ in range(2):
+        with limiter.slot():
+            pass
+    assert limiter.limit == 3
+    for _ in range(100):
+        with limiter.slot():
+            pass
+    assert limiter.limit == 8
+    assert limiter.in_flight == 0
+
+
+def test_throttles_within_cooldown_decrease_once():
+    limiter = make_limiter(max_limit=16, initial_limit=16, cooldown=60)
+    for _ in range(5):
+        limiter.on_throttle('captcha')
+    assert limiter.limit == 8
+    assert limiter.decreases == 1
+
+
+def test_rate_scales_with_limit():
+    limiter = make_limiter(rate=8, initial_limit=8)
+    assert limiter.bucket.rate == 8
+    limiter.on_throttle('empty_anomaly')
+    assert limiter.bucket.rate == 4
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import create_engine
+from app.models.show import Show
+from app.services.recrawl_scheduler import RecrawlScheduler, RecrawlPolicy, simulate, HOUR
+from benchmarks.datasets import make_crawl_history
+
+
+def test_policy_prefers_active_and_touring_artists():
+    policy = RecrawlPolicy(min_interval=6 * HOUR, max_interval=72 * HOUR)
+    today = date(2025, 6, 1)
+    dormant = policy.interval(0.0, None, today)
+    busy = policy.interval(3.0, None, today)
+    touring = policy.interval(0.0, today + timedelta(days=4), today)
+    assert dormant == 72 * HOUR
+    assert busy < dormant
+    assert touring == 24 * HOUR
+    # 当天开演的演出也不会低于最短间隔
+    assert policy.interval(10.0, today, today) == 6 * HOUR
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schedule.db'}")
+    Show.__table__.create(engine)
+    scheduler = RecrawlScheduler(engine, RecrawlPolicy(min_interval=6 * HOUR, max_interval=72 * HOUR),
+                                 crawls_per_hour=24)
+    scheduler.init()
+    yield scheduler
+    engine.dispose()
+
+
+def test_tick_respects_budget_and_record_reschedules(scheduler):
+    now = 1_750_000_000.0
+    scheduler.budget.updated_at = now
+    scheduler.add_artists(['a', 'b', 'c', 'd'], now)
+    submitted = []
+    # 每小时 24 次，最多累积 2 次
+    first = scheduler.tick(submitted.extend, now)
+    assert len(first) == 2
+    # 已提交未完成的艺人不会被再次提交
+    assert sorted(scheduler.tick(submitted.extend, now + 3600)) == sorted(set('abcd') - set(first))
+    assert sorted(submitted) == ['a', 'b', 'c', 'd']
+
+    scheduler.record('a', {'inserted': 5}, now=now)
+    scheduler.record('b', {'inserted': 5}, now=now)
+    scheduler.record('b', {'updated': 4, 'skipped': 1}, now=now + HOUR)
+    schedule = {entry['artist']: entry for entry in scheduler.list_artists()}
+    assert schedule['b']['interval_hours'] < schedule['a']['interval_hours']
+    assert not schedule['a']['dispatched']
+
+
+def test_simulation_saves_crawls():
+    result = simulate(make_crawl_history(60, days=10), crawls_per_hour=60)
+    assert result['adaptive']['crawls'] < result['baseline']['crawls'] / 2
+    assert result['adaptive']['max_crawls_in_hour'] <= 60
+
+
+def test_zero_arguments_are_not_replaced_by_defaults(tmp_path, monkeypatch):
+    monkeypatch.setenv('RECRAWL_CHANGE_ALPHA', '0.9')
+    monkeypatch.setenv('RECRAWL_ACTIVITY_WEIGHT', '5')
+    policy = RecrawlPolicy(min_interval=0, max_interval=72 * HOUR, alpha=0, activity_weight=0, proximity_days=0)
+    assert (policy.min_interval, policy.alpha, policy.activity_weight, policy.proximity_days) == (0, 0, 0, 0)
+    # alpha=0 时变化率保持不变，activity_weight=0 时间隔与变化率无关
+    assert policy.update_rate(0.5, 10, crawls=3) == 0.5
+    assert policy.interval(3.0, None, date(2025, 6, 1)) == 72 * HOUR
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'schedule.db'}")
+    Show.__table__.create(engine)
+    scheduler = RecrawlScheduler(engine, policy, crawls_per_hour=3600)
+    scheduler.init()
+    scheduler.budget.updated_at = 0.0
+    # now=0.0 是模拟时钟的起点，不应被替换为当前时间
+    scheduler.add_artists(['a'], now=0.0)
+    assert scheduler.tick(lambda artists: None, now=0.0) == ['a']
+    scheduler.record('a', {'inserted': 1}, now=0.0)
+    assert scheduler.get_stats(now=0.0)['due'] == 0
+    assert scheduler.get_stats(now=72 * HOUR)['due'] == 1
+    engine.dispose()
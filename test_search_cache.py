@@ -0,0 +1,93 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services.search_cache import SearchCache, CACHE_HIT, CACHE_MISS, CACHE_COALESCED, CACHE_BYPASS
+
+
+@pytest.fixture
+def disk_path(tmp_path):
+    return str(tmp_path / 'search_cache')
+
+
+def test_hit_until_ttl_expires(disk_path, monkeypatch):
+    cache = SearchCache(ttl=60, disk_path=disk_path)
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    assert cache.get_or_fetch('周杰伦', lambda: [{'name': 'a'}]) == ([{'name': 'a'}], CACHE_MISS)
+    # 艺人名规范化后命中（忽略首尾空白）
+    assert cache.get_or_fetch(' 周杰伦 ', lambda: [{'name': 'b'}]) == ([{'name': 'a'}], CACHE_HIT)
+    now[0] += 61
+    assert cache.get('周杰伦') is None
+    assert cache.get_or_fetch('周杰伦', lambda: [{'name': 'b'}]) == ([{'name': 'b'}], CACHE_MISS)
+    # force 跳过读取并刷新缓存
+    assert cache.get_or_fetch('周杰伦', lambda: [{'name': 'c'}], force=True) == ([{'name': 'c'}], CACHE_BYPASS)
+    assert cache.get('周杰伦') == [{'name': 'c'}]
+
+
+def test_disk_tier_survives_restart_and_eviction(disk_path):
+    cache = SearchCache(ttl=60, max_entries=1, disk_path=disk_path)
+    cache.put('Mayday', [{'name': 'a'}])
+    cache.put('周杰伦', [{'name': 'b'}])
+    # 内存中只保留 1 个艺人，被淘汰的从磁盘读回
+    assert cache.get_stats()['memory_entries'] == 1
+    assert cache.get('mayday') == [{'name': 'a'}]
+
+    restarted = SearchCache(ttl=60, disk_path=disk_path)
+    assert restarted.get_or_fetch('周杰伦', lambda: pytest.fail('不应重新抓取')) == ([{'name': 'b'}], CACHE_HIT)
+    # 磁盘上的条目同样受 TTL 约束
+    assert SearchCache(ttl=0, disk_path=disk_path).get('周杰伦') is None
+
+
+def test_empty_and_uncacheable_results_are_not_stored(disk_path):
+    cache = SearchCache(ttl=60, disk_path=disk_path)
+    assert cache.get_or_fetch('a', lambda: []) == ([], CACHE_MISS)
+    assert cache.get_or_fetch('b', lambda: [{'name': 'partial'}], cacheable=lambda value: False)[1] == CACHE_MISS
+    assert cache.get('a') is None and cache.get('b') is None
+
+
+def test_concurrent_requests_share_one_fetch(disk_path):
+    cache = SearchCache(ttl=60, disk_path=disk_path)
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return [{'name': 'a'}]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.get_or_fetch, '周杰伦', fetch) for _ in range(4)]
+        deadline = time.monotonic() + 5
+        while cache.get_stats()[CACHE_COALESCED] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+    assert len(calls) == 1
+    assert sorted(outcome for _, outcome in results) == [CACHE_COALESCED] * 3 + [CACHE_MISS]
+    assert all(value == [{'name': 'a'}] for value, _ in results)
+    assert cache.get_stats()['in_flight'] == 0
+
+
+def test_coalesced_requests_see_the_error(disk_path):
+    cache = SearchCache(ttl=60, disk_path=disk_path)
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('网络错误')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(cache.get_or_fetch, '周杰伦', fetch)
+        started.wait(5)
+        follower = executor.submit(cache.get_or_fetch, '周杰伦', fetch)
+        deadline = time.monotonic() + 5
+        while cache.get_stats()[CACHE_COALESCED] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert cache.get('周杰伦') is None
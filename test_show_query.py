@@ -0,0 +1,126 @@
+from datetime import date
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.show import Show
+from app.routers import shows as shows_router
+from app.services import upload_service, async_upload_service
+from app.services.show_query import ShowQueryService, ShowQueryCache, encode_cursor, decode_cursor
+from app.services.upload_service import ShowBatchWriter
+
+
+def make_show(name: str, artist: str, show_date: date, city: str = '北京') -> Show:
+    return Show(name=name, artist=artist, city=city, date=show_date, status='售票中')
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shows.db'}")
+    Show.__table__.create(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(Session, monkeypatch):
+    cache = ShowQueryCache(ttl=300)
+    monkeypatch.setattr(shows_router, 'SessionLocal', Session)
+    for module in (shows_router, upload_service, async_upload_service):
+        monkeypatch.setattr(module, 'show_query_cache', cache)
+    app = FastAPI()
+    app.include_router(shows_router.router, prefix='/shows')
+    with TestClient(app) as client:
+        yield client
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(date(2030, 1, 2), 42)) == (date(2030, 1, 2), 42)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+
+def test_cursor_is_stable_across_inserts(Session):
+    with Session() as db:
+        db.add_all(make_show(f'show{day}', '艺人', date(2030, 1, day)) for day in range(1, 7))
+        db.commit()
+        first = ShowQueryService.list_shows(db, limit=3)
+        assert [show['name'] for show in first['items']] == ['show1', 'show2', 'show3']
+
+        # 在已翻过的位置之前插入新演出，下一页既不重复也不遗漏
+        db.add_all([make_show('early', '艺人', date(2030, 1, 1)), make_show('late', '艺人', date(2030, 1, 5))])
+        db.commit()
+        second = ShowQueryService.list_shows(db, cursor=first['next_cursor'], limit=3)
+        assert [show['name'] for show in second['items']] == ['show4', 'show5', 'late']
+        third = ShowQueryService.list_shows(db, cursor=second['next_cursor'], limit=3)
+        assert [show['name'] for show in third['items']] == ['show6']
+        assert third['next_cursor'] is None
+
+        # 同一天的演出按 id 区分
+        same_day = ShowQueryService.list_shows(db, date_from=date(2030, 1, 1), date_to=date(2030, 1, 1), limit=1)
+        rest = ShowQueryService.list_shows(db, date_from=date(2030, 1, 1), date_to=date(2030, 1, 1),
+                                           cursor=same_day['next_cursor'], limit=5)
+        assert [show['name'] for show in same_day['items'] + rest['items']] == ['show1', 'early']
+
+
+def test_etag_and_not_modified(client, Session):
+    with Session() as db:
+        db.add(make_show('show1', '艺人', date(2030, 1, 1)))
+        db.commit()
+    first = client.get('/shows', params={'artist': '艺人'})
+    assert first.status_code == 200 and first.headers['x-cache'] == 'MISS'
+    assert [show['name'] for show in first.json()['data']] == ['show1']
+    etag = first.headers['etag']
+
+    cached = client.get('/shows', params={'artist': '艺人'}, headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.headers['x-cache'] == 'HIT'
+    assert cached.headers['etag'] == etag and cached.content == b''
+    assert client.get('/shows', params={'artist': '艺人'}, headers={'If-None-Match': '"other"'}).status_code == 200
+    assert client.get('/shows', params={'cursor': '@@@'}).status_code == 400
+
+
+def test_crawl_invalidates_only_that_artists_pages(client, Session):
+    with Session() as db:
+        db.add_all([make_show('a1', 'A', date(2030, 1, 1)), make_show('b1', 'B', date(2030, 1, 2))])
+        db.commit()
+    etags = {}
+    for artist in ('A', 'B', None):
+        response = client.get('/shows', params={'artist': artist} if artist else {})
+        etags[artist] = response.headers['etag']
+
+    with Session() as db:
+        writer = ShowBatchWriter(db, 'A', mode='insert')
+        writer.add({'name': 'a2', 'tag': '演唱会', 'city': '上海', 'venue': '', 'lineup': '', 'date': '2030.01.03',
+                    'price': '', 'status': '售票中', 'detail_url': '', 'poster': ''})
+        writer.flush()
+
+    # A 和不限艺人的页重新查询并得到新的 ETag，B 的缓存页保留
+    for artist, names in (('A', ['a1', 'a2']), (None, ['a1', 'b1', 'a2'])):
+        params = {'artist': artist} if artist else {}
+        response = client.get('/shows', params=params, headers={'If-None-Match': etags[artist]})
+        assert response.status_code == 200 and response.headers['x-cache'] == 'MISS'
+        assert [show['name'] for show in response.json()['data']] == names
+    response = client.get('/shows', params={'artist': 'B'}, headers={'If-None-Match': etags['B']})
+    assert response.status_code == 304 and response.headers['x-cache'] == 'HIT'
+    assert client.get('/shows/cache').json()['invalidations'] == 1
+
+
+def test_disabled_cache_sees_writes_from_other_processes(client, Session):
+    shows_router.show_query_cache.enabled = False
+    with Session() as db:
+        db.add(make_show('a1', 'A', date(2030, 1, 1)))
+        db.commit()
+    first = client.get('/shows', params={'artist': 'A'})
+    assert first.headers['x-cache'] == 'MISS'
+    assert client.get('/shows', params={'artist': 'A'},
+                      headers={'If-None-Match': first.headers['etag']}).status_code == 304
+
+    # 其他进程（worker）提交的写入不会调用本进程的 invalidate_artist
+    with Session() as db:
+        db.add(make_show('a2', 'A', date(2030, 1, 2)))
+        db.commit()
+    response = client.get('/shows', params={'artist': 'A'}, headers={'If-None-Match': first.headers['etag']})
+    assert response.status_code == 200 and response.headers['x-cache'] == 'MISS'
+    assert [show['name'] for show in response.json()['data']] == ['a1', 'a2']
+    assert client.get('/shows/cache').json()['entries'] == 0
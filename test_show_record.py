@@ -0,0 +1,66 @@
+from datetime import date
+import pytest
+from app.data_processor import ShowDataProcessor
+from app.models.show_record import ShowRecord, parse_show_dates
+
+
+def make_show(show_date: str) -> dict:
+    return {
+        'detail_url': 'https://detail.damai.cn/item.htm?id=1', 'poster': 'https://img.alicdn.com/1.jpg',
+        'tag': '演唱会', 'city': '北京', 'name': '巡回演唱会', 'lineup': '艺人', 'venue': '体育馆',
+        'date': show_date, 'price': '380-1280', 'status': '售票中'
+    }
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('2024.12.21', (date(2024, 12, 21), date(2024, 12, 21), None)),
+    ('2024.12.21 19:30', (date(2024, 12, 21), date(2024, 12, 21), '19:30')),
+    ('2024.12.21-12.22', (date(2024, 12, 21), date(2024, 12, 22), None)),
+    ('2024.12.31-01.02', (date(2024, 12, 31), date(2025, 1, 2), None)),
+    ('2024.12.21-2025.01.02', (date(2024, 12, 21), date(2025, 1, 2), None)),
+    ('2024.12.21-22', (date(2024, 12, 21), date(2024, 12, 22), None)),
+    ('2024.12.21-12.22 周六 19:30', (date(2024, 12, 21), date(2024, 12, 22), '周六 19:30')),
+])
+def test_parse_show_dates(text, expected):
+    assert parse_show_dates(text) == expected
+
+
+@pytest.mark.parametrize('text', ['', '待定', '2024.13.01', '2025.01.02-2024.12.31'])
+def test_parse_show_dates_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_show_dates(text)
+
+
+def test_cross_year_range_expands_every_day():
+    days = ShowDataProcessor.process_date_range([make_show('2024.12.31-01.02')])
+    assert [day['date'] for day in days] == ['2024.12.31', '2025.01.01', '2025.01.02']
+
+
+@pytest.mark.parametrize('show_date, expected_dates', [
+    # 单日演出保留原始字符串（包括时间）
+    ('2024.12.21 19:30', ['2024.12.21 19:30']),
+    ('2024.12.21-12.22', ['2024.12.21', '2024.12.22']),
+    # 无法解析的日期原样保留
+    ('待定', ['待定']),
+])
+def test_show_day_matches_legacy_dict(show_date, expected_dates):
+    show = make_show(show_date)
+    days = list(ShowDataProcessor.iter_date_range([show]))
+    # 原来的实现对每一天复制一份 dict 并替换 date
+    legacy = [{**show, 'date': expected} for expected in expected_dates]
+    assert [dict(day) for day in days] == legacy
+    assert days == legacy
+    for day, expected in zip(days, legacy):
+        assert list(day.keys()) == list(expected.keys())
+        assert len(day) == len(expected)
+        assert 'price' in day and 'sessions' not in day
+        assert day.get('missing') is None
+        with pytest.raises(KeyError):
+            day['missing']
+    # 同一演出的各天共享一个记录，日期只解析一次
+    assert len({id(day.record) for day in days}) == 1
+
+
+def test_records_accept_show_records():
+    record = ShowRecord.from_dict(make_show('2024.12.21-22'))
+    assert [day['date'] for day in ShowDataProcessor.iter_date_range([record])] == ['2024.12.21', '2024.12.22']
@@ -0,0 +1,139 @@
+import os
+import time
+import multiprocessing
+from datetime import datetime, timedelta
+import pytest
+from app.services import snapshot_archive
+from app.services.snapshot_archive import SnapshotArchive
+
+DAY = 86400
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = SnapshotArchive(root=str(tmp_path / 'snapshots'), retention_days=30)
+    yield archive
+    archive.close()
+
+
+def segments(archive) -> list:
+    return sorted(name for name in os.listdir(archive.root) if name.endswith('.jsonl.gz'))
+
+
+def test_append_and_read_back_by_offset(archive):
+    now = time.time()
+    archive.write('A', [{'name': 'a1'}, {'name': 'a2'}], timestamp=now)
+    archive.write('B', [{'name': 'b1'}], source='api', timestamp=now)
+    archive.write('A', [{'name': 'a3'}], page=2, timestamp=now)
+    archive.flush()
+
+    entries = archive.list_snapshots('A')
+    assert [(entry['page'], entry['count']) for entry in entries] == [(1, 2), (2, 1)]
+    # 同一分段内按偏移依次追加，每条快照可以单独解压
+    assert entries[0]['segment'] == entries[1]['segment'] and entries[1]['offset'] > entries[0]['offset']
+    assert archive.read(entries[1]) == {
+        'artist': 'A', 'timestamp': now, 'source': 'crawler', 'page': 2, 'shows': [{'name': 'a3'}]
+    }
+    assert archive.read(archive.list_snapshots('B')[0])['source'] == 'api'
+    assert archive.list_artists() == ['A', 'B']
+
+
+def test_latest_and_history(archive):
+    now = time.time()
+    archive.write('A', [{'name': 'old'}], timestamp=now - 60)
+    archive.write('A', [{'name': 'p1'}], page=1, timestamp=now)
+    archive.write('A', [{'name': 'p2'}], page=2, timestamp=now)
+    archive.flush()
+
+    # latest 合并最近一次抓取的各页，history 按时间正序
+    assert archive.latest('A') == [{'name': 'p1'}, {'name': 'p2'}]
+    assert archive.history('A') == [(now - 60, [{'name': 'old'}]), (now, [{'name': 'p1'}, {'name': 'p2'}])]
+    assert archive.history('A', since=now - 1) == [(now, [{'name': 'p1'}, {'name': 'p2'}])]
+    assert archive.latest('missing') is None and archive.history('missing') == []
+
+
+class FakeDatetime(datetime):
+    """替换归档模块的 datetime，控制分段使用的日期"""
+    current = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(snapshot_archive, 'datetime', FakeDatetime)
+    FakeDatetime.current = datetime.now()
+    return FakeDatetime
+
+
+def test_retention_removes_old_segments_and_index_rows(archive, clock):
+    now = time.time()
+    today = clock.current
+    clock.current = today - timedelta(days=40)
+    archive.write('A', [{'name': 'expired'}], timestamp=now - 40 * DAY)
+    archive.flush()
+    # 正在写入的分段即使已过期也不会被删除
+    assert archive.cleanup(now=today) == 0
+    assert len(segments(archive)) == 1
+
+    # 切换到新的一天的分段时清理超过保留天数的分段及其索引
+    clock.current = today - timedelta(days=10)
+    archive.write('A', [{'name': 'kept'}], timestamp=now - 10 * DAY)
+    archive.flush()
+    clock.current = today
+    archive.write('A', [{'name': 'today'}], timestamp=now)
+    archive.flush()
+    assert len(segments(archive)) == 2
+    assert [shows for _, shows in archive.history('A')] == [[{'name': 'kept'}], [{'name': 'today'}]]
+
+    assert archive.cleanup(now=today + timedelta(days=25)) == 1
+    assert segments(archive) == [archive.list_snapshots('A')[0]['segment']]
+    assert [shows for _, shows in archive.history('A')] == [[{'name': 'today'}]]
+
+
+def test_crawl_past_midnight_stays_in_the_current_segment(archive, clock):
+    started = time.time()
+    archive.write('A', [{'name': 'p1'}], page=1, timestamp=started)
+    archive.flush()
+    clock.current = clock.current + timedelta(days=1)
+    archive.write('A', [{'name': 'p2'}], page=2, timestamp=started)
+    archive.write('B', [{'name': 'b1'}], timestamp=started - 60)
+    archive.flush()
+    entries = archive.list_snapshots('A')
+    # 第二页写入新一天的分段，索引中仍是抓取开始的时间戳
+    assert [entry['timestamp'] for entry in entries] == [started, started]
+    assert entries[0]['segment'] != entries[1]['segment']
+    assert archive.list_snapshots('B')[0]['segment'] == entries[1]['segment']
+    assert len(segments(archive)) == 2
+    assert archive.latest('A') == [{'name': 'p1'}, {'name': 'p2'}]
+
+
+def write_snapshots(root: str, name: str, count: int):
+    archive = SnapshotArchive(root=root, retention_days=0)
+    for index in range(count):
+        archive.write(name, [{'name': f'{name}{index}', 'payload': 'x' * (index * 37 % 500)}], page=index + 1,
+                      timestamp=1_000.0)
+    archive.close()
+
+
+def test_processes_sharing_a_root_write_separate_segments(tmp_path):
+    root = str(tmp_path / 'snapshots')
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=write_snapshots, args=(root, name, 200)) for name in ('A', 'B', 'C')]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    archive = SnapshotArchive(root=root, retention_days=0)
+    try:
+        for name in ('A', 'B', 'C'):
+            entries = archive.list_snapshots(name, limit=1000)
+            assert len(entries) == 200 and len({entry['segment'] for entry in entries}) == 1
+            assert [show['name'] for show in archive.latest(name)] == [f'{name}{index}' for index in range(200)]
+        assert len(segments(archive)) == 3
+    finally:
+        archive.close()
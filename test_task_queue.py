@@ -0,0 +1,133 @@
+import time
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.models.show import Show
+from app.services.task_queue import SqlTaskQueue, TaskQueue, LeaseLostError
+from app.services.crawl_worker import CrawlWorker
+from app.services.upload_service import ShowBatchWriter
+
+
+@pytest.fixture
+def task_queue(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}")
+    task_queue = SqlTaskQueue(engine, max_attempts=2, reap_interval=0)
+    task_queue.init()
+    yield task_queue
+    engine.dispose()
+
+
+def test_lease_complete_and_dedup(task_queue):
+    assert task_queue.enqueue('job1', ['周杰伦', '五月天']) == 2
+    # 同一任务重复入队不会产生新任务
+    assert task_queue.enqueue('job1', ['周杰伦', '五月天']) == 0
+
+    first = task_queue.lease('w1', 30)
+    second = task_queue.lease('w2', 30)
+    assert {first.artist, second.artist} == {'周杰伦', '五月天'}
+    assert task_queue.lease('w3', 30) is None
+
+    task_queue.set_stage(first, 'uploading')
+    assert task_queue.complete(first, True, '更新成功')
+    assert task_queue.complete(second, False, '更新失败')
+    job = task_queue.get_job('job1')
+    assert job['status'] == 'finished'
+    assert job['counts'] == {'done': 1, 'failed': 1}
+
+
+def test_expired_lease_is_requeued_and_stale_worker_ignored(task_queue):
+    task_queue.enqueue('job1', ['周杰伦'])
+    stale = task_queue.lease('w1', 0.01)
+    time.sleep(0.05)
+
+    # 租约过期后由其他 worker 接手，原 worker 的续约和写回都不生效
+    fresh = task_queue.lease('w2', 30)
+    assert fresh.id == stale.id and fresh.attempts == 2
+    assert task_queue.heartbeat([stale, fresh], 30) == [stale]
+    with pytest.raises(LeaseLostError):
+        task_queue.set_stage(stale, 'uploading')
+    assert not task_queue.complete(stale, False, '更新失败')
+    assert task_queue.complete(fresh, True, '更新成功')
+    assert task_queue.get_job('job1')['artists'][0]['success'] is True
+
+
+def test_worker_retries_then_fails(task_queue):
+    task_queue.enqueue('job1', ['周杰伦'])
+    calls = []
+
+    def runner(artist, force, on_stage, on_cache, on_counts, profile, fence):
+        calls.append(artist)
+        raise RuntimeError('网络错误')
+
+    worker = CrawlWorker(task_queue, runner, lease_seconds=30, poll_interval=0.01, retry_delay=0)
+    worker.start()
+    deadline = time.monotonic() + 5
+    while task_queue.get_job('job1')['status'] != 'finished' and time.monotonic() < deadline:
+        time.sleep(0.02)
+    worker.stop()
+    job = task_queue.get_job('job1')
+    assert job['status'] == 'finished'
+    assert calls == ['周杰伦', '周杰伦']
+    assert job['artists'][0]['message'] == '网络错误'
+
+
+def test_task_queue_is_abstract():
+    with pytest.raises(TypeError):
+        TaskQueue()
+
+
+def make_show(name: str) -> dict:
+    return {
+        'name': name, 'tag': '演唱会', 'city': '北京', 'venue': '体育馆', 'lineup': '周杰伦', 'date': '2099.01.01',
+        'price': '380', 'status': '售票中', 'detail_url': '', 'poster': ''
+    }
+
+
+def test_worker_that_lost_its_lease_cannot_write(task_queue):
+    engine = task_queue.engine
+    Show.__table__.create(engine)
+    task_queue.enqueue('job1', ['周杰伦'])
+    taken_over = threading.Event()
+    outcomes = []
+
+    def runner(artist, force, on_stage, on_cache, on_counts, profile, fence):
+        with Session(engine) as db:
+            writer = ShowBatchWriter(db, artist, fence=fence)
+            writer.add(make_show('first'))
+            writer.flush()
+            # 租约过期并被其他 worker 接手之后，同一管道的下一批不能再写入
+            taken_over.wait(5)
+            writer.add(make_show('second'))
+            try:
+                writer.flush()
+            except LeaseLostError:
+                outcomes.append('lease_lost')
+                raise
+        return True
+
+    # 心跳间隔远大于租约，租约必然过期
+    worker = CrawlWorker(task_queue, runner, lease_seconds=0.2, heartbeat_interval=60, poll_interval=0.01)
+    worker.start()
+    with Session(engine) as db:
+        deadline = time.monotonic() + 5
+        while not db.query(Show).count() and time.monotonic() < deadline:
+            time.sleep(0.02)
+    time.sleep(0.3)
+    fresh = task_queue.lease('w2', 30)
+    assert fresh is not None and fresh.attempts == 2
+    taken_over.set()
+    worker.stop()
+
+    assert outcomes == ['lease_lost']
+    with Session(engine) as db:
+        assert [name for name, in db.query(Show.name)] == ['first']
+        # 接手的 worker 仍持有租约，可以写入
+        def fence(db):
+            if not task_queue.check_lease(db, fresh):
+                raise LeaseLostError(fresh.id)
+
+        writer = ShowBatchWriter(db, '周杰伦', fence=fence)
+        writer.add(make_show('second'))
+        writer.flush()
+        assert db.query(Show).count() == 2
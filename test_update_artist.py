@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import main
+from app.crawler.http_spider import SearchPages
+from app.models.show import Show
+from app.services import pipeline as pipeline_module
+from app.services.search_cache import SearchCache, CACHE_HIT, CACHE_MISS, CACHE_BYPASS
+
+
+class FakeCrawler:
+    """按预先给定的页面逐页返回搜索结果，记录实际被取走的页数"""
+    pages = []
+    fetched = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def iter_search_pages(self, artist_name: str, max_pages: int = None) -> SearchPages:
+        def iterate(result):
+            for page in self.pages:
+                FakeCrawler.fetched.append(page)
+                yield [dict(show) for show in page]
+            result.complete = True
+        return SearchPages(iterate)
+
+
+class RecordingArchive:
+    def __init__(self):
+        self.pages = []
+
+    def write(self, artist, shows, **kwargs):
+        self.pages.append(list(shows))
+
+
+def make_show(name: str, show_date: date) -> dict:
+    return {
+        'name': name, 'tag': '演唱会', 'city': '北京', 'venue': '体育馆', 'lineup': '艺人',
+        'date': show_date.strftime('%Y.%m.%d'), 'price': '380', 'status': '售票中', 'detail_url': '', 'poster': ''
+    }
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shows.db'}")
+    Show.__table__.create(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    archive = RecordingArchive()
+    monkeypatch.setattr(main, 'SessionLocal', Session)
+    monkeypatch.setattr(main, 'DamaiCrawler', FakeCrawler)
+    monkeypatch.setattr(main, 'UPLOAD_MODE', 'insert')
+    monkeypatch.setattr(pipeline_module, 'get_snapshot_archive', lambda: archive)
+    monkeypatch.setattr(FakeCrawler, 'fetched', [])
+    monkeypatch.setattr(main.app.state, 'search_cache', SearchCache(ttl=600, disk_path=str(tmp_path / 'cache')),
+                        raising=False)
+    yield Session, archive
+    engine.dispose()
+
+
+def show_names(Session) -> set:
+    with Session() as db:
+        return {name for name, in db.query(Show.name)}
+
+
+def test_early_stopped_crawl_is_not_cached_and_hits_are_not_archived(env):
+    Session, archive = env
+    future = date.today() + timedelta(days=30)
+    FakeCrawler.pages = [[make_show('a', future)], [make_show('b', future)]]
+    outcomes = []
+    assert main.update_artist_shows_sync('艺人', on_cache=outcomes.append)
+    assert show_names(Session) == {'a', 'b'}
+    assert len(archive.pages) == 2
+
+    # 第一页已全部入库，停止翻页；只抓到一页的结果不覆盖缓存中的完整结果
+    FakeCrawler.fetched = []
+    assert main.update_artist_shows_sync('艺人', force=True, on_cache=outcomes.append)
+    assert len(FakeCrawler.fetched) == 1
+    assert [show['name'] for show in main.app.state.search_cache.get('艺人')] == ['a', 'b']
+
+    # 命中缓存时只写库，不重复归档
+    assert main.update_artist_shows_sync('艺人', on_cache=outcomes.append)
+    assert outcomes == [CACHE_MISS, CACHE_BYPASS, CACHE_HIT]
+    assert len(archive.pages) == 3
+
+
+@pytest.mark.parametrize('pages, fetched, stored', [
+    # 第一页全部已入库：停止翻页
+    ([['a', 'b'], ['c']], 1, {'a', 'b'}),
+    # 第一页全部已过期：停止翻页
+    ([['old1', 'old2'], ['c']], 1, {'a', 'b', 'old1', 'old2'}),
+    # 已入库与新演出混合的页面继续翻页
+    ([['a', 'c'], ['d']], 2, {'a', 'b', 'c', 'd'}),
+    ([['old1', 'c'], ['d']], 2, {'a', 'b', 'old1', 'c', 'd'}),
+])
+def test_paging_stops_on_known_or_expired_page(env, monkeypatch, pages, fetched, stored):
+    Session, archive = env
+    monkeypatch.setattr(main.app.state, 'search_cache', None)
+    future = date.today() + timedelta(days=30)
+    past = date.today() - timedelta(days=30)
+    FakeCrawler.pages = [[make_show('a', future), make_show('b', future)]]
+    assert main.update_artist_shows_sync('艺人')
+
+    FakeCrawler.fetched = []
+    FakeCrawler.pages = [
+        [make_show(name, past if name.startswith('old') else future) for name in page] for page in pages
+    ]
+    main.update_artist_shows_sync('艺人')
+    assert len(FakeCrawler.fetched) == fetched
+    assert show_names(Session) == stored
+
+
+def test_sync_mode_keeps_paging_past_known_pages(env, monkeypatch):
+    Session, archive = env
+    monkeypatch.setattr(main.app.state, 'search_cache', None)
+    monkeypatch.setattr(main, 'UPLOAD_MODE', 'sync')
+    monkeypatch.setattr(main, 'SYNC_MARK_REMOVED', False)
+    future = date.today() + timedelta(days=30)
+    FakeCrawler.pages = [[make_show('a', future)], [make_show('b', future)]]
+    assert main.update_artist_shows_sync('艺人')
+    FakeCrawler.fetched = []
+    # 已入库的页面内容可能有变化，sync 模式只在整页过期时停止
+    assert main.update_artist_shows_sync('艺人')
+    assert len(FakeCrawler.fetched) == 2
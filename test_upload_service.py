@@ -0,0 +1,138 @@
+from datetime import date
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from app.models.show import Show
+from app.services.upload_service import UploadService
+
+# 基线版本的 shows 表（没有 content_hash、updated_at、removed_at 和索引）
+BASELINE_SHOWS_DDL = """
+CREATE TABLE shows (
+    id INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(255), artist VARCHAR(255), tag VARCHAR(50), city VARCHAR(50),
+    venue VARCHAR(255), lineup VARCHAR(255), date DATE, price VARCHAR(255),
+    status VARCHAR(50), detail_url VARCHAR(255), poster VARCHAR(255), created_at DATETIME
+)
+"""
+
+
+def make_show(name: str, show_date: str = '2030.01.01', city: str = '北京', **fields) -> dict:
+    show = {
+        'name': name, 'tag': '演唱会', 'city': city, 'venue': '体育馆', 'lineup': '艺人',
+        'date': show_date, 'price': '380', 'status': '售票中',
+        'detail_url': f'https://detail.damai.cn/item.htm?id={name}', 'poster': ''
+    }
+    show.update(fields)
+    return show
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shows.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_upgrade_schema_adds_columns_to_baseline_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(BASELINE_SHOWS_DDL))
+        conn.execute(text("INSERT INTO shows (name, artist, city, date) VALUES ('旧演出', '艺人', '北京', '2030-01-01')"))
+
+    with engine.begin() as conn:
+        UploadService.upgrade_schema(conn)
+    columns = {column['name'] for column in inspect(engine).get_columns('shows')}
+    assert {'content_hash', 'updated_at', 'removed_at'} <= columns
+    indexes = {index['name'] for index in inspect(engine).get_indexes('shows')}
+    assert {index.name for index in Show.__table__.indexes} <= indexes
+
+    # 升级后写入新列不再报错，已有数据保留
+    with Session(engine) as db:
+        assert UploadService.bulk_insert_shows(db, [make_show('旧演出'), make_show('新演出')], '艺人') == (1, 1)
+        db.commit()
+        assert db.query(Show).filter(Show.name == '新演出').one().content_hash
+        assert db.query(Show).count() == 2
+
+    # 重复执行不会出错
+    with engine.begin() as conn:
+        UploadService.upgrade_schema(conn)
+
+
+@pytest.fixture
+def db(engine):
+    Show.__table__.create(engine)
+    with Session(engine) as db:
+        yield db
+
+
+def test_sync_updates_changed_rows_and_skips_unchanged(db):
+    shows = [make_show('a'), make_show('b'), make_show('c')]
+    assert UploadService.sync_show_rows(db, shows, '艺人') == {'inserted': 3, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    db.commit()
+    hashes = dict(db.query(Show.name, Show.content_hash).all())
+
+    # 摘要相同的行不写入，价格变化的行按主键更新；同一批次内重复的键计入 skipped
+    shows = [make_show('a'), make_show('b', price='480'), make_show('b', price='480'), make_show('d')]
+    counts = UploadService.sync_show_rows(db, shows, '艺人')
+    db.commit()
+    assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 1, 'skipped': 1}
+    assert sum(counts.values()) == len(shows)
+    rows = {row.name: row for row in db.query(Show).all()}
+    assert rows['a'].content_hash == hashes['a'] and rows['a'].updated_at is None
+    assert rows['b'].price == '480' and rows['b'].content_hash != hashes['b'] and rows['b'].updated_at
+    assert len(rows) == 4
+
+
+def test_mark_removed_only_future_unseen_rows(db):
+    shows = [make_show('kept', '2099.01.01'), make_show('gone', '2099.01.02'), make_show('past', '2000.01.01')]
+    UploadService.sync_show_rows(db, shows, '艺人')
+    db.commit()
+    seen = set()
+    UploadService.sync_show_rows(db, [make_show('kept', '2099.01.01')], '艺人', seen_keys=seen)
+    assert UploadService.mark_removed(db, '艺人', seen) == 1
+    db.commit()
+    removed = {row.name for row in db.query(Show).filter(Show.removed_at.isnot(None))}
+    assert removed == {'gone'}
+
+    # 重新出现的演出恢复
+    assert UploadService.sync_show_rows(db, [make_show('gone', '2099.01.02')], '艺人')['updated'] == 1
+    db.commit()
+    assert db.query(Show).filter(Show.removed_at.isnot(None)).count() == 0
+
+
+def upload_per_row(db, shows: list, artist: str):
+    """改为批量写入之前的逐条路径：逐条查重后插入（会话自动 flush，同一批次内的重复也能查到）"""
+    new_count = skip_count = 0
+    for show_data in shows:
+        try:
+            if UploadService.is_duplicate(db, show_data):
+                skip_count += 1
+                continue
+            db.add(Show(**UploadService.build_show_row(show_data, artist)))
+            new_count += 1
+        except Exception:
+            continue
+    db.commit()
+    return new_count, skip_count
+
+
+@pytest.mark.parametrize('shows', [
+    [],
+    [make_show('已存在'), make_show('新演出'), make_show('新演出'), make_show('已存在', city='上海')],
+    [make_show(f'演出{i % 4}', f'2030.01.0{i % 3 + 1}') for i in range(12)] + [make_show('日期错误', 'TBD')],
+], ids=['empty', 'existing-and-duplicates', 'chunked'])
+def test_bulk_insert_counts_match_per_row_path(tmp_path, shows):
+    results = []
+    for name, upload in (('per_row', upload_per_row),
+                         ('bulk', lambda db, shows, artist: UploadService.bulk_insert_shows(db, shows, artist, 2))):
+        engine = create_engine(f"sqlite:///{tmp_path / f'{name}.db'}")
+        Show.__table__.create(engine)
+        with Session(engine) as db:
+            db.add(Show(**UploadService.build_show_row(make_show('已存在'), '艺人')))
+            db.add(Show(**UploadService.build_show_row(make_show('演出1', '2030.01.02'), '艺人')))
+            db.commit()
+            counts = upload(db, shows, '艺人')
+            db.commit()
+            rows = sorted((row.name, row.date, row.city) for row in db.query(Show))
+        engine.dispose()
+        results.append((counts, rows))
+    assert results[0] == results[1]
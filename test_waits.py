@@ -0,0 +1,97 @@
+import pathlib
+import pytest
+from bs4 import BeautifulSoup
+from app.crawler import waits
+from app.crawler.waits import SearchResultsReady, wait_for_search_results, goto_next_page, PageReadyStats
+
+pytest.importorskip('selenium')
+from selenium.common.exceptions import TimeoutException  # noqa: E402
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures" / "damai"
+
+
+class StubDriver:
+    """按顺序返回预设的探测结果，最后一个结果一直重复"""
+    def __init__(self, probes: list, next_page=None, first_items=None):
+        self.probes = list(probes)
+        self.next_page = next_page
+        self.first_items = list(first_items or [])
+        self.calls = 0
+
+    def execute_script(self, script, *args):
+        self.calls += 1
+        if script == waits._NEXT_PAGE_SCRIPT:
+            return self.next_page
+        if script == waits._FIRST_ITEM_SCRIPT:
+            return self.first_items.pop(0) if len(self.first_items) > 1 else self.first_items[0]
+        return self.probes.pop(0) if len(self.probes) > 1 else self.probes[0]
+
+
+class FixtureDriver:
+    """用 BeautifulSoup 在录制的页面上执行探测脚本的选择器（CSS 选择器语义与浏览器一致）"""
+    def __init__(self, fixture: str):
+        self.soup = BeautifulSoup((FIXTURES_DIR / fixture).read_text(encoding='utf-8'), 'html.parser')
+
+    def execute_script(self, script, items_selector, empty_selector):
+        assert script == waits._PROBE_SCRIPT
+        return [len(self.soup.select(items_selector)), self.soup.select_one(empty_selector) is not None]
+
+
+@pytest.mark.parametrize('fixture, expected', [
+    ('search_empty.html', ('empty', 0)),
+    ('search_basic.html', ('ready', 5)),
+])
+def test_recorded_pages(fixture, expected):
+    result = wait_for_search_results(FixtureDriver(fixture), timeout=2, stable_period=0, poll_interval=0.01)
+    assert (result['outcome'], result['items']) == expected
+
+
+def test_ready_after_count_is_stable():
+    driver = StubDriver([[0, False], [5, False], [12, False], [12, False]])
+    result = wait_for_search_results(driver, timeout=5, stable_period=0.05, poll_interval=0.01)
+    assert (result['outcome'], result['items']) == ('ready', 12)
+    assert result['elapsed'] >= 0.05
+
+
+def test_empty_marker_returns_immediately():
+    driver = StubDriver([[0, False], [0, True]])
+    result = wait_for_search_results(driver, timeout=5, stable_period=1, poll_interval=0.01)
+    assert (result['outcome'], result['items']) == ('empty', 0)
+    assert result['elapsed'] < 1
+
+
+def test_timeout_reports_last_count():
+    # 结果数量一直在变化，达不到稳定期
+    driver = StubDriver([[count, False] for count in range(1, 1000)])
+    result = wait_for_search_results(driver, timeout=0.1, stable_period=1, poll_interval=0.01)
+    assert result['outcome'] == 'timeout'
+    assert result['items'] == driver.calls
+
+
+def test_condition_resets_when_results_disappear():
+    condition = SearchResultsReady('items', 'empty', stable_period=0)
+    assert condition(StubDriver([[3, False]])) is False
+    assert condition(StubDriver([[3, False]])) == ('ready', 3)
+    assert condition(StubDriver([[0, False]])) is False
+    assert (condition.last_count, condition.stable_since) == (0, None)
+    assert condition(StubDriver([[3, False]])) is False
+
+
+def test_goto_next_page():
+    assert goto_next_page(StubDriver([], next_page=None), timeout=1) is False
+    driver = StubDriver([], next_page='item-1', first_items=['item-1', 'item-1', 'item-2'])
+    assert goto_next_page(driver, timeout=1) is True
+    # 点击后列表一直没有替换：结果不完整，不能当作最后一页
+    with pytest.raises(TimeoutException):
+        goto_next_page(StubDriver([], next_page='item-1', first_items=['item-1']), timeout=0.2)
+
+
+def test_page_ready_stats_summary():
+    stats = PageReadyStats()
+    for elapsed, outcome in ((0.1, 'ready'), (0.3, 'ready'), (2.0, 'timeout')):
+        stats.record('艺人', 1.0, {'outcome': outcome, 'items': 1, 'elapsed': elapsed})
+    summary = stats.summary()
+    assert summary['samples'] == 3
+    assert summary['outcomes']['ready']['count'] == 2 and summary['outcomes']['ready']['ready_max'] == 0.3
+    assert summary['outcomes']['empty']['count'] == 0
+    assert summary['outcomes']['timeout']['ready_p50'] == 2.0
@@ -0,0 +1,60 @@
+"""
+爬取 worker：从共享任务队列领取艺人任务并执行（API 以 CRAWLER_QUEUE=shared 运行时只负责入队）
+可在多台机器上启动任意数量的 worker，连接同一个 DATABASE_URL 即可
+
+运行: python worker.py [--concurrency 2] [--lease-seconds 60] [--worker-id host-1]
+"""
+import os
+import signal
+import argparse
+import threading
+from app.main import app, init_driver_pools, close_driver_pools, update_artist_shows_sync
+from app.services.search_cache import SearchCache
+from app.services.upload_service import UploadService
+from app.services.task_queue import get_task_queue
+from app.services.crawl_worker import CrawlWorker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="爬取 worker")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('WORKER_CONCURRENCY', '2')),
+                        help="同时处理的艺人数")
+    parser.add_argument('--lease-seconds', type=float, default=float(os.getenv('TASK_LEASE_SECONDS', '60')))
+    parser.add_argument('--heartbeat-interval', type=float,
+                        default=float(os.getenv('TASK_HEARTBEAT_INTERVAL', '0')) or None)
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('TASK_POLL_INTERVAL', '1')))
+    parser.add_argument('--worker-id', default=os.getenv('WORKER_ID') or None)
+    args = parser.parse_args(argv)
+
+    # 与 API 启动时相同：建表并给已存在的 shows 表补充新增的列和索引，数据库不可用时直接退出
+    UploadService.init_db()
+    driver_pool = init_driver_pools()
+    app.state.search_cache = SearchCache()
+    warm_count = int(os.getenv('DRIVER_POOL_WARM', '1'))
+    if warm_count > 0 and os.getenv('CRAWLER_BACKEND', 'auto') != 'http':
+        driver_pool.warm(warm_count)
+
+    worker = CrawlWorker(
+        queue=get_task_queue(),
+        runner=update_artist_shows_sync,
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        heartbeat_interval=args.heartbeat_interval,
+        poll_interval=args.poll_interval,
+        worker_id=args.worker_id
+    )
+    stopping = threading.Event()
+    # SIGTERM/SIGINT 时不再领取新任务，等正在处理的艺人完成后退出
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+    worker.start()
+    try:
+        while not stopping.wait(1):
+            pass
+    finally:
+        worker.stop()
+        close_driver_pools()
+
+
+if __name__ == "__main__":
+    main()